@@ -13,13 +13,28 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from models import *  # Importe tous les modèles
-from database import SessionLocal, Base, engine, create_tables, init_database, seed_database
+from database import SessionLocal, Base, engine, async_engine, create_tables, init_database, seed_database, warm_up_pool, warm_up_async_pool
+from migrations import run_migrations
 from seeders import run_all_seeders
 from routes.user_route import router as user_router
 from routes.kyc_route import router as kyc_router
 from routes.theme_route import router as theme_router
 from routes.level_route import router as level_router
 from routes.question_route import router as question_router
+from routes.quiz_route import router as quiz_router
+from routes.leaderboard_route import router as leaderboard_router
+from services.pool_metrics import pool_metrics
+from services.catalog_cache import catalog_cache
+from services.answer_key_index import answer_key_index
+from services.score_aggregator import score_aggregator, SCORE_WRITE_BEHIND
+from services.leaderboard import leaderboards
+from services.answer_events import answer_events, ANSWER_EVENTS_ENABLED
+from services.question_stats import apply_answer_events
+from services.review_scheduler import apply_review_events
+from services.rate_limit import RateLimitMiddleware, rate_limiter
+from security.password_pool import password_pool
+from security.auth import token_cache
+from security.revocation import revocation_filter
 # Configurer le logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -35,6 +50,9 @@ app = FastAPI(
     docs_url="/swagger"
 )
 
+# Limitation de débit des routes d'authentification (ajoutée avant CORS pour que les 429 portent les en-têtes CORS)
+app.add_middleware(RateLimitMiddleware)
+
 # Ajouter le middleware CORS
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +67,23 @@ def health_check():
     """Endpoint de vérification de santé pour Eureka"""
     return {"status": "UP"}
 
+@app.get('/api/health/metrics', tags=['Système'])
+def health_metrics():
+    """Statistiques des pools de connexions et du cache du catalogue"""
+    return {
+        "status": "UP",
+        "pools": pool_metrics({"sync": engine, "async": async_engine}),
+        "catalog_cache": catalog_cache.stats(),
+        "answer_keys": answer_key_index.stats(),
+        "score_aggregator": score_aggregator.stats(),
+        "leaderboards": leaderboards.stats(),
+        "answer_events": answer_events.stats(),
+        "password_pool": password_pool.stats(),
+        "auth_cache": token_cache.stats(),
+        "token_revocation": revocation_filter.stats(),
+        "rate_limit": rate_limiter.stats()
+    }
+
 @app.on_event("startup")
 async def startup_event():
     # Initialiser la base de données
@@ -56,6 +91,7 @@ async def startup_event():
     if init_database():
         #creation de la base de donnee
         create_tables()
+        run_migrations(engine)
         seed_database()
         
         # Exécuter les seeders personnalisés
@@ -65,18 +101,71 @@ async def startup_event():
             run_all_seeders(db)
         except Exception as e:
             logger.error(f"Erreur lors de l'exécution des seeders: {str(e)}")
+        
+        # Charger les clés de réponse en mémoire (vérification des réponses sans requête)
+        try:
+            answer_key_index.build(db)
+        except Exception as e:
+            logger.error(f"Erreur lors de la construction de l'index des réponses: {str(e)}")
+        
+        # Classements : dernier snapshot + utilisateurs modifiés depuis (ou lecture complète)
+        try:
+            leaderboards.load(db)
+            leaderboards.start()
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du classement: {str(e)}")
+        
+        # Jetons révoqués : filtre en mémoire, resynchronisé périodiquement
+        try:
+            revocation_filter.rebuild(db)
+            revocation_filter.start()
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement des jetons révoqués: {str(e)}")
         finally:
             db.close()
+        
+        # Ouvrir les connexions minimales avant de recevoir du trafic
+        try:
+            warm_up_pool()
+            await warm_up_async_pool()
+        except Exception as e:
+            logger.error(f"Erreur lors du préchauffage des pools: {str(e)}")
+        
+        # Démarrer les processus bcrypt avant la première connexion
+        try:
+            password_pool.warm_up()
+        except Exception as e:
+            logger.error(f"Erreur lors du démarrage du pool de mots de passe: {str(e)}")
+        
+        if SCORE_WRITE_BEHIND:
+            score_aggregator.start()
+        if ANSWER_EVENTS_ENABLED:
+            # Statistiques par question et boîtes de révision mises à jour dans la transaction de chaque lot
+            answer_events.add_listener(apply_answer_events)
+            answer_events.add_listener(apply_review_events)
+            answer_events.start()
     else:
         logger.error("Impossible de démarrer l'application en raison d'erreurs d'initialisation.")
         sys.exit(1)
 
+@app.on_event("shutdown")
+def shutdown_event():
+    # Écrire les crédits de score encore en mémoire avant l'arrêt
+    score_aggregator.stop()
+    leaderboards.stop()
+    # Écrire les réponses encore en file
+    answer_events.stop()
+    password_pool.shutdown()
+    revocation_filter.stop()
+
 # Inclure les routers
 app.include_router(user_router)
 app.include_router(kyc_router)
 app.include_router(theme_router)
 app.include_router(level_router)
 app.include_router(question_router)
+app.include_router(quiz_router)
+app.include_router(leaderboard_router)
 
 # Point d'entrée principal
 if __name__ == '__main__':
@@ -88,6 +177,7 @@ if __name__ == '__main__':
     if init_database():
         #creation de la base de donnee
         create_tables()
+        run_migrations(engine)
         # Ajouter des données de test (Canada et Cameroun)
         seed_database()
         
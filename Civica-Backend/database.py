@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import logging
+import asyncio
+import contextlib
 import pymysql
+from services.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -14,14 +19,55 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Configuration de la base de données
-DATABASE_URL = f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DB', 'civica_db')}"
+# Configuration de la base de données (DATABASE_URL permet par exemple une base SQLite en local)
+DATABASE_URL = os.getenv('DATABASE_URL') or f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DB', 'civica_db')}"
 
-# Créer le moteur SQLAlchemy
-engine = create_engine(DATABASE_URL)
+# Pilotes asynchrones correspondant aux pilotes synchrones
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+def to_async_url(url: str) -> str:
+    """mysql+pymysql://... -> mysql+aiomysql://..., sqlite://... -> sqlite+aiosqlite://..."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or to_async_url(DATABASE_URL)
+
+# Configuration du pool de connexions
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+# Inférieur au wait_timeout de MySQL pour ne jamais réutiliser une connexion fermée côté serveur
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Nombre de connexions ouvertes au démarrage (par moteur)
+DB_POOL_WARMUP = int(os.getenv('DB_POOL_WARMUP', 2))
+
+def pool_options(url: str, poolclass) -> dict:
+    """Options de pool pour create_engine (SQLite garde le pool par défaut de SQLAlchemy)"""
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'poolclass': poolclass,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+# Créer le moteur SQLAlchemy (écritures, seeders, migrations)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, InstrumentedQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Moteur asynchrone pour les routes de lecture : la concurrence est bornée par le pool
+# de connexions et non plus par le pool de threads d'anyio
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Fonction pour créer les tables dans la base de données
 def create_tables():
     Base.metadata.create_all(bind=engine)
@@ -35,11 +81,34 @@ def get_db():
     finally:
         db.close()
 
+# Fonction pour obtenir une session asynchrone
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Fonctions pour ouvrir les connexions minimales au démarrage
+def warm_up_pool(count: int = DB_POOL_WARMUP):
+    """Ouvre count connexions du moteur synchrone en même temps puis les rend au pool"""
+    with contextlib.ExitStack() as stack:
+        for _ in range(count):
+            stack.enter_context(engine.connect())
+    logger.info(f"Pool synchrone préchauffé ({count} connexions)")
+
+async def warm_up_async_pool(count: int = DB_POOL_WARMUP):
+    """Ouvre count connexions du moteur asynchrone en même temps puis les rend au pool"""
+    async with contextlib.AsyncExitStack() as stack:
+        await asyncio.gather(*(stack.enter_async_context(async_engine.connect()) for _ in range(count)))
+    logger.info(f"Pool asynchrone préchauffé ({count} connexions)")
+
 
 # Fonction pour initialiser la base de données
 def init_database():
     try:
         logger.info("Initialisation de la base de données...")
+        if make_url(DATABASE_URL).get_backend_name() != 'mysql':
+            # Base locale (SQLite...) : rien à créer côté serveur
+            return True
         # Récupérer les informations de connexion depuis les variables d'environnement
         mysql_host = os.getenv('MYSQL_HOST')
         mysql_port = int(os.getenv('MYSQL_PORT'))
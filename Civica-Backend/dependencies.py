@@ -17,6 +17,12 @@ def get_db():
     finally:
         db.close()
 
+# Dépendance pour obtenir une session asynchrone (routes de lecture async def)
+async def get_async_db():
+    from database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Modèle de réponse standardisée
 class StandardResponse(BaseModel):
     statusCode: int
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Migrations de schéma versionnées
+
+Chaque module de migrations/versions/ (m0001_..., m0002_...) définit :
+    VERSION       identifiant unique, trié dans l'ordre d'application
+    DESCRIPTION   texte court
+    upgrade(conn) opérations DDL (voir add_index / drop_index)
+    EXPLAIN_CHECKS liste de (requête SQL, paramètres, index attendu) vérifiée après l'application
+
+Les versions appliquées sont enregistrées dans la table schema_migrations.
+run_migrations crée d'abord les tables des modèles absentes (create_schema) :
+`python -m migrations upgrade` fonctionne aussi sur une base vide.
+"""
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+from typing import List, Optional, Sequence
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+MIGRATIONS_LOCK = "civica_schema_migrations"
+
+
+def load_migrations() -> list:
+    from migrations import versions
+    modules = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        if info.name.startswith("m"):
+            modules.append(importlib.import_module(f"{versions.__name__}.{info.name}"))
+    return sorted(modules, key=lambda module: module.VERSION)
+
+
+def _ensure_table(conn: Connection):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        "version VARCHAR(50) NOT NULL PRIMARY KEY, "
+        "description VARCHAR(255) NULL, "
+        "applied_at DATETIME NOT NULL)"
+    ))
+
+
+def applied_versions(conn: Connection) -> List[str]:
+    _ensure_table(conn)
+    rows = conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE} ORDER BY version"))
+    return [row[0] for row in rows]
+
+
+def create_schema(engine: Engine):
+    """Crée les tables de tous les modèles (models/model_*.py) qui n'existent pas encore"""
+    import models
+    from database import Base
+    for info in pkgutil.iter_modules(models.__path__):
+        if info.name.startswith("model_"):
+            importlib.import_module(f"models.{info.name}")
+    Base.metadata.create_all(engine)
+
+
+# Opérations
+
+def index_exists(conn: Connection, table: str, name: str) -> bool:
+    return any(index["name"] == name for index in inspect(conn).get_indexes(table))
+
+
+def add_index(conn: Connection, table: str, name: str, columns: Sequence[str], unique: bool = False, fulltext: bool = False):
+    """
+    Ajoute un index s'il n'existe pas encore (une base créée par create_all l'a déjà).
+    Sur MySQL l'index est construit en ligne (ALGORITHM=INPLACE, LOCK=NONE) :
+    les lectures et écritures continuent pendant la construction.
+    """
+    if index_exists(conn, table, name):
+        logger.info(f"Index {name} déjà présent sur {table}")
+        return
+    cols = ", ".join(columns)
+    if conn.dialect.name == "mysql":
+        if fulltext:
+            # InnoDB ne sait pas construire un index FULLTEXT sans bloquer les écritures
+            conn.execute(text(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({cols}) WITH PARSER ngram, ALGORITHM=INPLACE, LOCK=SHARED"))
+        else:
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            conn.execute(text(f"ALTER TABLE {table} ADD {kind} {name} ({cols}), ALGORITHM=INPLACE, LOCK=NONE"))
+    elif fulltext:
+        logger.info(f"Index FULLTEXT {name} ignoré pour le dialecte {conn.dialect.name}")
+        return
+    else:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(text(f"CREATE {kind} {name} ON {table} ({cols})"))
+    logger.info(f"Index {name} ajouté sur {table} ({cols})")
+
+
+def drop_index(conn: Connection, table: str, name: str):
+    """Supprime un index s'il existe (en ligne sur MySQL)"""
+    if not index_exists(conn, table, name):
+        return
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"ALTER TABLE {table} DROP INDEX {name}, ALGORITHM=INPLACE, LOCK=NONE"))
+    else:
+        conn.execute(text(f"DROP INDEX {name}"))
+    logger.info(f"Index {name} supprimé de {table}")
+
+
+# Vérifications EXPLAIN
+
+def explain_uses_index(conn: Connection, sql: str, params: dict, index_name: str) -> bool:
+    """Vrai si le plan d'exécution de la requête passe par index_name"""
+    if conn.dialect.name == "mysql":
+        rows = conn.execute(text(f"EXPLAIN {sql}"), params).mappings().all()
+        return any(row.get("key") == index_name for row in rows)
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+        # Une clé primaire composite est un index implicite sqlite_autoindex_<table>_N
+        wanted = ("PRIMARY KEY", "INDEX sqlite_autoindex_") if index_name == "PRIMARY" else (f"INDEX {index_name}",)
+        return any(w in str(row[-1]) for row in rows for w in wanted)
+    logger.info(f"Vérification EXPLAIN non supportée pour le dialecte {conn.dialect.name}")
+    return True
+
+
+def verify(conn: Connection, module) -> List[str]:
+    """Exécute les EXPLAIN_CHECKS d'une migration, retourne la liste des échecs"""
+    failures = []
+    for sql, params, index_name in getattr(module, "EXPLAIN_CHECKS", []):
+        if not explain_uses_index(conn, sql, params, index_name):
+            failures.append(f"{module.VERSION}: {index_name} non utilisé par « {sql} »")
+    for failure in failures:
+        logger.warning(f"Vérification EXPLAIN échouée - {failure}")
+    return failures
+
+
+def run_migrations(engine: Engine, target: Optional[str] = None) -> List[str]:
+    """Applique les migrations en attente (jusqu'à target inclus), retourne les versions appliquées"""
+    # Les migrations modifient des tables existantes : une base vide reçoit d'abord le schéma des modèles
+    create_schema(engine)
+    applied_now = []
+    with engine.connect() as conn:
+        is_mysql = conn.dialect.name == "mysql"
+        if is_mysql:
+            # Plusieurs workers démarrent en même temps : un seul applique les migrations
+            conn.execute(text("SELECT GET_LOCK(:name, 300)"), {"name": MIGRATIONS_LOCK})
+        try:
+            done = set(applied_versions(conn))
+            conn.commit()
+            for module in load_migrations():
+                if module.VERSION in done:
+                    continue
+                if target and module.VERSION > target:
+                    break
+                logger.info(f"Application de la migration {module.VERSION}: {module.DESCRIPTION}")
+                module.upgrade(conn)
+                conn.execute(
+                    text(f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+                    {"version": module.VERSION, "description": module.DESCRIPTION, "applied_at": datetime.utcnow()}
+                )
+                conn.commit()
+                verify(conn, module)
+                applied_now.append(module.VERSION)
+        finally:
+            if is_mysql:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATIONS_LOCK})
+    if not applied_now:
+        logger.info("Schéma à jour, aucune migration à appliquer")
+    return applied_now
+
+
+def verify_all(engine: Engine) -> List[str]:
+    """Rejoue les vérifications EXPLAIN de toutes les migrations appliquées"""
+    failures = []
+    with engine.connect() as conn:
+        done = set(applied_versions(conn))
+        for module in load_migrations():
+            if module.VERSION in done:
+                failures += verify(conn, module)
+    return failures
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Usage :
+    python -m migrations upgrade [version]   applique les migrations en attente
+    python -m migrations status              liste les migrations et leur état
+    python -m migrations verify              rejoue les vérifications EXPLAIN
+"""
+import sys
+from database import engine
+from migrations import run_migrations, verify_all, applied_versions, load_migrations
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "status"
+    if command == "upgrade":
+        run_migrations(engine, argv[2] if len(argv) > 2 else None)
+        return 0
+    if command == "status":
+        with engine.connect() as conn:
+            done = set(applied_versions(conn))
+            conn.commit()
+        for module in load_migrations():
+            state = "appliquée" if module.VERSION in done else "en attente"
+            print(f"{module.VERSION}  {state:<10}  {module.DESCRIPTION}")
+        return 0
+    if command == "verify":
+        failures = verify_all(engine)
+        for failure in failures:
+            print(failure)
+        return 1 if failures else 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Index composites des filtres du catalogue et des utilisateurs, suppression de l'index redondant sur users.id"""
+from migrations import add_index, drop_index
+
+VERSION = "0001"
+DESCRIPTION = "Index composites questions/levels/users, suppression de ix_users_id"
+
+EXPLAIN_CHECKS = [
+    (
+        "SELECT id FROM questions WHERE level_id = :level_id AND is_active = 1 ORDER BY order_index",
+        {"level_id": "00000000-0000-0000-0000-000000000000"},
+        "ix_questions_level_active_order",
+    ),
+    (
+        "SELECT id FROM levels WHERE theme_id = :theme_id AND is_active = 1 ORDER BY order_index",
+        {"theme_id": "00000000-0000-0000-0000-000000000000"},
+        "ix_levels_theme_active_order",
+    ),
+    # Recherche par pseudo : vérifiée par 0009 (ix_users_spseudo remplacé par ux_users_spseudo)
+    (
+        "SELECT COUNT(*) FROM users WHERE status = 'ACTIVE' AND is_deleted = 0",
+        {},
+        "ix_users_status_deleted",
+    ),
+]
+
+
+def upgrade(conn):
+    add_index(conn, "questions", "ix_questions_level_active_order", ["level_id", "is_active", "order_index"])
+    add_index(conn, "levels", "ix_levels_theme_active_order", ["theme_id", "is_active", "order_index"])
+    add_index(conn, "users", "ix_users_spseudo", ["spseudo"])
+    add_index(conn, "users", "ix_users_status_deleted", ["status", "is_deleted"])
+    # Pagination par (created_at, id) : InnoDB ajoute la clé primaire à chaque index secondaire
+    add_index(conn, "users", "ix_users_created_at", ["created_at"])
+    # users.id est déjà la clé primaire : l'index unique ix_users_id ne fait que doubler les écritures
+    drop_index(conn, "users", "ix_users_id")
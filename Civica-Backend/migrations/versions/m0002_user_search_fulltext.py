@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""Index FULLTEXT ngram de la recherche d'utilisateurs (MySQL uniquement)"""
+from migrations import add_index
+from models.model_user import USER_SEARCH_INDEX
+
+VERSION = "0002"
+DESCRIPTION = "Index FULLTEXT ngram sur users(email, spseudo)"
+
+# MATCH ... AGAINST passe toujours par l'index FULLTEXT, pas de plan à vérifier
+EXPLAIN_CHECKS = []
+
+
+def upgrade(conn):
+    add_index(conn, "users", USER_SEARCH_INDEX, ["email", "spseudo"], fulltext=True)
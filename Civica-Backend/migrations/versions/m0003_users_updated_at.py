@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Index sur users.updated_at : rattrapage du classement depuis son dernier snapshot"""
+from migrations import add_index
+
+VERSION = "0003"
+DESCRIPTION = "Index ix_users_updated_at"
+
+EXPLAIN_CHECKS = [
+    (
+        "SELECT id, point, is_deleted FROM users WHERE updated_at >= :since",
+        {"since": "2999-01-01 00:00:00"},
+        "ix_users_updated_at",
+    ),
+]
+
+
+def upgrade(conn):
+    add_index(conn, "users", "ix_users_updated_at", ["updated_at"])
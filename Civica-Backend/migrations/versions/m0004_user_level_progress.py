@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Table user_level_progress (progression par niveau)"""
+from models.model_level_progress import UserLevelProgressEntity
+
+VERSION = "0004"
+DESCRIPTION = "Table user_level_progress"
+
+# Lecture de la carte de progression : préfixe de la clé primaire (user_id, level_id)
+EXPLAIN_CHECKS = [
+    (
+        "SELECT level_id, best_score, stars FROM user_level_progress WHERE user_id = :user_id",
+        {"user_id": "00000000-0000-0000-0000-000000000000"},
+        "PRIMARY",
+    ),
+]
+
+
+def upgrade(conn):
+    # Déjà créée par create_schema() en tête de run_migrations ; checkfirst rend l'opération sans effet
+    UserLevelProgressEntity.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Table answer_events (journal des réponses)"""
+from models.model_answer_event import AnswerEventEntity
+
+VERSION = "0005"
+DESCRIPTION = "Table answer_events"
+
+# Historique d'un utilisateur, du plus récent au plus ancien
+EXPLAIN_CHECKS = [
+    (
+        "SELECT id, question_id, is_correct FROM answer_events WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT 20",
+        {"user_id": "00000000-0000-0000-0000-000000000000"},
+        "ix_answer_events_user_created",
+    ),
+]
+
+
+def upgrade(conn):
+    # Déjà créée par create_schema() en tête de run_migrations ; checkfirst rend l'opération sans effet
+    AnswerEventEntity.__table__.create(conn, checkfirst=True)
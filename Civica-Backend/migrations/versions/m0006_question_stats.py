@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Table question_stats (statistiques par question)"""
+from models.model_question_stats import QuestionStatsEntity
+
+VERSION = "0006"
+DESCRIPTION = "Table question_stats"
+
+# Mise à jour d'un compteur : accès par clé primaire
+EXPLAIN_CHECKS = [
+    (
+        "SELECT attempts, correct FROM question_stats WHERE question_id = :question_id",
+        {"question_id": "00000000-0000-0000-0000-000000000000"},
+        "PRIMARY",
+    ),
+]
+
+
+def upgrade(conn):
+    # Déjà créée par create_schema() en tête de run_migrations ; checkfirst rend l'opération sans effet
+    QuestionStatsEntity.__table__.create(conn, checkfirst=True)
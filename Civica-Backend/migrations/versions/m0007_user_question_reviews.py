@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Table user_question_reviews (révision espacée)"""
+from models.model_question_review import UserQuestionReviewEntity
+
+VERSION = "0007"
+DESCRIPTION = "Table user_question_reviews"
+
+# État de révision d'un utilisateur : préfixe de la clé primaire (user_id, question_id)
+EXPLAIN_CHECKS = [
+    (
+        "SELECT question_id, box, due_at FROM user_question_reviews WHERE user_id = :user_id",
+        {"user_id": "00000000-0000-0000-0000-000000000000"},
+        "PRIMARY",
+    ),
+]
+
+
+def upgrade(conn):
+    # Déjà créée par create_schema() en tête de run_migrations ; checkfirst rend l'opération sans effet
+    UserQuestionReviewEntity.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""Tables refresh_tokens et revoked_tokens"""
+from models.model_auth_token import RefreshTokenEntity, RevokedTokenEntity
+
+VERSION = "0008"
+DESCRIPTION = "Tables refresh_tokens et revoked_tokens"
+
+EXPLAIN_CHECKS = [
+    # Rotation : recherche par empreinte du jeton
+    (
+        "SELECT id, family_id FROM refresh_tokens WHERE token_hash = :token_hash",
+        {"token_hash": "0" * 64},
+        "ux_refresh_tokens_token_hash",
+    ),
+    # Synchronisation incrémentale des filtres de révocation
+    (
+        "SELECT jti FROM revoked_tokens WHERE revoked_at >= :since",
+        {"since": "2000-01-01 00:00:00"},
+        "ix_revoked_tokens_revoked_at",
+    ),
+]
+
+
+def upgrade(conn):
+    # Déjà créées par create_schema() en tête de run_migrations ; checkfirst rend l'opération sans effet
+    RefreshTokenEntity.__table__.create(conn, checkfirst=True)
+    RevokedTokenEntity.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Unicité de users.spseudo : l'inscription n'a plus à vérifier le pseudo avant l'INSERT"""
+import logging
+from sqlalchemy import text
+from migrations import add_index, drop_index
+from models.model_user import USER_PSEUDO_UNIQUE
+
+logger = logging.getLogger(__name__)
+
+VERSION = "0009"
+DESCRIPTION = "Index unique ux_users_spseudo (remplace ix_users_spseudo)"
+
+EXPLAIN_CHECKS = [
+    (
+        "SELECT id FROM users WHERE spseudo = :spseudo",
+        {"spseudo": "pseudo"},
+        USER_PSEUDO_UNIQUE,
+    ),
+]
+
+
+def _rename_duplicates(conn) -> int:
+    """Le plus ancien compte garde son pseudo, les autres reçoivent un suffixe tiré de leur id"""
+    duplicated = conn.execute(text(
+        "SELECT spseudo FROM users WHERE spseudo IS NOT NULL GROUP BY spseudo HAVING COUNT(*) > 1"
+    )).scalars().all()
+    renamed = 0
+    for pseudo in duplicated:
+        ids = conn.execute(
+            text("SELECT id FROM users WHERE spseudo = :spseudo ORDER BY created_at, id"),
+            {"spseudo": pseudo}
+        ).scalars().all()
+        for user_id in ids[1:]:
+            conn.execute(
+                text("UPDATE users SET spseudo = :new WHERE id = :id"),
+                {"new": f"{pseudo[:41]}_{user_id[:8]}", "id": user_id}
+            )
+            renamed += 1
+    if renamed:
+        logger.warning(f"{renamed} pseudo(s) en double renommé(s) avant la création de {USER_PSEUDO_UNIQUE}")
+    return renamed
+
+
+def upgrade(conn):
+    _rename_duplicates(conn)
+    add_index(conn, "users", USER_PSEUDO_UNIQUE, ["spseudo"], unique=True)
+    # L'index unique sert aussi les recherches par pseudo
+    drop_index(conn, "users", "ix_users_spseudo")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Index, Integer, String, func
+from database import Base
+
+class AnswerEventEntity(Base):
+    """
+    Journal des réponses (ajout seul) : une ligne par réponse vérifiée ou soumise dans un quiz
+    """
+    __tablename__ = 'answer_events'
+    
+    # BIGINT AUTO_INCREMENT sur MySQL, INTEGER PRIMARY KEY (rowid) sur SQLite
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    # Pas de clé étrangère : le journal survit aux suppressions et l'insertion ne vérifie rien
+    user_id = Column(String(36), nullable=False)
+    question_id = Column(String(36), nullable=False)
+    level_id = Column(String(36), nullable=True)
+    session_id = Column(String(36), nullable=True)
+    answer = Column(String(1), nullable=True)
+    is_correct = Column(Boolean, nullable=False)
+    points = Column(Integer, default=0, nullable=False)
+    response_ms = Column(Integer, nullable=True)
+    source = Column(String(10), nullable=False)  # check, quiz
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Historique d'un utilisateur (du plus récent au plus ancien)
+        Index('ix_answer_events_user_created', 'user_id', 'created_at'),
+    )
+    
+    def to_dict(self):
+        """Convertit l'entité en dictionnaire"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'question_id': self.question_id,
+            'level_id': self.level_id,
+            'session_id': self.session_id,
+            'answer': self.answer,
+            'is_correct': self.is_correct,
+            'points': self.points,
+            'response_ms': self.response_ms,
+            'source': self.source,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, func
+from database import Base
+
+class RefreshTokenEntity(Base):
+    """
+    Jeton de rafraîchissement (seule son empreinte SHA-256 est stockée), remplacé à chaque utilisation
+    """
+    __tablename__ = 'refresh_tokens'
+    
+    id = Column(String(36), primary_key=True)
+    user_id = Column(String(36), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    token_hash = Column(String(64), nullable=False)
+    # Chaîne de rotations issue d'une même connexion : révoquée entière si un ancien jeton est rejoué
+    family_id = Column(String(36), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String(36), nullable=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('ux_refresh_tokens_token_hash', 'token_hash', unique=True),
+        Index('ix_refresh_tokens_user', 'user_id'),
+        Index('ix_refresh_tokens_family', 'family_id'),
+        Index('ix_refresh_tokens_expires_at', 'expires_at'),
+    )
+
+class RevokedTokenEntity(Base):
+    """
+    Jeton d'accès révoqué avant son expiration (identifié par sa claim jti)
+    """
+    __tablename__ = 'revoked_tokens'
+    
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(String(36), nullable=True)
+    # Expiration du jeton : la ligne devient inutile ensuite
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Synchronisation incrémentale des filtres en mémoire
+        Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+        Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 from typing import List, Optional
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, select, func
+from sqlalchemy.orm import relationship, query_expression, with_expression, selectinload
 from datetime import datetime
 import uuid
 from database import Base
+from models.model_themes import ThemeEntity
+from models.model_question import QuestionEntity
 
 class LevelEntity(Base):
     __tablename__ = "levels"
@@ -21,10 +23,17 @@ class LevelEntity(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_levels_theme_active_order', 'theme_id', 'is_active', 'order_index'),
+    )
+    
     # Relationships
     theme = relationship("ThemeEntity", back_populates="levels")
     questions = relationship("QuestionEntity", back_populates="level", cascade="all, delete-orphan")
     
+    # Filled by list queries with with_expression(..., level_questions_count())
+    questions_count = query_expression()
+    
     def to_dict(self):
         return {
             "id": self.id,
@@ -37,11 +46,41 @@ class LevelEntity(Base):
             "min_score_to_unlock": self.min_score_to_unlock,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "questions_count": len(self.questions) if self.questions else 0,
+            "questions_count": self.questions_count if self.questions_count is not None else len(self.questions),
             "theme": self.theme.to_dict() if self.theme else None
         }
 
 
+def theme_levels_count():
+    """Correlated COUNT of a theme's levels, to load into ThemeEntity.levels_count"""
+    return (
+        select(func.count(LevelEntity.id))
+        .where(LevelEntity.theme_id == ThemeEntity.id)
+        .correlate(ThemeEntity)
+        .scalar_subquery()
+    )
+
+def level_questions_count():
+    """Correlated COUNT of a level's questions, to load into LevelEntity.questions_count"""
+    return (
+        select(func.count(QuestionEntity.id))
+        .where(QuestionEntity.level_id == LevelEntity.id)
+        .correlate(LevelEntity)
+        .scalar_subquery()
+    )
+
+def with_theme_counts():
+    """Loader option filling levels_count on a ThemeEntity query"""
+    return with_expression(ThemeEntity.levels_count, theme_levels_count())
+
+def with_level_counts():
+    """Loader options for LevelEntity.to_dict without lazy loads: counts plus the theme in one SELECT ... IN"""
+    return (
+        with_expression(LevelEntity.questions_count, level_questions_count()),
+        selectinload(LevelEntity.theme).options(with_theme_counts()),
+    )
+
+
 
 class LevelBase(BaseModel):
     theme_id: str
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from database import Base
+
+class UserLevelProgressEntity(Base):
+    """
+    Progression d'un utilisateur sur un niveau (meilleur score, étoiles, tentatives)
+    """
+    __tablename__ = 'user_level_progress'
+    
+    # Clé primaire (user_id, level_id) : la carte de progression d'un utilisateur est un préfixe de l'index
+    user_id = Column(String(36), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    level_id = Column(String(36), ForeignKey('levels.id', ondelete='CASCADE'), primary_key=True)
+    best_score = Column(Integer, default=0, nullable=False)
+    stars = Column(Integer, default=0, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def to_dict(self):
+        """Convertit l'entité en dictionnaire"""
+        return {
+            'user_id': self.user_id,
+            'level_id': self.level_id,
+            'best_score': self.best_score,
+            'stars': self.stars,
+            'attempts': self.attempts,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,11 +1,14 @@
 from typing import Optional
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from database import Base
 
+# Accepted values of correct_answer (one ASCII letter per option)
+ANSWER_LETTERS = ("A", "B", "C", "D")
+
 class QuestionEntity(Base):
     __tablename__ = "questions"
     
@@ -24,6 +27,10 @@ class QuestionEntity(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_questions_level_active_order', 'level_id', 'is_active', 'order_index'),
+    )
+    
     # Relationships
     level = relationship("LevelEntity", back_populates="questions")
     
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+from sqlalchemy import Boolean, Column, DateTime, Integer, SmallInteger, String, func
+from database import Base
+
+class UserQuestionReviewEntity(Base):
+    """
+    État de révision (système de Leitner) d'une question pour un utilisateur : boîte et prochaine échéance
+    """
+    __tablename__ = 'user_question_reviews'
+    
+    # Clé primaire (user_id, question_id) : l'état complet d'un utilisateur est un préfixe de l'index.
+    # Pas de clé étrangère : mis à jour par lots depuis le journal des réponses, comme question_stats
+    user_id = Column(String(36), primary_key=True)
+    question_id = Column(String(36), primary_key=True)
+    box = Column(SmallInteger, default=1, nullable=False)  # 1 (à revoir vite) à 5 (maîtrisée)
+    due_at = Column(DateTime, nullable=False)
+    last_correct = Column(Boolean, nullable=False)
+    reviews = Column(Integer, default=0, nullable=False)
+    lapses = Column(Integer, default=0, nullable=False)  # Réponses fausses
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def to_dict(self):
+        """Convertit l'entité en dictionnaire"""
+        return {
+            'user_id': self.user_id,
+            'question_id': self.question_id,
+            'box': self.box,
+            'due_at': self.due_at.isoformat() if self.due_at else None,
+            'last_correct': self.last_correct,
+            'reviews': self.reviews,
+            'lapses': self.lapses,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
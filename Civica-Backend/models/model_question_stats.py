@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, func
+from database import Base
+
+# Options comptées individuellement ; les autres réponses ne comptent que comme tentatives
+OPTIONS = ("A", "B", "C", "D")
+
+class QuestionStatsEntity(Base):
+    """
+    Compteurs cumulés des réponses à une question, mis à jour par lots depuis le journal des réponses
+    """
+    __tablename__ = 'question_stats'
+    
+    # Pas de clé étrangère : un lot d'événements ne doit pas échouer pour une question supprimée
+    question_id = Column(String(36), primary_key=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    correct = Column(Integer, default=0, nullable=False)
+    picks_a = Column(Integer, default=0, nullable=False)
+    picks_b = Column(Integer, default=0, nullable=False)
+    picks_c = Column(Integer, default=0, nullable=False)
+    picks_d = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+    # Moyenne = response_ms_total / response_count (seules les réponses chronométrées comptent)
+    response_count = Column(Integer, default=0, nullable=False)
+    response_ms_total = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def to_dict(self):
+        """Convertit l'entité en dictionnaire, avec le taux de réussite et le temps moyen"""
+        return {
+            'question_id': self.question_id,
+            'attempts': self.attempts,
+            'correct': self.correct,
+            'correct_rate': round(self.correct / self.attempts, 4) if self.attempts else None,
+            'picks': {
+                'A': self.picks_a,
+                'B': self.picks_b,
+                'C': self.picks_c,
+                'D': self.picks_d,
+                'none': self.skipped
+            },
+            'mean_response_ms': round(self.response_ms_total / self.response_count) if self.response_count else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
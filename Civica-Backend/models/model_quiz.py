@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class QuizStart(BaseModel):
+    user_id: str
+    level_id: str
+
+class QuizAnswer(BaseModel):
+    question_id: str
+    answer: Optional[str] = None  # A, B, C, D ou None si la question n'a pas été répondue
+    response_ms: Optional[int] = None  # Temps de réponse mesuré par le client
+
+class QuizSubmit(BaseModel):
+    user_id: str
+    answers: List[QuizAnswer] = []
@@ -3,7 +3,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
 from datetime import datetime
 import uuid
 
@@ -26,6 +26,9 @@ class ThemeEntity(Base):
     # Relationships
     levels = relationship("LevelEntity", back_populates="theme", cascade="all, delete-orphan")
     
+    # Filled by list queries with with_expression(..., theme_levels_count())
+    levels_count = query_expression()
+    
     def to_dict(self):
         return {
             "id": self.id,
@@ -37,7 +40,7 @@ class ThemeEntity(Base):
             "order_index": self.order_index,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "levels_count": len(self.levels) if self.levels else 0
+            "levels_count": self.levels_count if self.levels_count is not None else len(self.levels)
         }
 # Pydantic Models (API Request/Response)
 class ThemeBase(BaseModel):
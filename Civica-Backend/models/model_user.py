@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import os
+import re
 from typing import Optional
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Enum as SQLEnum, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index, Enum as SQLEnum, func
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from database import Base
 
@@ -26,13 +27,32 @@ class Role(Enum):
     USER = 'USER'
     ADMIN = 'ADMIN'
 
+# Index FULLTEXT (parser ngram) utilisé par la recherche d'utilisateurs (MySQL uniquement)
+USER_SEARCH_INDEX = 'ft_users_email_spseudo'
+# Unicité du pseudo, garantie par la base (l'email est unique par sa colonne)
+USER_PSEUDO_UNIQUE = 'ux_users_spseudo'
+
+def duplicate_user_field(error: Exception) -> Optional[str]:
+    """'email' ou 'spseudo' si error est une violation d'unicité sur users, sinon None"""
+    message = str(getattr(error, 'orig', error))
+    # MySQL : "Duplicate entry '...' for key 'users.ux_users_spseudo'" ; SQLite : "UNIQUE constraint failed: users.spseudo"
+    found = re.search(r"for key '([^']+)'", message) or re.search(r"UNIQUE constraint failed: ([\w.]+)", message)
+    if found is None:
+        return None
+    key = found.group(1)
+    if 'spseudo' in key:
+        return 'spseudo'
+    if 'email' in key:
+        return 'email'
+    return None
+
 class UserEntity(Base):
     """
     Modèle SQLAlchemy pour les utilisateurs UserEntity
     """
     __tablename__ = 'users'
     
-    id = Column(String(36), primary_key=True, unique=True, index=True)
+    id = Column(String(36), primary_key=True)
     spseudo = Column(String(50), nullable=True)
     email = Column(String(100), unique=True, nullable=False)
     password = Column(String(255), nullable=True)
@@ -49,6 +69,14 @@ class UserEntity(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
+    __table_args__ = (
+        Index(USER_SEARCH_INDEX, 'email', 'spseudo', mysql_prefix='FULLTEXT', mysql_with_parser='ngram').ddl_if(dialect='mysql'),
+        Index(USER_PSEUDO_UNIQUE, 'spseudo', unique=True),
+        Index('ix_users_status_deleted', 'status', 'is_deleted'),
+        Index('ix_users_created_at', 'created_at'),
+        Index('ix_users_updated_at', 'updated_at'),
+    )
+    
     def to_dict(self):
         """Convertit l'entité en dictionnaire"""
         return {
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from typing import Annotated
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, StringConstraints
 
 class CheckEmail(BaseModel):
     """Model for user login credentials"""
@@ -30,4 +31,15 @@ class FCMToken(BaseModel):
 class UserIdRequest(BaseModel):
     user_id: str = ""
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = ""
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class UserImportRow(BaseModel):
+    """One row of a bulk user import (CSV column or JSON key per field)"""
+    email: EmailStr = Field(max_length=100)
+    password: str = Field(min_length=8, max_length=72)
+    spseudo: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=50)]
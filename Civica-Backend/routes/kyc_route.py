@@ -16,15 +16,12 @@ from pathlib import Path
 from dependencies import StandardResponse, handle_exception
 from fastapi import Request, Body, UploadFile, File, Form
 import sys
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import time
-from security.token_utils import verify_token
+from security.auth import Principal, get_current_user
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-http_bearer = HTTPBearer()
-
 router = APIRouter(
     prefix="/api/kyc",
     tags=["KYC"],
@@ -49,18 +46,12 @@ async def upload_kyc_document(
     userId: str = Form(..., description="User ID"),
     frontImage: UploadFile = File(..., description="Front image of the document"),
     backImage: UploadFile = File(None, description="Back image of the document (required for CNI and Permit)"),
-    credentials: HTTPAuthorizationCredentials = Depends(http_bearer)
+    principal: Principal = Depends(get_current_user)
 ):
     """
     Upload KYC documents for verification
     """
     try:
-        if not credentials.credentials:
-            return StandardResponse(statusCode=404, message="token not found", data=None)
-        #verify token
-        verif_token = verify_token(credentials.credentials)
-        if not verif_token:
-            return StandardResponse(statusCode=401, message="Unauthorized", data=None)
         # Validate document type
         if documentType not in DOCUMENT_TYPES:
             return StandardResponse(
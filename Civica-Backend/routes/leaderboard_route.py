@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model_user import UserEntity
+from dependencies import get_async_db
+from services.leaderboard import leaderboards
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/leaderboard",
+    tags=["Classement"],
+    responses={404: {"description": "Not found"}},
+)
+
+Board = Literal["global", "weekly", "theme"]
+
+
+async def with_pseudos(db: AsyncSession, entries: List[dict]) -> List[dict]:
+    """Ajoute le pseudo de chaque entrée (une requête par clé primaire) et écarte les comptes supprimés"""
+    if not entries:
+        return entries
+    rows = (await db.execute(
+        select(UserEntity.id, UserEntity.spseudo).where(UserEntity.id.in_([e["user_id"] for e in entries]))
+    )).all()
+    pseudos = {row.id: row.spseudo for row in rows}
+    kept = []
+    for entry in entries:
+        if entry["user_id"] not in pseudos:
+            # Utilisateur supprimé depuis le dernier snapshot
+            leaderboards.discard(entry["user_id"])
+            continue
+        kept.append({**entry, "pseudo": pseudos[entry["user_id"]]})
+    return kept
+
+
+def bad_board(board: str, theme_id: Optional[str]) -> Optional[JSONResponse]:
+    if board == "theme" and not theme_id:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "message": "theme_id est requis pour le classement par thème",
+                "data": None
+            }
+        )
+    return None
+
+
+@router.get("/")
+async def get_leaderboard(
+    board: Board = "global",
+    theme_id: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Meilleurs joueurs d'un classement (global, saison hebdomadaire ou thème)"""
+    error = bad_board(board, theme_id)
+    if error:
+        return error
+    try:
+        entries, total = leaderboards.query(lambda b: (b.top(limit, offset), len(b)), board, theme_id)
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": "Classement récupéré avec succès",
+                "data": {
+                    "board": board,
+                    "season": leaderboards.season if board == "weekly" else None,
+                    "total": total,
+                    "entries": await with_pseudos(db, entries)
+                }
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de la récupération du classement: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Erreur lors de la récupération du classement",
+                "error": str(e)
+            }
+        )
+
+
+@router.get("/rank/{user_id}")
+async def get_user_rank(
+    user_id: str,
+    board: Board = "global",
+    theme_id: Optional[str] = None,
+    around: int = Query(2, ge=0, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Rang d'un joueur et ses voisins immédiats dans un classement"""
+    error = bad_board(board, theme_id)
+    if error:
+        return error
+    try:
+        rank, neighbors = leaderboards.query(lambda b: (b.rank(user_id), b.around(user_id, around)), board, theme_id)
+        if rank is None:
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "message": "Joueur absent de ce classement",
+                    "data": None
+                }
+            )
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": "Rang récupéré avec succès",
+                "data": {
+                    "board": board,
+                    "season": leaderboards.season if board == "weekly" else None,
+                    **rank,
+                    "neighbors": await with_pseudos(db, neighbors)
+                }
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de la récupération du rang de {user_id}: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Erreur lors de la récupération du rang",
+                "error": str(e)
+            }
+        )
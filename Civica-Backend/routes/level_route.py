@@ -1,19 +1,25 @@
 #!/usr/bin/env python3
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.model_themes import (
     ThemeEntity, ThemeCreate, ThemeUpdate, ThemeResponse, ThemeForQuiz
 )
 from models.model_level import (
-    LevelEntity, LevelCreate, LevelUpdate, LevelResponse, LevelForQuiz
+    LevelEntity, LevelCreate, LevelUpdate, LevelResponse, LevelForQuiz,
+    with_level_counts
 )
 from models.model_question import (
     QuestionEntity, QuestionCreate, QuestionUpdate, QuestionResponse, QuestionForQuiz
 )
 from security.token_utils import verify_token
-from dependencies import get_db, StandardResponse
+from dependencies import get_db, get_async_db, StandardResponse
+from services.catalog_cache import catalog_cache, CATALOG_TAG, theme_tag, level_tag
+from services.http_cache import conditional_response, CATALOG_CACHE_CONTROL, ADMIN_CACHE_CONTROL
+from services.pagination import keyset_paginate, count_total, InvalidCursor
 import logging
 import uuid
 from datetime import datetime
@@ -30,16 +36,41 @@ router = APIRouter(
 # LEVEL ENDPOINTS
 
 @router.get("/")
-def get_levels(db: Session = Depends(get_db)):
-    """Get all levels"""
+async def get_levels(
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all levels ordered by (order_index, id). Without limit nor cursor every row is returned;
+    with a limit, pass next_cursor back as cursor for the next page.
+    """
     try:
-        levels = db.query(LevelEntity).filter(LevelEntity.is_active == True).order_by(LevelEntity.order_index).all()
-        level_list = [level.to_dict() for level in levels]
+        stmt = select(LevelEntity).where(LevelEntity.is_active == True)
+        levels, next_cursor = await keyset_paginate(
+            db,
+            stmt.options(*with_level_counts()),
+            (LevelEntity.order_index, LevelEntity.id),
+            cursor=cursor,
+            limit=limit,
+            page_by_default=False
+        )
+        content = {
+            "message": "Levels retrieved successfully",
+            "data": [level.to_dict() for level in levels],
+            "next_cursor": next_cursor
+        }
+        if include_total:
+            content["total"] = await count_total(db, stmt)
+        return conditional_response(request, content, cache_control=CATALOG_CACHE_CONTROL)
+    except InvalidCursor as e:
         return JSONResponse(
-            status_code=200,
+            status_code=400,
             content={
-                "message": "Levels retrieved successfully",
-                "data": level_list
+                "message": str(e),
+                "data": None
             }
         )
     except Exception as e:
@@ -53,12 +84,23 @@ def get_levels(db: Session = Depends(get_db)):
         )
 
 @router.get("/{theme_id}/levels")
-def get_theme_levels(theme_id: str, db: Session = Depends(get_db)):
+async def get_theme_levels(request: Request, theme_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all levels for a specific theme"""
     try:
-        # Check if theme exists
-        theme = db.query(ThemeEntity).filter(ThemeEntity.id == theme_id, ThemeEntity.is_active == True).first()
-        if not theme:
+        async def load_theme_levels():
+            # Check if theme exists
+            theme = (await db.execute(select(ThemeEntity).where(ThemeEntity.id == theme_id, ThemeEntity.is_active == True))).scalars().first()
+            if not theme:
+                return None
+            
+            levels = (await db.execute(select(LevelEntity).options(*with_level_counts()).where(
+                LevelEntity.theme_id == theme_id,
+                LevelEntity.is_active == True
+            ).order_by(LevelEntity.order_index))).scalars().all()
+            return [level.to_dict() for level in levels]
+
+        level_list, etag = await catalog_cache.aget_or_load_with_etag(f"theme_levels:{theme_id}", load_theme_levels, tags=(theme_tag(theme_id),))
+        if level_list is None:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -67,19 +109,14 @@ def get_theme_levels(theme_id: str, db: Session = Depends(get_db)):
                 }
             )
         
-        levels = db.query(LevelEntity).filter(
-            LevelEntity.theme_id == theme_id,
-            LevelEntity.is_active == True
-        ).order_by(LevelEntity.order_index).all()
-        
-        level_list = [level.to_dict() for level in levels]
-        
-        return JSONResponse(
-            status_code=200,
-            content={
+        return conditional_response(
+            request,
+            {
                 "message": "Levels retrieved successfully",
                 "data": level_list
-            }
+            },
+            etag=etag,
+            cache_control=CATALOG_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting levels for theme {theme_id}: {str(e)}")
@@ -92,12 +129,44 @@ def get_theme_levels(theme_id: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/level/{level_id}")
-def get_level_by_id(level_id: str, db: Session = Depends(get_db)):
+async def get_level_by_id(request: Request, level_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific level by ID with its questions (for quiz)"""
     try:
-        level = db.query(LevelEntity).filter(LevelEntity.id == level_id, LevelEntity.is_active == True).first()
+        async def load_level():
+            level = (await db.execute(select(LevelEntity).where(LevelEntity.id == level_id, LevelEntity.is_active == True))).scalars().first()
+            if not level:
+                return None
+            
+            # Get questions for this level (without correct answers for quiz)
+            questions = (await db.execute(select(QuestionEntity).where(
+                QuestionEntity.level_id == level_id,
+                QuestionEntity.is_active == True
+            ).order_by(QuestionEntity.order_index))).scalars().all()
+            
+            # Format questions for quiz (without correct answers)
+            quiz_questions = []
+            for question in questions:
+                quiz_questions.append({
+                    "id": question.id,
+                    "question_text": question.question_text,
+                    "option_a": question.option_a,
+                    "option_b": question.option_b,
+                    "option_c": question.option_c,
+                    "option_d": question.option_d,
+                    "points": question.points
+                })
+            
+            return {
+                "id": level.id,
+                "title": level.title,
+                "description": level.description,
+                "difficulty": level.difficulty,
+                "questions": quiz_questions
+            }
+
+        level_data, etag = await catalog_cache.aget_or_load_with_etag(f"level:{level_id}", load_level, tags=(level_tag(level_id),))
         
-        if not level:
+        if not level_data:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -106,39 +175,14 @@ def get_level_by_id(level_id: str, db: Session = Depends(get_db)):
                 }
             )
         
-        # Get questions for this level (without correct answers for quiz)
-        questions = db.query(QuestionEntity).filter(
-            QuestionEntity.level_id == level_id,
-            QuestionEntity.is_active == True
-        ).order_by(QuestionEntity.order_index).all()
-        
-        # Format questions for quiz (without correct answers)
-        quiz_questions = []
-        for question in questions:
-            quiz_questions.append({
-                "id": question.id,
-                "question_text": question.question_text,
-                "option_a": question.option_a,
-                "option_b": question.option_b,
-                "option_c": question.option_c,
-                "option_d": question.option_d,
-                "points": question.points
-            })
-        
-        level_data = {
-            "id": level.id,
-            "title": level.title,
-            "description": level.description,
-            "difficulty": level.difficulty,
-            "questions": quiz_questions
-        }
-        
-        return JSONResponse(
-            status_code=200,
-            content={
+        return conditional_response(
+            request,
+            {
                 "message": "Level retrieved successfully",
                 "data": level_data
-            }
+            },
+            etag=etag,
+            cache_control=CATALOG_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting level {level_id}: {str(e)}")
@@ -179,6 +223,7 @@ def create_level(level: LevelCreate, db: Session = Depends(get_db)):
         db.add(new_level)
         db.commit()
         db.refresh(new_level)
+        catalog_cache.invalidate(CATALOG_TAG, theme_tag(new_level.theme_id))
         
         return JSONResponse(
             status_code=201,
@@ -199,16 +244,28 @@ def create_level(level: LevelCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/{level_id}/questions")
-def get_level_questions(level_id: str, db: Session = Depends(get_db)):
+async def get_level_questions(request: Request, level_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all questions for a specific level"""
     try:
-        # Verify level exists
-        level = db.query(LevelEntity).filter(
-            LevelEntity.id == level_id,
-            LevelEntity.is_active == True
-        ).first()
+        async def load_level_questions():
+            # Verify level exists
+            level = (await db.execute(select(LevelEntity).where(
+                LevelEntity.id == level_id,
+                LevelEntity.is_active == True
+            ))).scalars().first()
+            if not level:
+                return None
+            
+            # Get questions for this level
+            questions = (await db.execute(select(QuestionEntity).where(
+                QuestionEntity.level_id == level_id,
+                QuestionEntity.is_active == True
+            ).order_by(QuestionEntity.order_index))).scalars().all()
+            return [question.to_dict() for question in questions]
+
+        questions_list, etag = await catalog_cache.aget_or_load_with_etag(f"level_questions:{level_id}", load_level_questions, tags=(level_tag(level_id),))
         
-        if not level:
+        if questions_list is None:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -217,20 +274,14 @@ def get_level_questions(level_id: str, db: Session = Depends(get_db)):
                 }
             )
         
-        # Get questions for this level
-        questions = db.query(QuestionEntity).filter(
-            QuestionEntity.level_id == level_id,
-            QuestionEntity.is_active == True
-        ).order_by(QuestionEntity.order_index).all()
-        
-        questions_list = [question.to_dict() for question in questions]
-        
-        return JSONResponse(
-            status_code=200,
-            content={
+        return conditional_response(
+            request,
+            {
                 "message": "Level questions retrieved successfully",
                 "data": questions_list
-            }
+            },
+            etag=etag,
+            cache_control=ADMIN_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting level questions: {str(e)}")
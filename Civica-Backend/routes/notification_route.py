@@ -6,10 +6,9 @@ from typing import Dict
 from database import get_db
 from models.model_user import UserEntity
 from models.utils_model import FCMToken
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dependencies import StandardResponse, handle_exception
 from security.crypt import decrypt
-from security.token_utils import verify_token
+from security.auth import Principal, get_current_user
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,13 +17,11 @@ router = APIRouter(
     tags=["notifications"]
 )
 
-http_bearer = HTTPBearer()
-
 @router.post("/fcm-token", response_model=StandardResponse)
 async def update_fcm_token(
     token_data: FCMToken,
     db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(http_bearer)
+    principal: Principal = Depends(get_current_user)
 ):
     """
     Met à jour le token FCM d'un utilisateur
@@ -40,13 +37,6 @@ async def update_fcm_token(
     try:
         decrypt_user_id = decrypt(token_data.user_id)
 
-        if not credentials.credentials:
-            return StandardResponse(statusCode=404, message="token not found", data=None)
-        #verify token
-        verif_token = verify_token(credentials.credentials)
-        if not verif_token:
-            return StandardResponse(statusCode=401, message="Unauthorized", data=None)
-        
         user_id = decrypt_user_id
         
         user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
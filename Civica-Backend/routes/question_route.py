@@ -1,8 +1,10 @@
 
 #!/usr/bin/env python3
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.model_themes import (
     ThemeEntity, ThemeCreate, ThemeUpdate, ThemeResponse, ThemeForQuiz
@@ -11,10 +13,17 @@ from models.model_level import (
     LevelEntity, LevelCreate, LevelUpdate, LevelResponse, LevelForQuiz
 )
 from models.model_question import (
-    QuestionEntity, QuestionCreate, QuestionUpdate, QuestionResponse, QuestionForQuiz
+    QuestionEntity, QuestionCreate, QuestionUpdate, QuestionResponse, QuestionForQuiz, ANSWER_LETTERS
 )
+from models.model_question_stats import QuestionStatsEntity
 from security.token_utils import verify_token
-from dependencies import get_db, StandardResponse
+from security.auth import Principal, get_optional_user
+from dependencies import get_db, get_async_db, StandardResponse
+from services.catalog_cache import catalog_cache, CATALOG_TAG, theme_tag, level_tag
+from services.http_cache import conditional_response, ADMIN_CACHE_CONTROL
+from services.pagination import keyset_paginate, count_total, clamp_limit, encode_offset_cursor, decode_offset_cursor, InvalidCursor
+from services.answer_key_index import answer_key_index
+from services.answer_events import answer_events, answer_event, valid_response_ms
 import logging
 import uuid
 from datetime import datetime
@@ -30,16 +39,41 @@ router = APIRouter(
 # QUESTION ENDPOINTS
 
 @router.get("/")
-def get_questions(db: Session = Depends(get_db)):
-    """Get all questions"""
+async def get_questions(
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all questions ordered by (order_index, id). Without limit nor cursor every row is returned;
+    with a limit, pass next_cursor back as cursor for the next page.
+    """
     try:
-        questions = db.query(QuestionEntity).filter(QuestionEntity.is_active == True).order_by(QuestionEntity.order_index).all()
-        question_list = [question.to_dict() for question in questions]
+        stmt = select(QuestionEntity).where(QuestionEntity.is_active == True)
+        questions, next_cursor = await keyset_paginate(
+            db,
+            stmt,
+            (QuestionEntity.order_index, QuestionEntity.id),
+            cursor=cursor,
+            limit=limit,
+            page_by_default=False
+        )
+        content = {
+            "message": "Questions retrieved successfully",
+            "data": [question.to_dict() for question in questions],
+            "next_cursor": next_cursor
+        }
+        if include_total:
+            content["total"] = await count_total(db, stmt)
+        return conditional_response(request, content, cache_control=ADMIN_CACHE_CONTROL)
+    except InvalidCursor as e:
         return JSONResponse(
-            status_code=200,
+            status_code=400,
             content={
-                "message": "Questions retrieved successfully",
-                "data": question_list
+                "message": str(e),
+                "data": None
             }
         )
     except Exception as e:
@@ -52,6 +86,72 @@ def get_questions(db: Session = Depends(get_db)):
             }
         )
 
+@router.get("/stats")
+async def get_question_stats(
+    request: Request,
+    level_id: Optional[str] = None,
+    sort: Literal["correct_rate", "attempts", "mean_response_ms"] = "correct_rate",
+    order: Literal["asc", "desc"] = "asc",
+    min_attempts: int = 1,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Per-question answer statistics, hardest first by default; pass next_cursor back as cursor for the next page"""
+    try:
+        offset = decode_offset_cursor(cursor)
+        page_size = clamp_limit(limit)
+        sort_keys = {
+            "correct_rate": QuestionStatsEntity.correct * 1.0 / QuestionStatsEntity.attempts,
+            "attempts": QuestionStatsEntity.attempts,
+            "mean_response_ms": QuestionStatsEntity.response_ms_total * 1.0 / QuestionStatsEntity.response_count,
+        }
+        key = sort_keys[sort]
+        stmt = (
+            select(QuestionStatsEntity, QuestionEntity.level_id, QuestionEntity.question_text, QuestionEntity.correct_answer)
+            .join(QuestionEntity, QuestionEntity.id == QuestionStatsEntity.question_id)
+            .where(QuestionStatsEntity.attempts >= max(min_attempts, 1))
+        )
+        if level_id:
+            stmt = stmt.where(QuestionEntity.level_id == level_id)
+        if sort == "mean_response_ms":
+            stmt = stmt.where(QuestionStatsEntity.response_count > 0)
+        # Counters live in a few thousand rows at most: sorting on the ratio needs no index
+        stmt = stmt.order_by(key.desc() if order == "desc" else key.asc(), QuestionStatsEntity.question_id)
+        rows = (await db.execute(stmt.offset(offset).limit(page_size + 1))).all()
+        has_more = len(rows) > page_size
+        content = {
+            "message": "Question statistics retrieved successfully",
+            "data": [
+                {
+                    **row.QuestionStatsEntity.to_dict(),
+                    "level_id": row.level_id,
+                    "question_text": row.question_text,
+                    "correct_answer": row.correct_answer
+                }
+                for row in rows[:page_size]
+            ],
+            "next_cursor": encode_offset_cursor(offset + page_size) if has_more else None
+        }
+        return conditional_response(request, content, cache_control=ADMIN_CACHE_CONTROL)
+    except InvalidCursor as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "message": str(e),
+                "data": None
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error getting question statistics: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Internal server error",
+                "error": str(e)
+            }
+        )
+
 @router.post("/question")
 def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
     """Create a new question"""
@@ -68,7 +168,7 @@ def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
             )
         
         # Validate correct answer
-        if question.correct_answer not in ['A', 'B', 'C', 'D']:
+        if question.correct_answer not in ANSWER_LETTERS:
             return JSONResponse(
                 status_code=400,
                 content={
@@ -95,6 +195,8 @@ def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
         db.add(new_question)
         db.commit()
         db.refresh(new_question)
+        catalog_cache.invalidate(CATALOG_TAG, theme_tag(level.theme_id), level_tag(level.id))
+        answer_key_index.put(new_question.id, new_question.correct_answer, new_question.points, new_question.explanation)
         
         return JSONResponse(
             status_code=201,
@@ -115,12 +217,28 @@ def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/question/{question_id}/answer")
-def check_answer(question_id: str, answer: dict, db: Session = Depends(get_db)):
+async def check_answer(
+    question_id: str,
+    answer: dict,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Optional[Principal] = Depends(get_optional_user)
+):
     """Check if the provided answer is correct"""
     try:
-        question = db.query(QuestionEntity).filter(QuestionEntity.id == question_id).first()
+        # Answer keys are served from memory; the database is only hit for
+        # questions created by another worker since this index was built
+        key = answer_key_index.get(question_id)
+        if key is None:
+            row = (await db.execute(select(
+                QuestionEntity.correct_answer,
+                QuestionEntity.points,
+                QuestionEntity.explanation
+            ).where(QuestionEntity.id == question_id))).first()
+            if row is not None:
+                answer_key_index.put(question_id, row.correct_answer, row.points, row.explanation)
+                key = answer_key_index.get(question_id)
         
-        if not question:
+        if not key:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -130,15 +248,28 @@ def check_answer(question_id: str, answer: dict, db: Session = Depends(get_db)):
             )
         
         user_answer = answer.get('answer', '').upper()
-        is_correct = user_answer == question.correct_answer
+        is_correct = user_answer == key.correct_answer
         
         response_data = {
             "is_correct": is_correct,
-            "correct_answer": question.correct_answer,
-            "explanation": question.explanation,
-            "points_earned": question.points if is_correct else 0
+            "correct_answer": key.correct_answer,
+            "explanation": key.explanation,
+            "points_earned": key.points if is_correct else 0
         }
         
+        # Answers from authenticated players go to the event log (never blocks the event loop);
+        # the player is taken from the bearer token, never from the body
+        if principal is not None:
+            answer_events.publish([answer_event(
+                principal.user_id,
+                question_id,
+                user_answer[:1] or None,
+                is_correct,
+                response_data["points_earned"],
+                "check",
+                response_ms=valid_response_ms(answer.get('response_ms'))
+            )], block=False)
+        
         return JSONResponse(
             status_code=200,
             content={
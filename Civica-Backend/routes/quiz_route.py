@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+import random
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.model_user import UserEntity
+from models.model_level import LevelEntity
+from models.model_question import QuestionEntity
+from models.model_quiz import QuizStart, QuizSubmit
+from dependencies import get_db, get_async_db
+from services.quiz_session import quiz_sessions, AnswerKey, QUIZ_MAX_QUESTIONS
+from services.score_service import credit_points, level_for
+from services.score_aggregator import score_aggregator, SCORE_WRITE_BEHIND
+from services.progress_service import upsert_progress, attempt_row, stars_for
+from services.leaderboard import leaderboards
+from services.lives_service import compute_lives, consume_life, NoLifeLeft
+from services.answer_events import answer_events, answer_event, valid_response_ms
+from models.model_level_progress import UserLevelProgressEntity
+from models.model_answer_event import AnswerEventEntity
+from services.pagination import keyset_paginate, InvalidCursor
+from security.auth import Principal, get_current_user, ensure_same_user
+from services.review_scheduler import candidate_pool, review_states, select_practice, select_mistakes
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/quiz",
+    tags=["Quiz"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.post("/start")
+async def start_quiz(
+    quiz: QuizStart,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_user)
+):
+    """Démarre une session de quiz sur un niveau : le serveur choisit et ordonne les questions"""
+    ensure_same_user(principal, quiz.user_id)
+    try:
+        user = (await db.execute(
+            select(UserEntity.vies, UserEntity.last_life_refresh).where(UserEntity.id == quiz.user_id)
+        )).first()
+        if user is None:
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "message": "Utilisateur non trouvé",
+                    "data": None
+                }
+            )
+        if compute_lives(user.vies, user.last_life_refresh).lives <= 0:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "message": "Aucune vie disponible",
+                    "data": None
+                }
+            )
+
+        # Questions actives du niveau avec leur clé de réponse, en une seule requête
+        rows = (await db.execute(
+            select(
+                LevelEntity.theme_id,
+                QuestionEntity.id,
+                QuestionEntity.question_text,
+                QuestionEntity.option_a,
+                QuestionEntity.option_b,
+                QuestionEntity.option_c,
+                QuestionEntity.option_d,
+                QuestionEntity.points,
+                QuestionEntity.correct_answer,
+                QuestionEntity.explanation
+            )
+            .join(QuestionEntity, QuestionEntity.level_id == LevelEntity.id)
+            .where(
+                LevelEntity.id == quiz.level_id,
+                LevelEntity.is_active == True,
+                QuestionEntity.is_active == True
+            )
+            .order_by(QuestionEntity.order_index, QuestionEntity.id)
+        )).all()
+        if not rows:
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "message": "Niveau introuvable ou sans questions",
+                    "data": None
+                }
+            )
+
+        # Tirage aléatoire si le niveau dépasse la taille d'un quiz, en gardant l'ordre du niveau
+        if len(rows) > QUIZ_MAX_QUESTIONS:
+            picked = set(random.sample(range(len(rows)), QUIZ_MAX_QUESTIONS))
+            rows = [row for i, row in enumerate(rows) if i in picked]
+
+        session = quiz_sessions.start(
+            quiz.user_id,
+            quiz.level_id,
+            rows[0].theme_id,
+            [(row.id, AnswerKey(row.correct_answer, row.explanation, row.points)) for row in rows]
+        )
+
+        return JSONResponse(
+            status_code=201,
+            content={
+                "message": "Session de quiz démarrée",
+                "data": {
+                    "session_id": session.id,
+                    "level_id": session.level_id,
+                    "expires_in": int(quiz_sessions.ttl_seconds),
+                    "questions": [
+                        {
+                            "id": row.id,
+                            "question_text": row.question_text,
+                            "option_a": row.option_a,
+                            "option_b": row.option_b,
+                            "option_c": row.option_c,
+                            "option_d": row.option_d,
+                            "points": row.points
+                        }
+                        for row in rows
+                    ]
+                }
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors du démarrage du quiz: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Erreur lors du démarrage du quiz",
+                "error": str(e)
+            }
+        )
+
+@router.get("/practice/{user_id}")
+async def get_practice_set(
+    user_id: str,
+    level_id: Optional[str] = None,
+    theme_id: Optional[str] = None,
+    mode: Literal["practice", "mistakes"] = "practice",
+    size: int = Query(QUIZ_MAX_QUESTIONS, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_user)
+):
+    """
+    Série d'entraînement (révision espacée) : questions à revoir d'abord, puis tirage pondéré
+    parmi les autres ; mode "mistakes" : questions dont la dernière réponse était fausse.
+    Les réponses envoyées à /api/question/question/{id}/answer avec le jeton Bearer du joueur mettent les boîtes à jour.
+    """
+    ensure_same_user(principal, user_id)
+    try:
+        states = await review_states(db, user_id, level_id, theme_id)
+        if mode == "mistakes":
+            picked = select_mistakes(states, size)
+        else:
+            picked = select_practice(await candidate_pool(db, level_id, theme_id), states, size)
+
+        questions = {}
+        if picked:
+            rows = (await db.execute(
+                select(
+                    QuestionEntity.id,
+                    QuestionEntity.level_id,
+                    QuestionEntity.question_text,
+                    QuestionEntity.option_a,
+                    QuestionEntity.option_b,
+                    QuestionEntity.option_c,
+                    QuestionEntity.option_d,
+                    QuestionEntity.points
+                ).where(QuestionEntity.id.in_([question_id for question_id, _, _ in picked]))
+            )).all()
+            questions = {row.id: row for row in rows}
+
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": "Série d'entraînement générée",
+                "data": {
+                    "mode": mode,
+                    "questions": [
+                        {
+                            "id": row.id,
+                            "level_id": row.level_id,
+                            "question_text": row.question_text,
+                            "option_a": row.option_a,
+                            "option_b": row.option_b,
+                            "option_c": row.option_c,
+                            "option_d": row.option_d,
+                            "points": row.points,
+                            "box": state.box if state else None,
+                            "due": due
+                        }
+                        for question_id, state, due in picked
+                        for row in [questions.get(question_id)]
+                        if row is not None
+                    ]
+                }
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de la génération de la série d'entraînement de {user_id}: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Erreur lors de la génération de la série d'entraînement",
+                "error": str(e)
+            }
+        )
+
+@router.post("/{session_id}/submit")
+def submit_quiz(
+    session_id: str,
+    submission: QuizSubmit,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_user)
+):
+    """Corrige toutes les réponses d'une session et applique points, niveau et vies en une transaction"""
+    ensure_same_user(principal, submission.user_id)
+    session = quiz_sessions.take(session_id, submission.user_id)
+    if session is None:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "message": "Session de quiz introuvable ou expirée",
+                "data": None
+            }
+        )
+
+    # Correction en mémoire contre les clés capturées au démarrage
+    results, correct_count, points_earned = session.grade(
+        {answer.question_id: answer.answer for answer in submission.answers}
+    )
+    passed = session.passed(correct_count)
+    stars = stars_for(correct_count, len(results), passed)
+
+    try:
+        if SCORE_WRITE_BEHIND:
+            # Points crédités par l'agrégateur après le commit, comme update-score :
+            # score lu + crédits en attente, jamais le seul score en base
+            user, pending = score_aggregator.read_user(db, session.user_id, lambda: db.execute(
+                select(UserEntity.point, UserEntity.vies, UserEntity.last_life_refresh).where(UserEntity.id == session.user_id)
+            ).first())
+            user_state = None
+            if user is not None:
+                score = user.point + pending + points_earned
+                user_state = {
+                    "user_id": session.user_id,
+                    "score": score,
+                    "level": level_for(score),
+                    "lives": compute_lives(user.vies, user.last_life_refresh).lives,
+                }
+        else:
+            # Points et niveau en un seul UPDATE atomique
+            user_state = credit_points(db, session.user_id, points_earned, commit=False)
+        if user_state is None:
+            db.rollback()
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "message": "Utilisateur non trouvé",
+                    "data": None
+                }
+            )
+        # Un niveau échoué coûte une vie (la dernière a pu être utilisée par une autre session)
+        if not passed:
+            try:
+                user_state["lives"] = consume_life(db, session.user_id, commit=False).lives
+            except NoLifeLeft:
+                user_state["lives"] = 0
+        # Progression du niveau dans la même transaction
+        upsert_progress(db, [attempt_row(session.user_id, session.level_id, points_earned, stars, passed)])
+        progress = db.get(UserLevelProgressEntity, (session.user_id, session.level_id)).to_dict()
+        db.commit()
+        if SCORE_WRITE_BEHIND:
+            score_aggregator.add(session.user_id, points_earned)
+        leaderboards.record(session.user_id, user_state["score"], points_earned, session.theme_id)
+    except Exception as e:
+        logger.error(f"Erreur lors de la soumission du quiz {session_id}: {str(e)}")
+        db.rollback()
+        # La session reste soumissible si l'écriture a échoué
+        quiz_sessions.restore(session)
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Erreur lors de la soumission du quiz",
+                "error": str(e)
+            }
+        )
+
+    # Journal des réponses, écrit par lots hors de la transaction du quiz
+    response_times = {answer.question_id: answer.response_ms for answer in submission.answers}
+    answer_events.publish([
+        answer_event(
+            session.user_id,
+            result["question_id"],
+            (result["answer"] or "")[:1] or None,
+            result["is_correct"],
+            result["points_earned"],
+            "quiz",
+            level_id=session.level_id,
+            session_id=session.id,
+            response_ms=valid_response_ms(response_times.get(result["question_id"]))
+        )
+        for result in results
+    ])
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "message": "Quiz corrigé avec succès",
+            "data": {
+                "session_id": session.id,
+                "level_id": session.level_id,
+                "results": results,
+                "correct_count": correct_count,
+                "total_questions": len(results),
+                "points_earned": points_earned,
+                "passed": passed,
+                "stars": stars,
+                "progress": {
+                    "best_score": progress["best_score"],
+                    "stars": progress["stars"],
+                    "attempts": progress["attempts"],
+                    "completed_at": progress["completed_at"]
+                },
+                "user": user_state
+            }
+        }
+    )
+
+@router.get("/history/{user_id}")
+async def get_answer_history(
+    user_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_user)
+):
+    """Historique des réponses d'un utilisateur, du plus récent au plus ancien (index (user_id, created_at))"""
+    ensure_same_user(principal, user_id)
+    try:
+        events, next_cursor = await keyset_paginate(
+            db,
+            select(AnswerEventEntity).where(AnswerEventEntity.user_id == user_id),
+            (AnswerEventEntity.created_at, AnswerEventEntity.id),
+            cursor=cursor,
+            limit=limit,
+            descending=True
+        )
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": "Historique récupéré avec succès",
+                "data": [event.to_dict() for event in events],
+                "next_cursor": next_cursor
+            }
+        )
+    except InvalidCursor as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "message": str(e),
+                "data": None
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de la récupération de l'historique de {user_id}: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Erreur lors de la récupération de l'historique",
+                "error": str(e)
+            }
+        )
@@ -1,19 +1,25 @@
 #!/usr/bin/env python3
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.model_themes import (
     ThemeEntity, ThemeCreate, ThemeUpdate, ThemeResponse, ThemeForQuiz
 )
 from models.model_level import (
-    LevelEntity, LevelCreate, LevelUpdate, LevelResponse, LevelForQuiz
+    LevelEntity, LevelCreate, LevelUpdate, LevelResponse, LevelForQuiz,
+    with_theme_counts, with_level_counts
 )
 from models.model_question import (
     QuestionEntity, QuestionCreate, QuestionUpdate, QuestionResponse, QuestionForQuiz
 )
 from security.token_utils import verify_token
-from dependencies import get_db, StandardResponse
+from dependencies import get_db, get_async_db, StandardResponse
+from services.answer_key_index import answer_key_index
+from services.catalog_cache import catalog_cache, CATALOG_TAG, theme_tag, level_tag
+from services.http_cache import conditional_response, CATALOG_CACHE_CONTROL, ADMIN_CACHE_CONTROL
 import logging
 import uuid
 from datetime import datetime
@@ -30,18 +36,23 @@ router = APIRouter(
 # THEME ENDPOINTS
 
 @router.get("/")
-def get_all_themes(db: Session = Depends(get_db)):
+async def get_all_themes(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all active themes with their levels count"""
     try:
-        themes = db.query(ThemeEntity).filter(ThemeEntity.is_active == True).order_by(ThemeEntity.order_index).all()
-        theme_list = [theme.to_dict() for theme in themes]
+        async def load_themes():
+            themes = (await db.execute(select(ThemeEntity).options(with_theme_counts()).where(ThemeEntity.is_active == True).order_by(ThemeEntity.order_index))).scalars().all()
+            return [theme.to_dict() for theme in themes]
+
+        theme_list, etag = await catalog_cache.aget_or_load_with_etag("themes", load_themes, tags=(CATALOG_TAG,))
         
-        return JSONResponse(
-            status_code=200,
-            content={
+        return conditional_response(
+            request,
+            {
                 "message": "Themes retrieved successfully",
                 "data": theme_list
-            }
+            },
+            etag=etag,
+            cache_control=CATALOG_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting themes: {str(e)}")
@@ -53,13 +64,78 @@ def get_all_themes(db: Session = Depends(get_db)):
             }
         )
 
-@router.get("/{theme_id}")
-def get_theme_by_id(theme_id: str, db: Session = Depends(get_db)):
-    """Get a specific theme by ID with its levels"""
+async def _load_bundle(db: AsyncSession, theme_id: Optional[str] = None):
+    """Build the active theme -> level -> quiz question tree from a single joined SELECT"""
+    stmt = select(
+        ThemeEntity.id, ThemeEntity.title, ThemeEntity.description, ThemeEntity.icon, ThemeEntity.color,
+        LevelEntity.id, LevelEntity.title, LevelEntity.description, LevelEntity.difficulty,
+        QuestionEntity.id, QuestionEntity.question_text,
+        QuestionEntity.option_a, QuestionEntity.option_b, QuestionEntity.option_c, QuestionEntity.option_d,
+        QuestionEntity.points
+    ).select_from(ThemeEntity).outerjoin(
+        LevelEntity, and_(LevelEntity.theme_id == ThemeEntity.id, LevelEntity.is_active == True)
+    ).outerjoin(
+        QuestionEntity, and_(QuestionEntity.level_id == LevelEntity.id, QuestionEntity.is_active == True)
+    ).where(ThemeEntity.is_active == True)
+    
+    if theme_id:
+        stmt = stmt.where(ThemeEntity.id == theme_id)
+    
+    rows = (await db.execute(stmt.order_by(
+        ThemeEntity.order_index, ThemeEntity.id,
+        LevelEntity.order_index, LevelEntity.id,
+        QuestionEntity.order_index, QuestionEntity.id
+    ))).all()
+    
+    themes = []
+    themes_by_id = {}
+    levels_by_id = {}
+    for (t_id, t_title, t_description, t_icon, t_color,
+         l_id, l_title, l_description, l_difficulty,
+         q_id, q_text, q_a, q_b, q_c, q_d, q_points) in rows:
+        theme = themes_by_id.get(t_id)
+        if theme is None:
+            # Shaped like ThemeForQuiz
+            theme = {"id": t_id, "title": t_title, "description": t_description,
+                     "icon": t_icon, "color": t_color, "levels": []}
+            themes_by_id[t_id] = theme
+            themes.append(theme)
+        if l_id is None:
+            continue
+        level = levels_by_id.get(l_id)
+        if level is None:
+            # Shaped like LevelForQuiz
+            level = {"id": l_id, "title": l_title, "description": l_description,
+                     "difficulty": l_difficulty, "questions": []}
+            levels_by_id[l_id] = level
+            theme["levels"].append(level)
+        if q_id is None:
+            continue
+        # Shaped like QuestionForQuiz (no correct answer)
+        level["questions"].append({
+            "id": q_id,
+            "question_text": q_text,
+            "option_a": q_a,
+            "option_b": q_b,
+            "option_c": q_c,
+            "option_d": q_d,
+            "points": q_points
+        })
+    
+    if theme_id and not themes:
+        return None
+    return themes
+
+@router.get("/bundle")
+async def get_catalog_bundle(request: Request, theme_id: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Get the whole active catalog (themes, levels and quiz questions) in one response, optionally for one theme"""
     try:
-        theme = db.query(ThemeEntity).filter(ThemeEntity.id == theme_id, ThemeEntity.is_active == True).first()
+        if theme_id:
+            themes, etag = await catalog_cache.aget_or_load_with_etag(f"bundle:{theme_id}", lambda: _load_bundle(db, theme_id), tags=(theme_tag(theme_id),))
+        else:
+            themes, etag = await catalog_cache.aget_or_load_with_etag("bundle", lambda: _load_bundle(db), tags=(CATALOG_TAG,))
         
-        if not theme:
+        if themes is None:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -68,21 +144,66 @@ def get_theme_by_id(theme_id: str, db: Session = Depends(get_db)):
                 }
             )
         
-        # Get levels for this theme
-        levels = db.query(LevelEntity).filter(
-            LevelEntity.theme_id == theme_id,
-            LevelEntity.is_active == True
-        ).order_by(LevelEntity.order_index).all()
-        
-        theme_data = theme.to_dict()
-        theme_data['levels'] = [level.to_dict() for level in levels]
-        
+        return conditional_response(
+            request,
+            {
+                "message": "Catalog bundle retrieved successfully",
+                "data": {
+                    "version": etag.strip('"'),
+                    "themes": themes
+                }
+            },
+            etag=etag,
+            cache_control=CATALOG_CACHE_CONTROL
+        )
+    except Exception as e:
+        logger.error(f"Error getting catalog bundle: {str(e)}")
         return JSONResponse(
-            status_code=200,
+            status_code=500,
             content={
+                "message": "Internal server error",
+                "error": str(e)
+            }
+        )
+
+@router.get("/{theme_id}")
+async def get_theme_by_id(request: Request, theme_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get a specific theme by ID with its levels"""
+    try:
+        async def load_theme():
+            theme = (await db.execute(select(ThemeEntity).options(with_theme_counts()).where(ThemeEntity.id == theme_id, ThemeEntity.is_active == True))).scalars().first()
+            if not theme:
+                return None
+            
+            # Get levels for this theme
+            levels = (await db.execute(select(LevelEntity).options(*with_level_counts()).where(
+                LevelEntity.theme_id == theme_id,
+                LevelEntity.is_active == True
+            ).order_by(LevelEntity.order_index))).scalars().all()
+            
+            theme_data = theme.to_dict()
+            theme_data['levels'] = [level.to_dict() for level in levels]
+            return theme_data
+
+        theme_data, etag = await catalog_cache.aget_or_load_with_etag(f"theme:{theme_id}", load_theme, tags=(theme_tag(theme_id),))
+        
+        if not theme_data:
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "message": "Theme not found",
+                    "data": None
+                }
+            )
+        
+        return conditional_response(
+            request,
+            {
                 "message": "Theme retrieved successfully",
                 "data": theme_data
-            }
+            },
+            etag=etag,
+            cache_control=CATALOG_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting theme {theme_id}: {str(e)}")
@@ -111,6 +232,7 @@ def create_theme(theme: ThemeCreate, db: Session = Depends(get_db)):
         db.add(new_theme)
         db.commit()
         db.refresh(new_theme)
+        catalog_cache.invalidate(CATALOG_TAG)
         
         return JSONResponse(
             status_code=201,
@@ -162,6 +284,7 @@ def update_theme(theme_id: str, theme: ThemeUpdate, db: Session = Depends(get_db
         db_theme.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(db_theme)
+        catalog_cache.invalidate(CATALOG_TAG, theme_tag(theme_id))
         
         return JSONResponse(
             status_code=200,
@@ -199,6 +322,7 @@ def delete_theme(theme_id: str, db: Session = Depends(get_db)):
         db_theme.is_active = False
         db_theme.updated_at = datetime.utcnow()
         db.commit()
+        catalog_cache.invalidate(CATALOG_TAG, theme_tag(theme_id))
         
         return JSONResponse(
             status_code=200,
@@ -219,16 +343,28 @@ def delete_theme(theme_id: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/{theme_id}/levels")
-def get_theme_levels(theme_id: str, db: Session = Depends(get_db)):
+async def get_theme_levels(request: Request, theme_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all levels for a specific theme"""
     try:
-        # Verify theme exists
-        theme = db.query(ThemeEntity).filter(
-            ThemeEntity.id == theme_id,
-            ThemeEntity.is_active == True
-        ).first()
+        async def load_theme_levels():
+            # Verify theme exists
+            theme = (await db.execute(select(ThemeEntity).where(
+                ThemeEntity.id == theme_id,
+                ThemeEntity.is_active == True
+            ))).scalars().first()
+            if not theme:
+                return None
+            
+            # Get levels for this theme
+            levels = (await db.execute(select(LevelEntity).options(*with_level_counts()).where(
+                LevelEntity.theme_id == theme_id,
+                LevelEntity.is_active == True
+            ).order_by(LevelEntity.order_index))).scalars().all()
+            return [level.to_dict() for level in levels]
+
+        levels_list, etag = await catalog_cache.aget_or_load_with_etag(f"theme_levels:{theme_id}", load_theme_levels, tags=(theme_tag(theme_id),))
         
-        if not theme:
+        if levels_list is None:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -237,20 +373,14 @@ def get_theme_levels(theme_id: str, db: Session = Depends(get_db)):
                 }
             )
         
-        # Get levels for this theme
-        levels = db.query(LevelEntity).filter(
-            LevelEntity.theme_id == theme_id,
-            LevelEntity.is_active == True
-        ).order_by(LevelEntity.order_index).all()
-        
-        levels_list = [level.to_dict() for level in levels]
-        
-        return JSONResponse(
-            status_code=200,
-            content={
+        return conditional_response(
+            request,
+            {
                 "message": "Theme levels retrieved successfully",
                 "data": levels_list
-            }
+            },
+            etag=etag,
+            cache_control=CATALOG_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting theme levels: {str(e)}")
@@ -263,16 +393,28 @@ def get_theme_levels(theme_id: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/level/{level_id}/questions")
-def get_level_questions(level_id: str, db: Session = Depends(get_db)):
+async def get_level_questions(request: Request, level_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all questions for a specific level"""
     try:
-        # Verify level exists
-        level = db.query(LevelEntity).filter(
-            LevelEntity.id == level_id,
-            LevelEntity.is_active == True
-        ).first()
+        async def load_level_questions():
+            # Verify level exists
+            level = (await db.execute(select(LevelEntity).where(
+                LevelEntity.id == level_id,
+                LevelEntity.is_active == True
+            ))).scalars().first()
+            if not level:
+                return None
+            
+            # Get questions for this level
+            questions = (await db.execute(select(QuestionEntity).where(
+                QuestionEntity.level_id == level_id,
+                QuestionEntity.is_active == True
+            ).order_by(QuestionEntity.order_index))).scalars().all()
+            return [question.to_dict() for question in questions]
+
+        questions_list, etag = await catalog_cache.aget_or_load_with_etag(f"level_questions:{level_id}", load_level_questions, tags=(level_tag(level_id),))
         
-        if not level:
+        if questions_list is None:
             return JSONResponse(
                 status_code=404,
                 content={
@@ -281,20 +423,14 @@ def get_level_questions(level_id: str, db: Session = Depends(get_db)):
                 }
             )
         
-        # Get questions for this level
-        questions = db.query(QuestionEntity).filter(
-            QuestionEntity.level_id == level_id,
-            QuestionEntity.is_active == True
-        ).order_by(QuestionEntity.order_index).all()
-        
-        questions_list = [question.to_dict() for question in questions]
-        
-        return JSONResponse(
-            status_code=200,
-            content={
+        return conditional_response(
+            request,
+            {
                 "message": "Level questions retrieved successfully",
                 "data": questions_list
-            }
+            },
+            etag=etag,
+            cache_control=ADMIN_CACHE_CONTROL
         )
     except Exception as e:
         logger.error(f"Error getting level questions: {str(e)}")
@@ -387,6 +523,8 @@ def seed_sample_data(db: Session = Depends(get_db)):
                 db.add(level)
         
         db.commit()
+        catalog_cache.clear()
+        answer_key_index.build(db)
         
         return JSONResponse(
             status_code=201,
@@ -1,16 +1,23 @@
 #!/usr/bin/env python3
 from email import message
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status,Request,BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status,Request,BackgroundTasks
 from fastapi.responses import JSONResponse
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.model_user import UserEntity, UserCreate, UserUpdate, UserResponse, UserLogin, UserRegister
+from models.model_user import UserEntity, UserCreate, UserUpdate, UserResponse, UserLogin, UserRegister, IsVerified, Status, ConnexionType, Role, duplicate_user_field
+from models.model_auth_token import RefreshTokenEntity
 from security.crypt import decrypt, encrypt
 from firebase_admin import auth, firestore
 from firebase_admin.auth import UserRecord
-from security.password_utils import verify_password,get_password_hash
-from datetime import datetime, timedelta
-from security.token_utils import generate_token, verify_token
+from security.password_pool import password_pool, PasswordPoolSaturated
+from datetime import datetime
+from security.token_utils import generate_token, verify_token, ACCESS_TOKEN_TTL_SECONDS
+from security.refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_family, revoke_user_refresh_tokens, hash_refresh_token, InvalidRefreshToken
+from security.revocation import revocation_filter
+from security.auth import Principal, get_current_user, ensure_same_user, require_admin
 from fastapi_mail import FastMail, MessageSchema, MessageType,ConnectionConfig
 import re
 import random
@@ -18,11 +25,21 @@ import string
 import os
 from dotenv import load_dotenv
 from models.model_verification_code import VerificationCodeEntity, VerificationCodeBase, VerificationCodeCreate, VerificationCodeUpdate, VerificationCodeResponse
-from models.utils_model import CheckEmail,CheckEmailAndCode,UserChangePassword
+from models.utils_model import CheckEmail,CheckEmailAndCode,UserChangePassword,RefreshTokenRequest
 load_dotenv()
 # Importer les dépendances depuis le fichier dependencies.py
-from dependencies import get_db, StandardResponse
+from dependencies import get_db, get_async_db, StandardResponse
+from services.http_cache import conditional_response, PROFILE_CACHE_CONTROL
+from services.pagination import keyset_paginate, count_total, clamp_limit, encode_offset_cursor, decode_offset_cursor, InvalidCursor
+from services.user_search import search_users
+from services.score_service import credit_points, level_for
+from services.score_aggregator import score_aggregator, SCORE_WRITE_BEHIND
+from services.leaderboard import leaderboards
+from services.progress_service import get_progress_map
+from services.lives_service import consume_life, user_lives, NoLifeLeft
+from services.user_import import UserImporter, import_format
 import logging
+import time
 import uuid
 
 logging.basicConfig(level=logging.INFO)
@@ -34,16 +51,57 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def password_pool_busy() -> JSONResponse:
+    """Réponse quand trop de calculs de mot de passe sont en attente (le client réessaie)"""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content={
+            "message":"server busy, please retry",
+            "data":""
+        }
+    )
+
 @router.get("/")
-def get_all_users(email: Optional[str] = None, db: Session = Depends(get_db)):
-    """Liste toutes les utilisateurs ou recherche par email"""
-    query = db.query(UserEntity)
-    
-    # Si un email est fourni, filtrer les résultats
-    if email:
-        query = query.filter(UserEntity.email.like(f'%{email}%'))
+async def get_all_users(
+    email: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Liste les utilisateurs (du plus récent au plus ancien, paginés par curseur) ou recherche par email / pseudo"""
+    stmt = select(UserEntity)
+    total = None
+    # Un terme fait d'espaces ne filtre rien : liste paginée, comme sans terme
+    email = email.strip() if email else None
     
-    users = query.all()
+    try:
+        if email:
+            # Recherche classée (exact, préfixe, sous-chaîne); le curseur porte le décalage
+            offset = decode_offset_cursor(cursor)
+            page_size = clamp_limit(limit)
+            users, has_more, total = await search_users(db, email, page_size, offset, include_total)
+            next_cursor = encode_offset_cursor(offset + page_size) if has_more else None
+        else:
+            users, next_cursor = await keyset_paginate(
+                db,
+                stmt,
+                (UserEntity.created_at, UserEntity.id),
+                cursor=cursor,
+                limit=limit,
+                descending=True
+            )
+            if include_total:
+                total = await count_total(db, stmt)
+    except InvalidCursor as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "message": str(e),
+                "data": None
+            }
+        )
     user_list = [user.to_dict() for user in users]
     
     # Message personnalisé en fonction du type de recherche
@@ -52,20 +110,31 @@ def get_all_users(email: Optional[str] = None, db: Session = Depends(get_db)):
     else:
         message = "users founds"
     
+    content = {
+        "message": message,
+        "data": user_list,
+        "next_cursor": next_cursor
+    }
+    if include_total:
+        content["total"] = total
+    
     return JSONResponse(
         status_code=200,
-        content={
-            "message": message,
-            "data": user_list
-        }
+        content=content
     )
 
+async def load_user(db: AsyncSession, user_id: str) -> Optional[UserEntity]:
+    # populate_existing : une relecture après un flush des scores rafraîchit l'objet
+    return (await db.execute(
+        select(UserEntity).where(UserEntity.id == user_id).execution_options(populate_existing=True)
+    )).scalars().first()
+
 @router.get("/{user_id}")
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(request: Request, user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Obtient un utilisateur par son ID"""
 
     try:
-        user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
+        user, pending = await score_aggregator.aread_user(db, user_id, lambda: load_user(db, user_id))
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -83,21 +152,27 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
             }
             
         )
-    return JSONResponse(
-        status_code=200,
-        content={
+    user_dict = score_aggregator.merge_into(user.to_dict(), pending)
+    # Vies calculées à la lecture (régénération), sans écriture
+    lives = user_lives(user)
+    user_dict["vies"] = lives.lives
+    user_dict["lives"] = lives.summary()
+    return conditional_response(
+        request,
+        {
             "message":"success retrieve user",
-            "data":{"user": user.to_dict()}
-        }
+            "data":{"user": user_dict}
+        },
+        cache_control=PROFILE_CACHE_CONTROL
     )
 
 #check user by email
 @router.get("/check-email/{email}")
-def check_user_by_email(email: str, db: Session = Depends(get_db)):
+async def check_user_by_email(email: str, db: AsyncSession = Depends(get_async_db)):
     """Check if a user exists by email"""
     
     try:
-        user = db.query(UserEntity).filter(UserEntity.email == email).first()
+        user = (await db.execute(select(UserEntity).where(UserEntity.email == email))).scalars().first()
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -127,7 +202,7 @@ def check_user_by_email(email: str, db: Session = Depends(get_db)):
 
 
 @router.post("/register")
-async def register(user: UserRegister, db: Session = Depends(get_db)):
+def register(user: UserRegister, db: Session = Depends(get_db)):
     """Register a new user with improved error handling and logic"""
     
     
@@ -137,10 +212,41 @@ async def register(user: UserRegister, db: Session = Depends(get_db)):
         user_password = user.password
         user_pseudo = user.spseudo
         
-        # Check local database
+        # Sync handler: the request thread waits while bcrypt runs in the password pool
+        try:
+            hashed_password = password_pool.hash_sync(user_password)
+        except PasswordPoolSaturated:
+            return password_pool_busy()
+        # Every column is set here: the response needs no read-back after the INSERT
+        now = datetime.utcnow()
+        new_user = UserEntity(
+            id=str(uuid.uuid4()),
+            email=user_email,
+            password=hashed_password,
+            is_verified=IsVerified.YES,
+            status=Status.ACTIVE,
+            connexion_type=ConnexionType.EMAIL,
+            role=Role.USER,
+            spseudo=user_pseudo,
+            is_deleted=False,
+            point=0,
+            niveaux=1,
+            vies=3,
+            last_life_refresh=now,
+            created_at=now,
+            updated_at=now
+        )
+        user_dict = new_user.to_dict()
+        del user_dict['password']
+        
+        # Email and pseudo uniqueness is enforced by the database: one INSERT, no pre-check
         try:
-            existing_user_email = db.query(UserEntity).filter(UserEntity.email == user_email).first()
-            if existing_user_email:
+            db.add(new_user)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            field = duplicate_user_field(e)
+            if field == 'email':
                 logger.info(f"User with this email already exists local database: {user_email}")
                 return JSONResponse(
                     status_code=409,  # ✅ Correct status code
@@ -149,9 +255,7 @@ async def register(user: UserRegister, db: Session = Depends(get_db)):
                         "error": "Email already in use local database"
                     }
                 )
-            
-            existing_user_pseudo = db.query(UserEntity).filter(UserEntity.spseudo == user_pseudo).first()
-            if existing_user_pseudo:
+            if field == 'spseudo':
                 logger.info(f"User with this pseudo already exists local database: {user_pseudo}")
                 return JSONResponse(
                     status_code=409,  # ✅ Correct status code
@@ -160,39 +264,8 @@ async def register(user: UserRegister, db: Session = Depends(get_db)):
                         "error": "pseudo already in use local database"
                     }
                 )
-        except Exception as e:
-            logger.error(f"Local database check error: {str(e)}")
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "message": "Internal server error",
-                    "error": "Database service unavailable local database"
-                }
-            )
-        # Create local database user
-        hashed_password = get_password_hash(user_password)
-        # Check if user already exists in local database
-        new_user = UserEntity(
-        id=uuid.uuid4(),
-            email=user_email,
-            password=hashed_password,
-            is_verified='YES',
-            status='ACTIVE',
-            connexion_type='EMAIL',
-            role='USER',
-            spseudo=user_pseudo,
-            point=0,
-            niveaux=1
-        )
-        
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+            raise
         logger.info("Local database user created")
-        # Prepare response
-        user_dict = new_user.to_dict()
-        if 'password' in user_dict:
-            del user_dict['password']
         
         return JSONResponse(
             status_code=201,
@@ -306,6 +379,7 @@ def delete_user(user_id: str, db: Session = Depends(get_db)):
         
         db.delete(user)
         db.commit()
+        leaderboards.discard(user_id)
         
         return JSONResponse(
             status_code=200,
@@ -325,6 +399,22 @@ def delete_user(user_id: str, db: Session = Depends(get_db)):
         )
 
 
+def issue_access_token(db_user: UserEntity):
+    """Jeton d'accès de courte durée (exp) pour un utilisateur; retourne (jeton, expiration en secondes epoch)"""
+    expires_at = int(time.time()) + ACCESS_TOKEN_TTL_SECONDS
+    user_dict = db_user.to_dict()
+    adapted_data = {
+        'id': user_dict.get("id"),
+        'email': user_dict.get("email"),
+        'pseudo': user_dict.get("pseudo"),
+        'role': user_dict.get("role"),
+        'point': user_dict.get("point"),
+        'niveaux': user_dict.get("niveaux"),
+        'isverified': user_dict.get("is_verified"),
+        'expires_in': expires_at
+    }
+    return generate_token(adapted_data, expires_at), expires_at
+
 @router.post("/login")
 def login(user: UserLogin, db: Session = Depends(get_db)):
     """Loger un utilisateur"""
@@ -341,7 +431,11 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
                         "data":""
                     }
                 )
-            if not verify_password(user_password, db_user.to_dict().get("password")):
+            try:
+                valid, new_hash = password_pool.verify_and_update_sync(user_password, db_user.password)
+            except PasswordPoolSaturated:
+                return password_pool_busy()
+            if not valid:
                 return JSONResponse(
                     status_code=400,
                     content={
@@ -349,6 +443,10 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
                         "data": ""
                     }
                 )
+            if new_hash:
+                # Hash fait avec un autre coût que BCRYPT_ROUNDS : remplacé de façon transparente
+                db_user.password = new_hash
+                db.commit()
             if db_user.to_dict().get("status") == "INACTIVE":
                 return StandardResponse(
                     status_code=400,
@@ -367,17 +465,9 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
                 )
             try:
                 try:
-                    adapted_data = {
-                        'id': db_user.to_dict().get("id"),
-                        'email': db_user.to_dict().get("email"),
-                        'pseudo': db_user.to_dict().get("pseudo"),
-                        'role': db_user.to_dict().get("role"),
-                        'point': db_user.to_dict().get("point"),
-                        'niveaux': db_user.to_dict().get("niveaux"),
-                        'isverified': db_user.to_dict().get("is_verified"),
-                        'expires_in': int(datetime.timestamp(datetime.now() + timedelta(days=2)))
-                    }
-                    custom_token = generate_token(adapted_data)
+                    custom_token, expires_at = issue_access_token(db_user)
+                    refresh_token, _ = issue_refresh_token(db, db_user.id)
+                    lives = user_lives(db_user)
 
                     return JSONResponse(
                         status_code=200,
@@ -385,6 +475,8 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
                             "message":"successful login",
                             "data":{
                                 "token": custom_token,
+                                "expires_at": expires_at,
+                                "refresh_token": refresh_token,
                                 "id": db_user.to_dict().get("id"),
                                 "email": db_user.to_dict().get("email"),
                                 "spseudo": db_user.to_dict().get("spseudo"),
@@ -392,7 +484,8 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
                                 "niveaux": db_user.to_dict().get("niveaux"),
                                 "role": db_user.to_dict().get("role"),
                                 "is_verified": db_user.to_dict().get("is_verified"),
-                                "vies": db_user.to_dict().get("vies")
+                                "vies": lives.lives,
+                                "lives": lives.summary()
                             }
                         }
                     )
@@ -433,43 +526,51 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 
 # Update user score and level
 @router.post("/update-score/{user_id}")
-def update_user_score(user_id: str, points_earned: int, db: Session = Depends(get_db)):
+def update_user_score(
+    user_id: str,
+    points_earned: int,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_user)
+):
     """Met à jour le score d'un utilisateur et calcule son niveau"""
+    ensure_same_user(principal, user_id)
     try:
-        # Récupérer l'utilisateur
-        user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Utilisateur non trouvé"
+        if SCORE_WRITE_BEHIND:
+            # Crédit agrégé en mémoire, écrit par lots (score lu + crédits en attente)
+            point, pending = score_aggregator.read_user(
+                db, user_id, lambda: db.query(UserEntity.point).filter(UserEntity.id == user_id).scalar()
             )
-        
-        # Mettre à jour le score
-        new_score = user.point + points_earned
-        
-        # Calculer le nouveau niveau basé sur le score
-        # Logique: niveau 1 = 0-99 points, niveau 2 = 100-299 points, etc.
-        new_level = (new_score // 100) + 1
-        
-        # Mettre à jour les données
-        user.point = new_score
-        user.niveaux = new_level
-        user.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(user)
+            if point is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Utilisateur non trouvé"
+                )
+            score_aggregator.add(user_id, points_earned)
+            new_score = point + pending + points_earned
+            state = {"score": new_score, "level": level_for(new_score)}
+            leaderboards.record(user_id, new_score, points_earned)
+        else:
+            # Incrément atomique (point = point + :n), niveau calculé en SQL
+            state = credit_points(db, user_id, points_earned)
+            if state is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Utilisateur non trouvé"
+                )
         
         return StandardResponse(
-            success=True,
+            statusCode=200,
             message="Score mis à jour avec succès",
             data={
-                "user_id": user.id,
-                "new_score": user.point,
-                "new_level": user.niveaux,
+                "user_id": user_id,
+                "new_score": state["score"],
+                "new_level": state["level"],
                 "points_earned": points_earned
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la mise à jour du score: {str(e)}")
         db.rollback()
@@ -480,10 +581,11 @@ def update_user_score(user_id: str, points_earned: int, db: Session = Depends(ge
 
 # Get user statistics
 @router.get("/stats/{user_id}")
-def get_user_stats(user_id: str, db: Session = Depends(get_db)):
+async def get_user_stats(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Récupère les statistiques d'un utilisateur"""
     try:
-        user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
+        # Crédits en attente d'écriture ajoutés (mode write-behind), sans double comptage
+        user, pending = await score_aggregator.aread_user(db, user_id, lambda: load_user(db, user_id))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -491,18 +593,20 @@ def get_user_stats(user_id: str, db: Session = Depends(get_db)):
             )
         
         return StandardResponse(
-            success=True,
+            statusCode=200,
             message="Statistiques récupérées avec succès",
             data={
                 "user_id": user.id,
                 "pseudo": user.spseudo,
                 "email": user.email,
-                "score": user.point,
-                "level": user.niveaux,
+                "score": user.point + pending,
+                "level": level_for(user.point + pending) if pending else user.niveaux,
                 "created_at": user.created_at.isoformat() if user.created_at else None
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des stats: {str(e)}")
         raise HTTPException(
@@ -510,41 +614,57 @@ def get_user_stats(user_id: str, db: Session = Depends(get_db)):
             detail="Erreur lors de la récupération des statistiques"
         )
 
+# Get user level progress
+@router.get("/progress/{user_id}")
+async def get_user_progress(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Récupère la progression d'un utilisateur sur tous les niveaux (meilleur score, étoiles, tentatives)"""
+    try:
+        progress = await get_progress_map(db, user_id)
+        
+        return StandardResponse(
+            statusCode=200,
+            message="Progression récupérée avec succès",
+            data={
+                "user_id": user_id,
+                "levels": progress
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Erreur lors de la récupération de la progression: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de la récupération de la progression"
+        )
+
 # Use a life (for quiz gameplay)
 @router.post("/use-life/{user_id}")
-def use_life(user_id: str, db: Session = Depends(get_db)):
-    """Utilise une vie pour jouer à un quiz"""
+def use_life(user_id: str, db: Session = Depends(get_db), principal: Principal = Depends(get_current_user)):
+    """Utilise une vie pour jouer à un quiz (les vies régénérées depuis la dernière écriture sont prises en compte)"""
+    ensure_same_user(principal, user_id)
     try:
-        user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
-        if not user:
+        state = consume_life(db, user_id)
+        if state is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Utilisateur non trouvé"
             )
         
-        if user.vies <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Aucune vie disponible"
-            )
-        
-        # Décrémenter les vies
-        user.vies -= 1
-        user.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(user)
-        
         return StandardResponse(
-            success=True,
+            statusCode=200,
             message="Vie utilisée avec succès",
             data={
-                "user_id": user.id,
-                "remaining_lives": user.vies,
-                "last_life_refresh": user.last_life_refresh.isoformat() if user.last_life_refresh else None
+                "user_id": user_id,
+                "remaining_lives": state.lives,
+                **state.to_dict()
             }
         )
         
+    except NoLifeLeft:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucune vie disponible"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -555,58 +675,35 @@ def use_life(user_id: str, db: Session = Depends(get_db)):
             detail="Erreur lors de l'utilisation d'une vie"
         )
 
-# Refresh lives (called periodically)
+# Refresh lives (kept for older clients: lives are now computed on read, nothing is written)
 @router.post("/refresh-lives/{user_id}")
-def refresh_lives(user_id: str, db: Session = Depends(get_db)):
+async def refresh_lives(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Rafraîchit les vies d'un utilisateur basé sur le temps écoulé"""
     try:
-        user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
+        user = (await db.execute(select(UserEntity).where(UserEntity.id == user_id))).scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Utilisateur non trouvé"
             )
         
-        now = datetime.utcnow()
-        last_refresh = user.last_life_refresh or user.created_at
-        time_diff = now - last_refresh
-        
-        # Rafraîchir une vie toutes les 30 minutes, maximum 3 vies
-        if time_diff.total_seconds() >= 1800 and user.vies < 3:  # 1800 seconds = 30 minutes
-            lives_to_add = min(int(time_diff.total_seconds() // 1800), 3 - user.vies)
-            user.vies = min(user.vies + lives_to_add, 3)
-            user.last_life_refresh = now
-            user.updated_at = now
-            
-            db.commit()
-            db.refresh(user)
-            
-            return StandardResponse(
-                success=True,
-                message=f"{lives_to_add} vie(s) rafraîchie(s)",
-                data={
-                    "user_id": user.id,
-                    "lives_added": lives_to_add,
-                    "current_lives": user.vies,
-                    "last_life_refresh": user.last_life_refresh.isoformat()
-                }
-            )
-        else:
-            return StandardResponse(
-                success=True,
-                message="Aucune vie à rafraîchir",
-                data={
-                    "user_id": user.id,
-                    "current_lives": user.vies,
-                    "next_life_in_seconds": max(0, 1800 - int(time_diff.total_seconds()))
-                }
-            )
+        state = user_lives(user)
+        lives_added = max(0, state.lives - user.vies)
+        
+        return StandardResponse(
+            statusCode=200,
+            message=f"{lives_added} vie(s) rafraîchie(s)" if lives_added else "Aucune vie à rafraîchir",
+            data={
+                "user_id": user.id,
+                "lives_added": lives_added,
+                **state.to_dict()
+            }
+        )
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Erreur lors du rafraîchissement des vies: {str(e)}")
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erreur lors du rafraîchissement des vies"
@@ -614,34 +711,22 @@ def refresh_lives(user_id: str, db: Session = Depends(get_db)):
 
 # Get life status
 @router.get("/life-status/{user_id}")
-def get_life_status(user_id: str, db: Session = Depends(get_db)):
-    """Récupère le statut des vies d'un utilisateur"""
+async def get_life_status(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Récupère le statut des vies d'un utilisateur (calculé, sans écriture)"""
     try:
-        user = db.query(UserEntity).filter(UserEntity.id == user_id).first()
+        user = (await db.execute(select(UserEntity).where(UserEntity.id == user_id))).scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Utilisateur non trouvé"
             )
         
-        now = datetime.utcnow()
-        last_refresh = user.last_life_refresh or user.created_at
-        time_diff = now - last_refresh
-        
-        # Calculer le temps jusqu'à la prochaine vie
-        next_life_in_seconds = 0
-        if user.vies < 3:
-            next_life_in_seconds = max(0, 1800 - int(time_diff.total_seconds()))
-        
         return StandardResponse(
-            success=True,
+            statusCode=200,
             message="Statut des vies récupéré",
             data={
                 "user_id": user.id,
-                "current_lives": user.vies,
-                "max_lives": 3,
-                "next_life_in_seconds": next_life_in_seconds,
-                "last_life_refresh": user.last_life_refresh.isoformat() if user.last_life_refresh else None
+                **user_lives(user).to_dict()
             }
         )
         
@@ -654,9 +739,93 @@ def get_life_status(user_id: str, db: Session = Depends(get_db)):
             detail="Erreur lors de la récupération du statut des vies"
         )
 
+@router.post("/token/refresh")
+def refresh_access_token(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Échange un jeton de rafraîchissement contre un nouveau jeton d'accès et un nouveau jeton de rafraîchissement"""
+    try:
+        refresh_token, entity = rotate_refresh_token(db, body.refresh_token)
+        db_user = db.get(UserEntity, entity.user_id)
+        if db_user is None or db_user.is_deleted or db_user.to_dict().get("status") == "INACTIVE":
+            revoke_family(db, entity.family_id)
+            db.commit()
+            raise InvalidRefreshToken("Utilisateur inactif ou supprimé")
+        access_token, expires_at = issue_access_token(db_user)
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message":"token refreshed",
+                "data":{
+                    "token": access_token,
+                    "expires_at": expires_at,
+                    "refresh_token": refresh_token
+                }
+            }
+        )
+    except InvalidRefreshToken as e:
+        return JSONResponse(
+            status_code=401,
+            content={
+                "message": str(e),
+                "data":""
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors du rafraîchissement du jeton: {str(e)}")
+        db.rollback()
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message":"Internal server error",
+                "data":""
+            }
+        )
+
+@router.post("/logout")
+def logout(
+    body: Optional[RefreshTokenRequest] = None,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_user)
+):
+    """Révoque le jeton d'accès courant et, s'il est fourni, la chaîne du jeton de rafraîchissement"""
+    try:
+        if body and body.refresh_token:
+            family_id = db.execute(
+                select(RefreshTokenEntity.family_id).where(
+                    RefreshTokenEntity.token_hash == hash_refresh_token(body.refresh_token),
+                    RefreshTokenEntity.user_id == principal.user_id
+                )
+            ).scalar()
+            if family_id:
+                revoke_family(db, family_id)
+        jti = principal.claims.get("jti")
+        if jti:
+            # Commits with the refresh family, then blocks the jti in this worker: never before the row exists
+            revocation_filter.revoke(
+                db, jti, principal.user_id, datetime.utcfromtimestamp(principal.claims["exp"])
+            )
+        else:
+            db.commit()
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message":"successful logout",
+                "data":""
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de la déconnexion: {str(e)}")
+        db.rollback()
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message":"Internal server error",
+                "data":""
+            }
+        )
+
 #change Password
 @router.post("/change-password")
-async def change_password(myuser: UserChangePassword, db: Session = Depends(get_db)):
+def change_password(myuser: UserChangePassword, db: Session = Depends(get_db)):
     try:
         user_email = myuser.email
         user_password = myuser.password
@@ -706,7 +875,13 @@ async def change_password(myuser: UserChangePassword, db: Session = Depends(get_
             )
 
 
-        user.password = get_password_hash(user_password)
+        # Sync handler: the query, bcrypt and commit run in the request thread, off the event loop
+        try:
+            user.password = password_pool.hash_sync(user_password)
+        except PasswordPoolSaturated:
+            return password_pool_busy()
+        # Les sessions ouvertes avec l'ancien mot de passe ne peuvent plus être prolongées
+        revoke_user_refresh_tokens(db, user.id)
         db.commit()
         db.refresh(user)
 
@@ -726,9 +901,52 @@ async def change_password(myuser: UserChangePassword, db: Session = Depends(get_
             }
         )
 
+# Import en masse d'utilisateurs (classes, établissements)
+@router.post("/import")
+async def import_users_bulk(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+    principal: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Importe des utilisateurs depuis un corps CSV (en-tête email,password,spseudo) ou JSON lines,
+    lu en flux. Chaque ligne invalide ou déjà existante est signalée sans interrompre l'import.
+    """
+    file_format = import_format(request.headers.get("content-type"), fmt)
+    if file_format is None:
+        return JSONResponse(
+            status_code=415,
+            content={
+                "message":"unsupported format, send text/csv or application/x-ndjson",
+                "data":""
+            }
+        )
+    importer = UserImporter(db)
+    try:
+        report = await importer.run(request.stream(), file_format)
+        logger.info(f"Import par {principal.user_id}: {report.created} créés, {report.failed} en erreur")
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message":"import completed",
+                "data": report.to_dict()
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de l'import d'utilisateurs: {str(e)}")
+        # Les lots déjà validés restent en base : le rapport indique où l'import s'est arrêté
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message":"Internal server error",
+                "data": importer.report.to_dict()
+            }
+        )
+
 # Get dashboard statistics
 @router.get("/dashboard/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)):
     """Récupère les statistiques globales pour le tableau de bord admin"""
     try:
         from models.model_themes import ThemeEntity
@@ -736,25 +954,25 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
         from models.model_question import QuestionEntity
         
         # Compter les utilisateurs actifs
-        users_count = db.query(UserEntity).filter(
+        users_count = await db.scalar(select(func.count(UserEntity.id)).where(
             UserEntity.is_deleted == False,
             UserEntity.status == 'ACTIVE'
-        ).count()
+        ))
         
         # Compter les thèmes actifs
-        themes_count = db.query(ThemeEntity).filter(
+        themes_count = await db.scalar(select(func.count(ThemeEntity.id)).where(
             ThemeEntity.is_active == True
-        ).count()
+        ))
         
         # Compter les niveaux actifs
-        levels_count = db.query(LevelEntity).filter(
+        levels_count = await db.scalar(select(func.count(LevelEntity.id)).where(
             LevelEntity.is_active == True
-        ).count()
+        ))
         
         # Compter les questions actives
-        questions_count = db.query(QuestionEntity).filter(
+        questions_count = await db.scalar(select(func.count(QuestionEntity.id)).where(
             QuestionEntity.is_active == True
-        ).count()
+        ))
         
         return StandardResponse(
             statusCode=200,
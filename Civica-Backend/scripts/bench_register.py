@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Débit de l'inscription : ancien parcours (deux SELECT de vérification, INSERT,
+relecture) contre /api/user/register (un seul INSERT, unicité en base).
+
+Usage (depuis Civica-Backend) :
+    python scripts/bench_register.py [inscriptions] [concurrence]
+
+Les deux parcours tournent dans la même application, sur une base SQLite
+temporaire (BENCH_DATABASE_URL pour une autre base, vide et jetable : le
+script y crée des utilisateurs). Le coût bcrypt est BENCH_BCRYPT_ROUNDS (4
+par défaut) pour mesurer la base plutôt que le hachage.
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+_DATABASE_URL = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='civica-bench-'), 'bench.db')}"
+os.environ["DATABASE_URL"] = _DATABASE_URL
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["BCRYPT_ROUNDS"] = os.getenv("BENCH_BCRYPT_ROUNDS", "4")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from dependencies import get_db
+from models.model_user import UserEntity, UserRegister
+from security.password_pool import password_pool
+
+
+async def legacy_register(user: UserRegister, db: Session = Depends(get_db)):
+    # Parcours d'avant la contrainte unique (id converti en str, sinon SQLite refuse l'UUID)
+    if db.query(UserEntity).filter(UserEntity.email == user.email).first():
+        return JSONResponse(status_code=409, content={"message": "User with this email already exists"})
+    if db.query(UserEntity).filter(UserEntity.spseudo == user.spseudo).first():
+        return JSONResponse(status_code=409, content={"message": "User with this pseudo already exists"})
+    new_user = UserEntity(
+        id=str(uuid.uuid4()), email=user.email, password=await password_pool.hash(user.password),
+        is_verified='YES', status='ACTIVE', connexion_type='EMAIL', role='USER',
+        spseudo=user.spseudo, point=0, niveaux=1
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    user_dict = new_user.to_dict()
+    del user_dict['password']
+    return JSONResponse(status_code=201, content={"message": "User registered successfully", "data": user_dict})
+
+
+class Statements:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def run(client: TestClient, engine, path: str, prefix: str, total: int, concurrency: int):
+    """(inscriptions par seconde, requêtes SQL par inscription, codes HTTP)"""
+    statements = Statements()
+    event.listen(engine, "before_cursor_execute", statements)
+    try:
+        def register(i: int) -> int:
+            body = {"email": f"{prefix}{i}@bench.cm", "password": "Bench-Passw0rd!", "spseudo": f"{prefix}{i}"}
+            return client.post(path, json=body).status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            codes = list(executor.map(register, range(total)))
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", statements)
+    return total / elapsed, statements.count / total, sorted(set(codes))
+
+
+def main(argv):
+    try:
+        total = int(argv[1]) if len(argv) > 1 else 300
+        concurrency = int(argv[2]) if len(argv) > 2 else 8
+    except ValueError:
+        print(__doc__)
+        return 2
+    # Importée ici : les processus du pool de hachage (spawn) réimportent ce module
+    from app import app
+    from database import Base, engine
+    app.add_api_route("/bench/legacy-register", legacy_register, methods=["POST"], include_in_schema=False)
+    Base.metadata.create_all(engine)
+    client = TestClient(app)
+    # Une inscription de chaque avant la mesure (pool de hachage, connexions)
+    run(client, engine, "/bench/legacy-register", "warm-legacy-", 1, 1)
+    run(client, engine, "/api/user/register", "warm-new-", 1, 1)
+
+    print(f"{total} inscriptions, {concurrency} clients, bcrypt {os.environ['BCRYPT_ROUNDS']}, {engine.dialect.name}")
+    print(f"{'parcours':<10}  {'inscr./s':>9}  {'requêtes/inscr.':>15}  codes")
+    for name, path in (("avant", "/bench/legacy-register"), ("après", "/api/user/register")):
+        rate, per_request, codes = run(client, engine, path, f"{name}-{uuid.uuid4().hex[:6]}-", total, concurrency)
+        print(f"{name:<10}  {rate:>9.1f}  {per_request:>15.1f}  {codes}")
+    password_pool.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from security.token_utils import verify_token
+from security.revocation import revocation_filter
+
+# Verified tokens kept in memory, and for how long at most (never past their exp)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 60))
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated caller, taken from the token payload"""
+    user_id: str
+    email: Optional[str]
+    role: Optional[str]
+    claims: dict
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "ADMIN"
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified tokens with a TTL.
+
+    Keys are SHA-256 digests of the tokens, so the cache never holds a
+    usable credential. An entry lives AUTH_CACHE_TTL seconds at most and
+    never beyond the token's own exp claim.
+    """
+
+    def __init__(self, max_entries: int = AUTH_CACHE_SIZE, ttl_seconds: float = AUTH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[Principal, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[Principal]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, principal: Principal, expires_at: Optional[float] = None):
+        deadline = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._entries[key] = (principal, deadline)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: bytes):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_cache = TokenCache()
+
+
+def _principal(claims: dict) -> Optional[Principal]:
+    user = claims.get("user")
+    if not isinstance(user, dict) or not user.get("id"):
+        return None
+    return Principal(str(user["id"]), user.get("email"), user.get("role"), claims)
+
+
+def authenticate(token: str) -> Optional[Principal]:
+    """
+    Principal for a bearer token, from the cache or after a full JWT decode.
+
+    Revocation is checked on every call, cached or not: the filter answers
+    from memory and only suspected-revoked tokens reach the database.
+    """
+    key = TokenCache.key(token)
+    principal = token_cache.get(key)
+    if principal is None:
+        claims = verify_token(token)
+        if not claims:
+            return None
+        principal = _principal(claims)
+        if principal is None:
+            return None
+        # Tokens issued before exp was added expire at user.expires_in
+        token_cache.put(key, principal, claims.get("exp") or claims["user"].get("expires_in"))
+    if revocation_filter.is_revoked(principal.claims.get("jti")):
+        token_cache.discard(key)
+        return None
+    return principal
+
+
+def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Principal:
+    """Dépendance : utilisateur authentifié par le jeton Bearer, aussi placé dans request.state.principal"""
+    principal = authenticate(credentials.credentials) if credentials and credentials.credentials else None
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    request.state.principal = principal
+    return principal
+
+
+def get_optional_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Optional[Principal]:
+    """Dépendance : utilisateur du jeton Bearer s'il est valide, sinon None (routes publiques)"""
+    principal = authenticate(credentials.credentials) if credentials and credentials.credentials else None
+    if principal is not None:
+        request.state.principal = principal
+    return principal
+
+
+def ensure_same_user(principal: Principal, user_id: str):
+    """Un utilisateur n'agit que sur son propre compte (les administrateurs sur tous)"""
+    if principal.user_id != user_id and not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Action non autorisée pour cet utilisateur"
+        )
+
+
+def require_admin(principal: Principal = Depends(get_current_user)) -> Principal:
+    """Dépendance : utilisateur authentifié avec le rôle ADMIN"""
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Action réservée aux administrateurs"
+        )
+    return principal
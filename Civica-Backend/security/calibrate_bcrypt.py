@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Choix du coût bcrypt pour une latence cible sur la machine courante.
+
+Usage :
+    python -m security.calibrate_bcrypt [cible_ms] [échantillons]
+
+Mesure le temps médian d'un hachage pour chaque coût à partir de 8 et
+recommande le plus élevé sous la cible (250 ms par défaut). Le débit
+estimé tient compte de PASSWORD_POOL_WORKERS. Reporter le résultat dans
+BCRYPT_ROUNDS : les hachages existants sont recalculés à la connexion.
+"""
+import statistics
+import sys
+import time
+from passlib.hash import bcrypt
+from security.password_utils import BCRYPT_ROUNDS
+from security.password_pool import PASSWORD_POOL_WORKERS
+
+MIN_ROUNDS = 8
+MAX_ROUNDS = 16
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Median seconds for one hash at this cost"""
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration-Passw0rd!")
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(argv):
+    try:
+        target_ms = float(argv[1]) if len(argv) > 1 else 250.0
+        samples = int(argv[2]) if len(argv) > 2 else 5
+    except ValueError:
+        print(__doc__)
+        return 2
+    workers = max(1, PASSWORD_POOL_WORKERS)
+    chosen = None
+    print(f"{'coût':>4}  {'médiane':>10}  {'connexions/s':>12}")
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        seconds = measure(rounds, samples)
+        marker = " (actuel)" if rounds == BCRYPT_ROUNDS else ""
+        print(f"{rounds:>4}  {seconds * 1000:>8.1f}ms  {workers / seconds:>12.1f}{marker}")
+        if seconds * 1000 > target_ms:
+            break
+        chosen = rounds
+    if chosen is None:
+        print(f"Aucun coût >= {MIN_ROUNDS} sous {target_ms:.0f} ms : garder BCRYPT_ROUNDS={MIN_ROUNDS} au minimum")
+        return 1
+    print(f"Recommandé : BCRYPT_ROUNDS={chosen} (cible {target_ms:.0f} ms, {workers} processus)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
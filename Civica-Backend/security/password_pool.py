@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+import asyncio
+import bisect
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+from security.password_utils import get_password_hash, verify_and_update_password, pwd_context
+
+# Worker processes doing bcrypt work; 0 hashes in threads of this process instead
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+# Hashes queued or running beyond which new requests fail fast
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", max(1, PASSWORD_POOL_WORKERS) * 16))
+
+# Upper bounds (seconds) of the latency histogram buckets, queueing included
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PasswordPoolSaturated(Exception):
+    def __init__(self, pending: int):
+        super().__init__(f"Trop de calculs de mot de passe en attente ({pending})")
+        self.pending = pending
+
+
+class PasswordPoolUnavailable(PasswordPoolSaturated):
+    """The worker processes died twice in a row (a new pool is started on the next call)"""
+
+    def __init__(self):
+        Exception.__init__(self, "Pool de mots de passe indisponible")
+        self.pending = 0
+
+
+def _warm_up() -> int:
+    # Load the bcrypt backend in the worker before the first real request
+    pwd_context.handler("bcrypt").get_backend()
+    return os.getpid()
+
+
+class PasswordHasherPool:
+    """
+    Size-bounded pool for bcrypt hashing and verification.
+
+    bcrypt is deliberately slow; running it inline blocks the event loop
+    (async handlers) or a threadpool slot for the whole hash. Here the work
+    goes to a few worker processes (spawned, so no lock or thread state of
+    the server is forked). At most max_pending hashes are queued or
+    running: beyond that, calls raise PasswordPoolSaturated at once instead
+    of queueing, and the route answers 503 with Retry-After.
+
+    A worker killed from outside (OOM killer) breaks a ProcessPoolExecutor
+    for good: the broken pool is dropped, the next call starts a new one
+    and the failed call is retried once there.
+    """
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, max_pending: int = PASSWORD_POOL_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.pending_max = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    # bcrypt releases the GIL: threads still run hashes in parallel
+                    self._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password")
+            return self._executor
+
+    def _done(self, started: float, future: Future):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            self.completed += 1
+            self.latency_seconds_total += elapsed
+            self.latency_seconds_max = max(self.latency_seconds_max, elapsed)
+            self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def _discard(self, executor: Executor):
+        """Forget a broken pool; the next _get_executor() starts a new one"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args) -> Future:
+        return self._submit(fn, *args)[1]
+
+    def _submit(self, fn, *args) -> Tuple[Executor, Future]:
+        executor = self._get_executor()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolSaturated(self.pending)
+            self.pending += 1
+            self.pending_max = max(self.pending_max, self.pending)
+        started = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception as e:
+            with self._lock:
+                self.pending -= 1
+            if isinstance(e, BrokenProcessPool):
+                self._discard(executor)
+            raise
+        future.add_done_callback(lambda f: self._done(started, f))
+        return executor, future
+
+    async def _run(self, fn, *args):
+        """Run fn in the pool; a pool broken meanwhile is replaced and fn retried once"""
+        for attempt in range(2):
+            # Stays None when _submit fails: it already dropped a pool found broken
+            executor = None
+            try:
+                executor, future = self._submit(fn, *args)
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                if executor is not None:
+                    self._discard(executor)
+                if attempt:
+                    raise PasswordPoolUnavailable()
+
+    def _run_sync(self, fn, *args):
+        for attempt in range(2):
+            executor = None
+            try:
+                executor, future = self._submit(fn, *args)
+                return future.result()
+            except BrokenProcessPool:
+                if executor is not None:
+                    self._discard(executor)
+                if attempt:
+                    raise PasswordPoolUnavailable()
+
+    async def hash(self, password: str, rounds: Optional[int] = None) -> str:
+        return await self._run(get_password_hash, password, rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def hash_sync(self, password: str) -> str:
+        """For sync handlers (threadpool): the thread waits, the hash runs in the pool"""
+        return self._run_sync(get_password_hash, password)
+
+    def verify_and_update_sync(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self._run_sync(verify_and_update_password, password, hashed_password)
+
+    def warm_up(self) -> int:
+        """Start every worker process now rather than on the first logins; returns how many answered"""
+        executor = self._get_executor()
+        futures = [executor.submit(_warm_up) for _ in range(max(1, self.workers))]
+        return len({future.result() for future in futures})
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            histogram = {f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)}
+            histogram["le_inf"] = self.buckets[-1]
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "pending_max": self.pending_max,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "latency_seconds_total": round(self.latency_seconds_total, 6),
+                "latency_seconds_max": round(self.latency_seconds_max, 6),
+                "latency_histogram": histogram,
+            }
+
+
+password_pool = PasswordHasherPool()
@@ -1,7 +1,20 @@
+import os
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
 
-# Create a password context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor (2^rounds iterations), see `python -m security.calibrate_bcrypt`
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# Create a password context using bcrypt. min/max pin the cost: a hash made
+# with any other cost is flagged for a rehash at the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -16,14 +29,30 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if its hash uses another cost.
+    
+    Args:
+        plain_password: The plain text password to verify
+        hashed_password: The hashed password to compare against
+        
+    Returns:
+        tuple: (True if the passwords match, new hash to store or None)
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash a plain text password.
     
     Args:
         password: The plain text password to hash
+        rounds: bcrypt cost, BCRYPT_ROUNDS by default (any other cost is rehashed at the next login)
         
     Returns:
         str: The hashed password
     """
-    return pwd_context.hash(password)
+    if rounds is None or rounds == BCRYPT_ROUNDS:
+        return pwd_context.hash(password)
+    return bcrypt.using(rounds=rounds).hash(password)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models.model_auth_token import RefreshTokenEntity
+
+REFRESH_TOKEN_TTL_DAYS = int(os.getenv("REFRESH_TOKEN_TTL_DAYS", 30))
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+def hash_refresh_token(token: str) -> str:
+    """Only this digest is stored: a leaked table cannot be replayed"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_refresh_token(db: Session, user_id: str, family_id: Optional[str] = None, commit: bool = True) -> Tuple[str, RefreshTokenEntity]:
+    """New opaque refresh token for user_id; a new family (one per login) unless rotating"""
+    token = secrets.token_urlsafe(32)
+    entity = RefreshTokenEntity(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or str(uuid.uuid4()),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_TTL_DAYS)
+    )
+    db.add(entity)
+    if commit:
+        db.commit()
+    return token, entity
+
+
+def revoke_family(db: Session, family_id: str, now: Optional[datetime] = None) -> int:
+    result = db.execute(
+        update(RefreshTokenEntity)
+        .where(RefreshTokenEntity.family_id == family_id, RefreshTokenEntity.revoked_at.is_(None))
+        .values(revoked_at=now or datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: str) -> int:
+    """Sign the user out everywhere (password change); no commit"""
+    result = db.execute(
+        update(RefreshTokenEntity)
+        .where(RefreshTokenEntity.user_id == user_id, RefreshTokenEntity.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[str, RefreshTokenEntity]:
+    """
+    Exchange a refresh token for a new one of the same family.
+
+    The old token is retired with a conditional UPDATE (revoked_at IS
+    NULL), so two concurrent uses of one token cannot both succeed.
+    Presenting a token that was already rotated means it leaked: the
+    whole family is revoked and the legitimate holder must log in again.
+    Raises InvalidRefreshToken.
+    """
+    now = datetime.utcnow()
+    current = db.execute(
+        select(RefreshTokenEntity).where(RefreshTokenEntity.token_hash == hash_refresh_token(token))
+    ).scalars().first()
+    if current is None or current.expires_at <= now:
+        raise InvalidRefreshToken("Jeton de rafraîchissement invalide ou expiré")
+    new_token, entity = issue_refresh_token(db, current.user_id, current.family_id, commit=False)
+    retired = db.execute(
+        update(RefreshTokenEntity)
+        .where(RefreshTokenEntity.id == current.id, RefreshTokenEntity.revoked_at.is_(None))
+        .values(revoked_at=now, replaced_by=entity.id)
+        .execution_options(synchronize_session=False)
+    )
+    if retired.rowcount != 1:
+        db.rollback()
+        revoke_family(db, current.family_id, now)
+        db.commit()
+        raise InvalidRefreshToken("Jeton de rafraîchissement déjà utilisé")
+    db.commit()
+    return new_token, entity
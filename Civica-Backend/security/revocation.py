@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import hashlib
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from models.model_auth_token import RevokedTokenEntity
+
+logger = logging.getLogger(__name__)
+
+# Revoked tokens the filter is sized for, and its target false positive rate
+REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", 100000))
+REVOCATION_FILTER_FP_RATE = float(os.getenv("REVOCATION_FILTER_FP_RATE", 0.01))
+# How often revocations made by other workers are picked up
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", 30))
+# Full rebuild (drops expired entries, which a Bloom filter cannot delete)
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", 3600))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (k bit positions from one BLAKE2b digest)"""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        # Double hashing: h1 + i * h2 gives k independent-enough positions
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    In-memory view of revoked_tokens, checked on every authenticated request.
+
+    A Bloom filter (about 10 bits per revoked token at 1 % false
+    positives) answers "certainly not revoked" for almost every token
+    without touching the database. A token it reports as possibly revoked
+    is looked up by primary key once, and the answer kept until the next
+    rebuild. Revocations made by this worker are added at once; those made
+    by other workers are pulled every REVOCATION_SYNC_SECONDS from the
+    revoked_at index. The filter is rebuilt from the live rows every
+    REVOCATION_REBUILD_SECONDS, when expired rows are also purged.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        capacity: int = REVOCATION_FILTER_CAPACITY,
+        fp_rate: float = REVOCATION_FILTER_FP_RATE
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, fp_rate)
+        self._revoked: Set[str] = set()
+        self._not_revoked: Set[str] = set()
+        # jti -> confirmed, for the revocations added while a rebuild loads its rows
+        self._added_during_rebuild: Optional[Dict[str, bool]] = None
+        self._synced_until: Optional[datetime] = None
+        self._rebuilt_at: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.checks = 0
+        self.db_lookups = 0
+        self.false_positives = 0
+
+    def _add(self, jti: str, confirmed: bool = False):
+        with self._lock:
+            self._bloom.add(jti)
+            self._not_revoked.discard(jti)
+            if confirmed:
+                self._revoked.add(jti)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild[jti] = self._added_during_rebuild.get(jti, False) or confirmed
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Reload every unexpired revocation and purge the expired ones.
+
+        A revocation added by this worker after the SELECT, or committed
+        after it, is missing from the rows: the jtis added while the rows
+        load are recorded and carried over into the new filter.
+        """
+        now = datetime.utcnow()
+        db.execute(delete(RevokedTokenEntity).where(RevokedTokenEntity.expires_at < now))
+        db.commit()
+        with self._lock:
+            self._added_during_rebuild = {}
+        try:
+            rows = db.execute(
+                select(RevokedTokenEntity.jti).where(RevokedTokenEntity.expires_at >= now)
+            ).scalars().all()
+            bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.fp_rate)
+            for jti in rows:
+                bloom.add(jti)
+            with self._lock:
+                added = self._added_during_rebuild
+                for jti in added:
+                    bloom.add(jti)
+                self._bloom = bloom
+                # Confirmed answers are dropped with the filter they came from, except this worker's own revocations
+                self._revoked = {jti for jti, confirmed in added.items() if confirmed}
+                self._not_revoked = set()
+                # Small overlap: a row committed late with an older revoked_at is still seen
+                self._synced_until = now - timedelta(seconds=REVOCATION_SYNC_SECONDS)
+                self._rebuilt_at = now
+        finally:
+            with self._lock:
+                self._added_during_rebuild = None
+        return len(rows)
+
+    def sync(self, db: Session) -> int:
+        """Add the revocations recorded since the last sync (any worker)"""
+        if self._synced_until is None:
+            return self.rebuild(db)
+        now = datetime.utcnow()
+        rows = db.execute(
+            select(RevokedTokenEntity.jti).where(RevokedTokenEntity.revoked_at >= self._synced_until)
+        ).scalars().all()
+        for jti in rows:
+            self._add(jti)
+        self._synced_until = now - timedelta(seconds=REVOCATION_SYNC_SECONDS)
+        return len(rows)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        self.checks += 1
+        with self._lock:
+            if jti not in self._bloom or jti in self._not_revoked:
+                return False
+            if jti in self._revoked:
+                return True
+        # Possibly revoked (or a false positive): check the table once
+        self.db_lookups += 1
+        db = self.session_factory()
+        try:
+            revoked = db.get(RevokedTokenEntity, jti) is not None
+        finally:
+            db.close()
+        with self._lock:
+            if revoked:
+                self._revoked.add(jti)
+            else:
+                self.false_positives += 1
+                self._not_revoked.add(jti)
+        return revoked
+
+    def revoke(self, db: Session, jti: str, user_id: Optional[str], expires_at: datetime, commit: bool = True):
+        """
+        Record a revoked access token (idempotent) and block it in this worker at once.
+
+        With commit=False the jti is blocked before the caller commits; a
+        rebuild running in between still keeps it, but a rolled back
+        revocation stays blocked in this worker until the next rebuild.
+        """
+        if db.get(RevokedTokenEntity, jti) is None:
+            db.add(RevokedTokenEntity(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=datetime.utcnow()))
+        if commit:
+            db.commit()
+        self._add(jti, confirmed=True)
+
+    def _run(self):
+        while not self._stop.wait(REVOCATION_SYNC_SECONDS):
+            db = None
+            try:
+                db = self.session_factory()
+                due = self._rebuilt_at is None or datetime.utcnow() - self._rebuilt_at >= timedelta(seconds=REVOCATION_REBUILD_SECONDS)
+                if due:
+                    self.rebuild(db)
+                else:
+                    self.sync(db)
+            except Exception as e:
+                logger.error(f"Erreur lors de la synchronisation des jetons révoqués: {e}")
+            finally:
+                if db is not None:
+                    db.close()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="token-revocation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "filter_entries": self._bloom.count,
+                "confirmed_revoked": len(self._revoked),
+                "filter_bits": self._bloom.size,
+                "filter_hashes": self._bloom.hashes,
+                "checks": self.checks,
+                "db_lookups": self.db_lookups,
+                "false_positives": self.false_positives,
+                "synced_until": self._synced_until.isoformat() if self._synced_until else None,
+            }
+
+
+def _session_factory() -> Session:
+    from database import SessionLocal
+    return SessionLocal()
+
+
+revocation_filter = RevocationFilter(_session_factory)
@@ -1,18 +1,29 @@
 import os 
+import time
+import uuid
 import jwt
 from dotenv import load_dotenv 
 load_dotenv()
 
-def generate_token(data):
+# Read once: every request used to look the key up in the environment again
+SECRET_KEY = os.getenv("SECRET_KEY")
+# Access tokens are short-lived; clients renew them with their refresh token
+ACCESS_TOKEN_TTL_SECONDS = int(os.getenv("ACCESS_TOKEN_TTL_SECONDS", 900))
+
+def generate_token(data, expires_at=None):
     """
-    generate token for user 
+    generate token for user (standard exp, iat and a unique jti for revocation)
     """
-    secret_key = os.getenv("SECRET_KEY")
+    now = int(time.time())
     payload = {
         'user':data ,
+        'sub': str(data.get('id')),
+        'iat': now,
+        'exp': expires_at or now + ACCESS_TOKEN_TTL_SECONDS,
+        'jti': uuid.uuid4().hex,
     }
 
-    token = jwt.encode(payload,secret_key,algorithm='HS256')
+    token = jwt.encode(payload,SECRET_KEY,algorithm='HS256')
 
     return token
 
@@ -20,9 +31,14 @@ def verify_token(token):
     """
     verify token for user 
     """
-    secret_key = os.getenv("SECRET_KEY")
     try:
-        payload = jwt.decode(token,secret_key,algorithms=['HS256'])
+        # exp is checked by the decode when present
+        payload = jwt.decode(token,SECRET_KEY,algorithms=['HS256'])
+        if 'exp' not in payload:
+            # Tokens issued before exp was added only carry user.expires_in
+            expires_in = (payload.get('user') or {}).get('expires_in')
+            if not isinstance(expires_in, (int, float)) or expires_in < time.time():
+                return None
         return payload
     except jwt.ExpiredSignatureError:
         return None
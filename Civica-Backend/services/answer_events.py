@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from models.model_answer_event import AnswerEventEntity
+
+logger = logging.getLogger(__name__)
+
+ANSWER_EVENTS_ENABLED = os.getenv("ANSWER_EVENTS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Events waiting to be written; producers are slowed down, then events dropped, beyond this
+ANSWER_EVENTS_QUEUE_SIZE = int(os.getenv("ANSWER_EVENTS_QUEUE_SIZE", 20000))
+ANSWER_EVENTS_BATCH_SIZE = int(os.getenv("ANSWER_EVENTS_BATCH_SIZE", 500))
+ANSWER_EVENTS_FLUSH_INTERVAL_MS = int(os.getenv("ANSWER_EVENTS_FLUSH_INTERVAL_MS", 200))
+# How long a blocking producer (threadpool handler) waits for room in a full queue
+ANSWER_EVENTS_PUT_TIMEOUT = float(os.getenv("ANSWER_EVENTS_PUT_TIMEOUT", 0.5))
+# Longest plausible answer time; anything else is stored as unknown (NULL)
+MAX_RESPONSE_MS = 60 * 60 * 1000
+SOURCES = ("check", "quiz")
+
+
+def answer_event(
+    user_id: str,
+    question_id: str,
+    answer: Optional[str],
+    is_correct: bool,
+    points: int,
+    source: str,
+    level_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    response_ms: Optional[int] = None
+) -> dict:
+    """One row of answer_events, timestamped when the answer is graded"""
+    return {
+        "user_id": user_id,
+        "question_id": question_id,
+        "level_id": level_id,
+        "session_id": session_id,
+        "answer": answer,
+        "is_correct": is_correct,
+        "points": points,
+        "response_ms": response_ms,
+        "source": source,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _short_id(value, nullable: bool = False) -> bool:
+    if value is None:
+        return nullable
+    return isinstance(value, str) and 0 < len(value) <= 36
+
+
+def valid_response_ms(value) -> Optional[int]:
+    """response_ms if it is a plausible duration in milliseconds, else None"""
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= MAX_RESPONSE_MS:
+        return value
+    return None
+
+
+def is_valid_event(event: dict) -> bool:
+    """Whether the event fits the answer_events columns (checked before it is queued)"""
+    answer = event.get("answer")
+    points = event.get("points")
+    response_ms = event.get("response_ms")
+    return (
+        _short_id(event.get("user_id"))
+        and _short_id(event.get("question_id"))
+        and _short_id(event.get("level_id"), nullable=True)
+        and _short_id(event.get("session_id"), nullable=True)
+        and (answer is None or (isinstance(answer, str) and len(answer) == 1))
+        and isinstance(event.get("is_correct"), bool)
+        and isinstance(points, int) and not isinstance(points, bool)
+        and (response_ms is None or valid_response_ms(response_ms) is not None)
+        and event.get("source") in SOURCES
+        and isinstance(event.get("created_at"), datetime)
+    )
+
+
+def _is_transient(error: Exception) -> bool:
+    # Lost connection, lock timeout, deadlock: the same batch can succeed later
+    return isinstance(error, OperationalError) or getattr(error, "connection_invalidated", False)
+
+
+class AnswerEventWriter:
+    """
+    In-process queue that appends answer events in batches.
+
+    A background thread drains up to batch_size events at a time and writes
+    them with one executemany INSERT and one commit. The queue is bounded:
+    request threads wait up to ANSWER_EVENTS_PUT_TIMEOUT for room, the event
+    loop never waits; events that still do not fit are dropped and counted.
+    Listeners run in the same transaction as the INSERT and see each batch
+    (used to maintain aggregates incrementally).
+
+    Events that do not fit the table are refused by publish(). A batch the
+    database still rejects is not retried as is: a transient error
+    (connection, deadlock) retries it whole after a pause, any other error
+    splits it in halves until the offending rows are isolated, logged and
+    dropped, so one bad row never holds back the rest of the log.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_size: int = ANSWER_EVENTS_QUEUE_SIZE,
+        batch_size: int = ANSWER_EVENTS_BATCH_SIZE,
+        interval_ms: int = ANSWER_EVENTS_FLUSH_INTERVAL_MS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_size)
+        self._listeners: List[Callable[[Session, List[dict]], None]] = []
+        # Batches whose INSERT failed, written again before anything else
+        self._retry: Deque[List[dict]] = deque()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+
+    def add_listener(self, listener: Callable[[Session, List[dict]], None]):
+        self._listeners.append(listener)
+
+    def publish(self, events: List[dict], block: bool = True) -> int:
+        """Queue events; returns how many were accepted (block=False from async handlers)"""
+        if self._thread is None:
+            return 0
+        accepted = 0
+        for index, event in enumerate(events):
+            if not is_valid_event(event):
+                self.rejected += 1
+                logger.warning(f"Événement de réponse invalide ignoré: {event!r}")
+                continue
+            try:
+                if block:
+                    self._queue.put(event, timeout=ANSWER_EVENTS_PUT_TIMEOUT)
+                else:
+                    self._queue.put_nowait(event)
+                accepted += 1
+            except queue.Full:
+                self.dropped += len(events) - index
+                logger.warning(f"File des réponses pleine : {len(events) - index} événements ignorés")
+                break
+        return accepted
+
+    def _drain(self, wait: bool) -> List[dict]:
+        if self._retry:
+            return self._retry.popleft()
+        batch = []
+        if wait:
+            try:
+                batch.append(self._queue.get(timeout=self.interval))
+            except queue.Empty:
+                return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[dict]):
+        db = None
+        try:
+            db = self.session_factory()
+            # List of parameter sets: executemany (multi-row INSERT with PyMySQL)
+            db.execute(insert(AnswerEventEntity), batch)
+            for listener in self._listeners:
+                listener(db, batch)
+            db.commit()
+        except Exception as e:
+            if db is not None:
+                db.rollback()
+            self.failures += 1
+            if _is_transient(e):
+                self._retry.appendleft(batch)
+                logger.error(f"Échec de l'écriture de {len(batch)} réponses, nouvel essai: {e}")
+                raise
+            if len(batch) == 1:
+                self.dead_lettered += 1
+                logger.error(f"Réponse rejetée par la base, ignorée: {batch[0]!r} ({e})")
+                return
+            # Rejected data: each half is written on its own to isolate the bad rows
+            middle = len(batch) // 2
+            self._retry.appendleft(batch[middle:])
+            self._retry.appendleft(batch[:middle])
+            logger.error(f"Lot de {len(batch)} réponses rejeté, écrit en deux moitiés: {e}")
+            return
+        finally:
+            if db is not None:
+                db.close()
+        self.written += len(batch)
+        self.batches += 1
+
+    def flush(self, wait: bool = False) -> int:
+        """Write the events queued so far (one batch); returns the number written"""
+        with self._flush_lock:
+            batch = self._drain(wait)
+            if batch:
+                self._write(batch)
+            return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.flush(wait=True)
+            except Exception:
+                # Transient failure: the batch is kept for the next attempt; producers feel the backpressure meanwhile
+                self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="answer-events", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop accepting events and write everything still queued"""
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        thread.join()
+        try:
+            while self.flush():
+                pass
+        except Exception:
+            logger.error(f"{sum(len(batch) for batch in list(self._retry)) + self._queue.qsize()} réponses perdues à l'arrêt")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._thread is not None,
+            "queued": self._queue.qsize() + sum(len(batch) for batch in list(self._retry)),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+def _session_factory() -> Session:
+    from database import SessionLocal
+    return SessionLocal()
+
+
+answer_events = AnswerEventWriter(_session_factory)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+import logging
+import sys
+import threading
+import uuid
+from array import array
+from typing import Dict, Optional, Union
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.model_question import QuestionEntity
+from services.quiz_session import AnswerKey
+
+logger = logging.getLogger(__name__)
+
+# Marks a question without explanation in the offsets array
+NO_EXPLANATION = -1
+# Marks, in the answers array, a key that is not one ASCII character (kept whole in a dict)
+IRREGULAR_ANSWER = 0
+
+
+def _key(question_id: str) -> Union[bytes, str]:
+    """16-byte key for UUID ids (half the size of the 36-char str), the id itself otherwise"""
+    try:
+        return uuid.UUID(question_id).bytes
+    except (ValueError, AttributeError, TypeError):
+        return question_id
+
+
+class AnswerKeyIndex:
+    """
+    Memory-resident answer keys: question_id -> (correct_answer, points, explanation).
+
+    Each question owns a slot in parallel arrays: one byte for the answer
+    letter, an int for the points and an (offset, length) pair into a single
+    UTF-8 buffer holding every explanation. A stored key that is not a
+    single ASCII character (question written outside the API) is kept whole
+    in a side dict, so it is still compared as the full string. Rewriting a question appends its
+    new explanation and leaves the old bytes as garbage; the buffer is
+    compacted once garbage outweighs live data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _reset(self):
+        self._slots: Dict[Union[bytes, str], int] = {}
+        self._answers = bytearray()
+        self._irregular: Dict[int, str] = {}
+        self._points = array("i")
+        self._offsets = array("q")
+        self._lengths = array("I")
+        self._blob = bytearray()
+        self._garbage = 0
+
+    def _append_explanation(self, explanation: Optional[str]):
+        if explanation is None:
+            return NO_EXPLANATION, 0
+        raw = explanation.encode("utf-8")
+        offset = len(self._blob)
+        self._blob += raw
+        return offset, len(raw)
+
+    def _answer_byte(self, slot: int, correct_answer: Optional[str]) -> int:
+        if correct_answer is not None and len(correct_answer) == 1 and 0 < ord(correct_answer) < 128:
+            self._irregular.pop(slot, None)
+            return ord(correct_answer)
+        self._irregular[slot] = correct_answer
+        return IRREGULAR_ANSWER
+
+    def _put(self, question_id: str, correct_answer: str, points: int, explanation: Optional[str]):
+        key = _key(question_id)
+        offset, length = self._append_explanation(explanation)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._answers)
+            self._slots[key] = slot
+            self._answers.append(self._answer_byte(slot, correct_answer))
+            self._points.append(points or 0)
+            self._offsets.append(offset)
+            self._lengths.append(length)
+            return
+        self._garbage += self._lengths[slot]
+        self._answers[slot] = self._answer_byte(slot, correct_answer)
+        self._points[slot] = points or 0
+        self._offsets[slot] = offset
+        self._lengths[slot] = length
+        if self._garbage > len(self._blob) // 2:
+            self._compact()
+
+    def _compact(self):
+        blob = bytearray()
+        for slot, offset in enumerate(self._offsets):
+            if offset != NO_EXPLANATION:
+                self._offsets[slot] = len(blob)
+                blob += self._blob[offset:offset + self._lengths[slot]]
+        self._blob = blob
+        self._garbage = 0
+
+    def put(self, question_id: str, correct_answer: str, points: int, explanation: Optional[str]):
+        """Insert or replace the answer key of one question (create/update paths)"""
+        with self._lock:
+            self._put(question_id, correct_answer, points, explanation)
+
+    def get(self, question_id: str) -> Optional[AnswerKey]:
+        with self._lock:
+            slot = self._slots.get(_key(question_id))
+            if slot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            offset = self._offsets[slot]
+            explanation = None
+            if offset != NO_EXPLANATION:
+                explanation = self._blob[offset:offset + self._lengths[slot]].decode("utf-8")
+            answer = self._answers[slot]
+            correct_answer = self._irregular[slot] if answer == IRREGULAR_ANSWER else chr(answer)
+            return AnswerKey(correct_answer, explanation, self._points[slot])
+
+    def build(self, db: Session, batch_size: int = 5000) -> int:
+        """(Re)load every question, streaming rows; the previous index is served until the swap"""
+        fresh = AnswerKeyIndex()
+        rows = db.execute(
+            select(
+                QuestionEntity.id,
+                QuestionEntity.correct_answer,
+                QuestionEntity.points,
+                QuestionEntity.explanation
+            ).execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            fresh._put(row.id, row.correct_answer, row.points, row.explanation)
+        with self._lock:
+            self._slots = fresh._slots
+            self._answers = fresh._answers
+            self._irregular = fresh._irregular
+            self._points = fresh._points
+            self._offsets = fresh._offsets
+            self._lengths = fresh._lengths
+            self._blob = fresh._blob
+            self._garbage = 0
+            self.loaded = True
+        logger.info(f"Index des réponses construit ({len(fresh)} questions, {fresh.memory_usage()['total_bytes']} octets)")
+        return len(fresh)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def memory_usage(self) -> dict:
+        """Approximate footprint in bytes (dict table, key objects, arrays, explanation buffer)"""
+        with self._lock:
+            keys = sum(sys.getsizeof(key) for key in self._slots)
+            usage = {
+                "slots_bytes": sys.getsizeof(self._slots) + keys,
+                "answers_bytes": sys.getsizeof(self._answers) + sys.getsizeof(self._irregular),
+                "points_bytes": sys.getsizeof(self._points),
+                "explanation_refs_bytes": sys.getsizeof(self._offsets) + sys.getsizeof(self._lengths),
+                "explanations_bytes": sys.getsizeof(self._blob),
+            }
+        usage["total_bytes"] = sum(usage.values())
+        return usage
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "questions": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "garbage_bytes": self._garbage,
+            "irregular_answers": len(self._irregular),
+            **self.memory_usage(),
+        }
+
+
+answer_key_index = AnswerKeyIndex()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from services.http_cache import compute_etag
+
+logger = logging.getLogger(__name__)
+
+# Tag shared by every entry that aggregates the whole catalog (theme list, level list...)
+CATALOG_TAG = "catalog"
+
+
+def theme_tag(theme_id: str) -> str:
+    return f"theme:{theme_id}"
+
+
+def level_tag(level_id: str) -> str:
+    return f"level:{level_id}"
+
+
+class CatalogCache:
+    """
+    In-process cache for the theme -> level -> question catalog.
+
+    Entries are tagged (catalog, theme:<id>, level:<id>) so that a write only
+    drops the entries it affects. Every invalidation bumps a version counter;
+    a load that started before a bump is never stored, so a slow read cannot
+    put stale data back into the cache. Each entry also keeps the strong ETag
+    of its content, computed once when it is stored.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        # The TTL only bounds staleness between workers: writes handled by
+        # another process cannot invalidate this one.
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Any, str, float, Set[str]]] = {}
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _get_entry(self, key: str) -> Optional[Tuple[Any, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, etag, stored_at, _ = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            return value, etag
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._get_entry(key)
+        return entry[0] if entry else None
+
+    def get_or_load_with_etag(self, key: str, loader: Callable[[], Any], tags: Iterable[str] = ()) -> Tuple[Any, Optional[str]]:
+        """Return (value, etag) for key, calling loader() on a miss; etag is None when value is None"""
+        entry = self._get_entry(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        version = self._version
+        return self._store(key, loader(), version, tags)
+
+    async def aget_or_load_with_etag(self, key: str, loader: Callable[[], Awaitable[Any]], tags: Iterable[str] = ()) -> Tuple[Any, Optional[str]]:
+        """Same as get_or_load_with_etag for an async loader (AsyncSession queries)"""
+        entry = self._get_entry(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        version = self._version
+        return self._store(key, await loader(), version, tags)
+
+    def _store(self, key: str, value: Any, version: int, tags: Iterable[str]) -> Tuple[Any, Optional[str]]:
+        if value is None:
+            return None, None
+        etag = compute_etag(value)
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (value, etag, time.monotonic(), set(tags))
+        return value, etag
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], tags: Iterable[str] = ()) -> Any:
+        """Return the cached value for key, calling loader() on a miss"""
+        return self.get_or_load_with_etag(key, loader, tags)[0]
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry carrying one of the tags and bump the version"""
+        wanted = set(tags)
+        with self._lock:
+            self._version += 1
+            stale = [key for key, (_, _, _, entry_tags) in self._entries.items() if entry_tags & wanted]
+            for key in stale:
+                del self._entries[key]
+        logger.info(f"Catalog cache invalidated {sorted(wanted)} (version {self._version}, {len(stale)} entries dropped)")
+        return self._version
+
+    def clear(self) -> int:
+        """Drop every entry, e.g. after a bulk seed"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+        return self._version
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "version": self._version,
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+catalog_cache = CatalogCache(ttl_seconds=float(os.getenv("CATALOG_CACHE_TTL", 300)))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Cache-Control per route class
+# Public catalog reads: shared caches may keep them briefly, then revalidate with the ETag
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+# Admin catalog reads (contain correct answers): never stored by shared caches
+ADMIN_CACHE_CONTROL = "private, no-cache"
+# User profile reads: per user, always revalidated
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(value: Any) -> str:
+    """Strong ETag derived from the JSON content of a payload"""
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header of the request against etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses the weak comparison function
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request,
+    content: dict,
+    etag: Optional[str] = None,
+    cache_control: str = CATALOG_CACHE_CONTROL,
+    status_code: int = 200
+) -> Response:
+    """
+    JSONResponse carrying ETag and Cache-Control headers, or an empty
+    304 Not Modified when the client already holds this version.
+    """
+    if etag is None:
+        etag = compute_etag(content)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(status_code=status_code, content=content, headers=headers)
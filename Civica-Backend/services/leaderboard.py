@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.model_user import UserEntity
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no slot locking, a single worker is assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SNAPSHOT_PATH = os.getenv("LEADERBOARD_SNAPSHOT_PATH", "leaderboard_snapshot.json")
+LEADERBOARD_SNAPSHOT_INTERVAL = int(os.getenv("LEADERBOARD_SNAPSHOT_INTERVAL", 300))
+# Snapshot files workers of one deployment can claim (leaderboard_snapshot.json, leaderboard_snapshot.1.json, ...)
+LEADERBOARD_SNAPSHOT_SLOTS = int(os.getenv("LEADERBOARD_SNAPSHOT_SLOTS", 64))
+# Catch-up after loading a snapshot re-reads rows updated this long before it was taken
+# (clock skew between the API and MySQL, transactions committed while it was written)
+SNAPSHOT_CATCH_UP_MARGIN = timedelta(minutes=5)
+
+Key = Tuple[int, str]
+
+
+class _RankedKeys:
+    """
+    Sorted list of (-score, user_id) keys with O(log n) positional access.
+
+    Keys live in sorted buckets of at most 2 * LOAD items (bisect.insort
+    inside a bucket moves at most that many pointers). A Fenwick tree over
+    the bucket sizes turns "how many keys before this one" and "key at
+    position p" into O(log n) operations; it is only rebuilt when a bucket
+    is split or emptied.
+    """
+
+    LOAD = 256
+
+    def __init__(self):
+        self._lists: List[List[Key]] = []
+        self._maxes: List[Key] = []
+        self._tree: List[int] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rebuild_tree(self):
+        # 1-based Fenwick layout: node k is stored at tree[k - 1]
+        tree = [len(bucket) for bucket in self._lists]
+        for k in range(1, len(tree) + 1):
+            parent = k + (k & -k)
+            if parent <= len(tree):
+                tree[parent - 1] += tree[k - 1]
+        self._tree = tree
+
+    def _tree_add(self, i: int, delta: int):
+        k = i + 1
+        while k <= len(self._tree):
+            self._tree[k - 1] += delta
+            k += k & -k
+
+    def _prefix(self, i: int) -> int:
+        """Number of keys in buckets [0, i)"""
+        total = 0
+        while i > 0:
+            total += self._tree[i - 1]
+            i &= i - 1
+        return total
+
+    def _locate(self, pos: int) -> Tuple[int, int]:
+        """(bucket, offset) of the key at position pos"""
+        i = 0
+        step = 1 << len(self._tree).bit_length()
+        while step:
+            j = i + step
+            if j <= len(self._tree) and self._tree[j - 1] <= pos:
+                pos -= self._tree[j - 1]
+                i = j
+            step >>= 1
+        return i, pos
+
+    @classmethod
+    def from_keys(cls, keys: List[Key]) -> "_RankedKeys":
+        """Bulk load: one sort instead of n insertions"""
+        ranked = cls()
+        keys = sorted(keys)
+        ranked._lists = [keys[i:i + ranked.LOAD] for i in range(0, len(keys), ranked.LOAD)]
+        ranked._maxes = [bucket[-1] for bucket in ranked._lists]
+        ranked._len = len(keys)
+        ranked._rebuild_tree()
+        return ranked
+
+    def add(self, key: Key):
+        self._len += 1
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+        bucket = self._lists[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.LOAD:
+            self._lists[i:i + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._maxes[i:i + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def remove(self, key: Key):
+        i = bisect_left(self._maxes, key)
+        bucket = self._lists[i]
+        j = bisect_left(bucket, key)
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+
+    def index(self, key: Key) -> int:
+        """Number of keys strictly lower than key"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._prefix(i) + bisect_left(self._lists[i], key)
+
+    def iter_from(self, pos: int) -> Iterator[Key]:
+        if pos >= self._len:
+            return
+        i, j = self._locate(pos)
+        for bucket in self._lists[i:]:
+            yield from bucket[j:]
+            j = 0
+
+
+class Leaderboard:
+    """Scores of one board, ranked highest first (users with the same score share a rank)"""
+
+    def __init__(self):
+        self._keys = _RankedKeys()
+        self._scores: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def set(self, user_id: str, score: int):
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._keys.remove((-old, user_id))
+        self._keys.add((-score, user_id))
+        self._scores[user_id] = score
+
+    def add(self, user_id: str, points: int):
+        self.set(user_id, self._scores.get(user_id, 0) + points)
+
+    def discard(self, user_id: str):
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._keys.remove((-old, user_id))
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank_of_score(self, score: int) -> int:
+        # "" sorts before every user id: counts the users with a strictly higher score
+        return self._keys.index((-score, "")) + 1
+
+    def _entries(self, start: int, count: int) -> List[dict]:
+        entries = []
+        for neg_score, user_id in self._keys.iter_from(start):
+            if len(entries) == count:
+                break
+            entries.append({"rank": self.rank_of_score(-neg_score), "user_id": user_id, "score": -neg_score})
+        return entries
+
+    def top(self, limit: int, offset: int = 0) -> List[dict]:
+        return self._entries(offset, limit)
+
+    def rank(self, user_id: str) -> Optional[dict]:
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return {"rank": self.rank_of_score(score), "user_id": user_id, "score": score, "total": len(self._scores)}
+
+    def around(self, user_id: str, radius: int) -> List[dict]:
+        """Up to radius entries above and below user_id, the user included"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return []
+        position = self._keys.index((-score, user_id))
+        start = max(0, position - radius)
+        return self._entries(start, position - start + radius + 1)
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self._scores)
+
+    @classmethod
+    def from_dict(cls, scores: Dict[str, int]) -> "Leaderboard":
+        board = cls()
+        board._scores = dict(scores)
+        board._keys = _RankedKeys.from_keys([(-score, user_id) for user_id, score in scores.items()])
+        return board
+
+
+def slot_path(path: str, slot: int) -> str:
+    """Snapshot file of a worker slot: the configured path for slot 0, name.N.ext otherwise"""
+    if slot == 0:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{slot}{ext}"
+
+
+def current_season(now: Optional[datetime] = None) -> str:
+    """Weekly season id (ISO week), e.g. 2026-W07"""
+    year, week, _ = (now or datetime.utcnow()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class LeaderboardRegistry:
+    """
+    Global board (total points), weekly season board and per-theme boards.
+
+    The global board mirrors users.point and is rebuilt from the database
+    at startup. The weekly and theme boards only exist in memory (points
+    earned since the season start / through quizzes of the theme) and
+    survive restarts through the periodic JSON snapshot. Loading a snapshot
+    only re-reads the users updated since it was taken.
+
+    The weekly and theme boards assume a single worker: each worker only
+    counts the points credited through it, so with several workers their
+    ranks differ from one worker to the next, and points credited since the
+    last snapshot are lost on a crash. To keep workers from overwriting each
+    other's snapshot, each one claims its own file (a slot, held with an
+    exclusive lock for the life of the process) and, after a restart,
+    reloads whichever free slot it claims first.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = LEADERBOARD_SNAPSHOT_PATH, slots: int = LEADERBOARD_SNAPSHOT_SLOTS):
+        self.base_path = snapshot_path
+        self.slots = slots
+        self.snapshot_path: Optional[str] = None
+        self._slot_file = None
+        self._lock = threading.Lock()
+        self.global_board = Leaderboard()
+        self.weekly_board = Leaderboard()
+        self.season = current_season()
+        self.theme_boards: Dict[str, Leaderboard] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _roll_season(self):
+        season = current_season()
+        if season != self.season:
+            self.season = season
+            self.weekly_board = Leaderboard()
+
+    def record(self, user_id: str, score: int, points: int = 0, theme_id: Optional[str] = None):
+        """A score change: new total on the global board, points earned on the season and theme boards"""
+        with self._lock:
+            self._roll_season()
+            self.global_board.set(user_id, score)
+            if points:
+                self.weekly_board.add(user_id, points)
+                if theme_id:
+                    self.theme_boards.setdefault(theme_id, Leaderboard()).add(user_id, points)
+
+    def discard(self, user_id: str):
+        with self._lock:
+            self.global_board.discard(user_id)
+            self.weekly_board.discard(user_id)
+            for board in self.theme_boards.values():
+                board.discard(user_id)
+
+    def query(self, fn, board: str = "global", theme_id: Optional[str] = None):
+        """Run fn(board) under the registry lock; board is global, weekly or theme"""
+        with self._lock:
+            self._roll_season()
+            if board == "weekly":
+                target = self.weekly_board
+            elif board == "theme":
+                target = self.theme_boards.get(theme_id) or Leaderboard()
+            else:
+                target = self.global_board
+            return fn(target)
+
+    # Persistence
+
+    def _claim_slot(self) -> Optional[str]:
+        """Snapshot path of the first slot no other live worker holds (None: snapshots disabled)"""
+        if self.snapshot_path or not self.base_path:
+            return self.snapshot_path
+        if fcntl is None:
+            self.snapshot_path = self.base_path
+            return self.snapshot_path
+        for slot in range(self.slots):
+            path = slot_path(self.base_path, slot)
+            lock_file = open(path + ".lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            # Kept open: the lock is released when the worker exits
+            self._slot_file = lock_file
+            self.snapshot_path = path
+            return path
+        logger.error(f"Aucun emplacement de snapshot du classement libre ({self.slots} pris): snapshots désactivés")
+        return None
+
+    def snapshot(self):
+        if not self._claim_slot():
+            return
+        with self._lock:
+            data = {
+                "taken_at": datetime.utcnow().isoformat(),
+                "season": self.season,
+                "global": self.global_board.to_dict(),
+                "weekly": self.weekly_board.to_dict(),
+                "themes": {theme_id: board.to_dict() for theme_id, board in self.theme_boards.items()},
+            }
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _read_snapshot(self) -> Optional[dict]:
+        if not self._claim_slot() or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Snapshot du classement illisible, reconstruction complète: {e}")
+            return None
+
+    def load(self, db: Session, batch_size: int = 5000):
+        """Restore the boards from the last snapshot plus recent changes, or scan users.point"""
+        snapshot = self._read_snapshot()
+        global_scores: Dict[str, int] = {}
+        weekly_board = Leaderboard()
+        theme_boards: Dict[str, Leaderboard] = {}
+        season = current_season()
+        stmt = select(UserEntity.id, UserEntity.point, UserEntity.is_deleted)
+        if snapshot is None:
+            stmt = stmt.where(UserEntity.is_deleted == False)
+        else:
+            global_scores = snapshot["global"]
+            if snapshot.get("season") == season:
+                weekly_board = Leaderboard.from_dict(snapshot["weekly"])
+            theme_boards = {theme_id: Leaderboard.from_dict(scores) for theme_id, scores in snapshot["themes"].items()}
+            since = datetime.fromisoformat(snapshot["taken_at"]) - SNAPSHOT_CATCH_UP_MARGIN
+            stmt = stmt.where(UserEntity.updated_at >= since)
+
+        changed = 0
+        for row in db.execute(stmt.execution_options(yield_per=batch_size)):
+            changed += 1
+            if row.is_deleted:
+                global_scores.pop(row.id, None)
+            else:
+                global_scores[row.id] = row.point
+        global_board = Leaderboard.from_dict(global_scores)
+
+        with self._lock:
+            self.global_board = global_board
+            self.weekly_board = weekly_board
+            self.theme_boards = theme_boards
+            self.season = season
+        source = "snapshot + " if snapshot is not None else ""
+        logger.info(f"Classement chargé ({source}{changed} utilisateurs lus, {len(global_board)} classés)")
+
+    def _run(self):
+        while not self._stop.wait(LEADERBOARD_SNAPSHOT_INTERVAL):
+            try:
+                self.snapshot()
+            except Exception as e:
+                logger.error(f"Erreur lors du snapshot du classement: {e}")
+
+    def start(self):
+        if self._thread is None and self._claim_slot() and LEADERBOARD_SNAPSHOT_INTERVAL > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="leaderboard-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.snapshot()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "global": len(self.global_board),
+                "snapshot_path": self.snapshot_path,
+                "season": self.season,
+                "weekly": len(self.weekly_board),
+                "themes": len(self.theme_boards),
+            }
+
+
+leaderboards = LeaderboardRegistry()
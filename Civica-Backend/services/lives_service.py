@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models.model_user import UserEntity
+
+MAX_LIVES = 3
+# One life comes back every 30 minutes
+LIFE_REFRESH_SECONDS = 1800
+# Conflicting writers on the same account are retried this many times
+CONSUME_ATTEMPTS = 5
+
+
+@dataclass(frozen=True)
+class LifeState:
+    lives: int
+    # Start of the running regeneration period (stored as users.last_life_refresh)
+    anchor: datetime
+    # None when lives are full
+    next_life_at: Optional[datetime]
+
+    def next_life_in_seconds(self, now: Optional[datetime] = None) -> int:
+        if self.next_life_at is None:
+            return 0
+        return max(0, int((self.next_life_at - (now or datetime.utcnow())).total_seconds()))
+
+    def summary(self) -> dict:
+        """Fields that only change when a life is used or regained (safe inside ETag'd payloads)"""
+        return {
+            "current_lives": self.lives,
+            "max_lives": MAX_LIVES,
+            "next_life_at": self.next_life_at.isoformat() if self.next_life_at else None,
+        }
+
+    def to_dict(self, now: Optional[datetime] = None) -> dict:
+        return {
+            **self.summary(),
+            "next_life_in_seconds": self.next_life_in_seconds(now),
+            "last_life_refresh": self.anchor.isoformat(),
+        }
+
+
+def compute_lives(stored_lives: int, last_refresh: datetime, now: Optional[datetime] = None) -> LifeState:
+    """
+    Current lives from the stored pair (vies, last_life_refresh), without writing.
+
+    A life is regained every LIFE_REFRESH_SECONDS since last_refresh, up to
+    MAX_LIVES. While lives are missing, the anchor only moves by whole
+    periods so the time already spent towards the next life is kept.
+    """
+    now = now or datetime.utcnow()
+    if stored_lives >= MAX_LIVES:
+        return LifeState(stored_lives, last_refresh, None)
+    elapsed = max(0, int((now - last_refresh).total_seconds()))
+    regained = elapsed // LIFE_REFRESH_SECONDS
+    lives = min(MAX_LIVES, stored_lives + regained)
+    if lives >= MAX_LIVES:
+        # Full since the last missing life came back
+        return LifeState(lives, last_refresh + timedelta(seconds=(MAX_LIVES - stored_lives) * LIFE_REFRESH_SECONDS), None)
+    anchor = last_refresh + timedelta(seconds=regained * LIFE_REFRESH_SECONDS)
+    return LifeState(lives, anchor, anchor + timedelta(seconds=LIFE_REFRESH_SECONDS))
+
+
+def user_lives(user: UserEntity, now: Optional[datetime] = None) -> LifeState:
+    return compute_lives(user.vies, user.last_life_refresh or user.created_at, now)
+
+
+class NoLifeLeft(Exception):
+    def __init__(self, state: LifeState):
+        super().__init__("Aucune vie disponible")
+        self.state = state
+
+
+class LifeConflict(Exception):
+    def __init__(self, user_id: str):
+        super().__init__(f"Mises à jour concurrentes des vies de {user_id}")
+
+
+def consume_life(db: Session, user_id: str, commit: bool = True) -> Optional[LifeState]:
+    """
+    Use one life, folding in the lives regained since the last write.
+
+    The write is a single conditional UPDATE guarded on the (vies,
+    last_life_refresh) pair it was computed from, retried if another
+    request changed the row in between. Both columns are computed here
+    rather than in SQL: MySQL evaluates SET clauses left to right against
+    the updated row, so two interdependent assignments are not portable.
+    Returns the state after the consumption, None if the user does not
+    exist. Raises NoLifeLeft when no life is available.
+    """
+    for attempt in range(CONSUME_ATTEMPTS):
+        stmt = select(UserEntity.vies, UserEntity.last_life_refresh, UserEntity.created_at).where(UserEntity.id == user_id)
+        if attempt:
+            # A plain re-read would return the same REPEATABLE READ snapshot:
+            # after a conflict, read the latest version with a locking read
+            stmt = stmt.with_for_update()
+        row = db.execute(stmt).first()
+        if row is None:
+            return None
+        # DATETIME columns keep whole seconds
+        now = datetime.utcnow().replace(microsecond=0)
+        stored_refresh = row.last_life_refresh or row.created_at
+        state = compute_lives(row.vies, stored_refresh, now)
+        if state.lives <= 0:
+            raise NoLifeLeft(state)
+        # Leaving full lives starts the regeneration timer now
+        anchor = now if state.next_life_at is None else state.anchor
+        result = db.execute(
+            update(UserEntity)
+            .where(
+                UserEntity.id == user_id,
+                UserEntity.vies == row.vies,
+                # A window rather than equality: SQLite compares DATETIME as text and
+                # CURRENT_TIMESTAMP defaults have no fractional part. The anchor only
+                # moves by whole regeneration periods, or to now when vies changes too.
+                UserEntity.last_life_refresh > row.last_life_refresh - timedelta(seconds=1),
+                UserEntity.last_life_refresh < row.last_life_refresh + timedelta(seconds=1)
+            )
+            .values(vies=state.lives - 1, last_life_refresh=anchor)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            if commit:
+                db.commit()
+            return compute_lives(state.lives - 1, anchor, now)
+    raise LifeConflict(user_id)
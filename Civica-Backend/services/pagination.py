@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row of a page"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor("Invalid cursor")
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise InvalidCursor("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for ranked results (search), where no stable sort key exists"""
+    return encode_cursor(["offset", offset])
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tag, offset = json.loads(raw)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if tag != "offset" or not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor("Invalid cursor")
+    return offset
+
+
+def _after(columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    """(c1, c2, ...) > (v1, v2, ...) spelled out so MySQL can use a range scan on the index"""
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [c == v for c, v in zip(columns[:i], values[:i])]
+        step = column < value if descending else column > value
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+async def keyset_paginate(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    descending: bool = False,
+    page_by_default: bool = True
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of an entity select ordered by columns (the last one must
+    be unique, typically the primary key). Returns (rows, next_cursor);
+    next_cursor is None on the last page. Raises InvalidCursor for a
+    malformed cursor.
+
+    With page_by_default=False, a call with neither limit nor cursor returns
+    every row, as the listing did before it was paginated.
+    """
+    order = [c.desc() if descending else c.asc() for c in columns]
+    if not page_by_default and limit is None and not cursor:
+        return (await db.execute(stmt.order_by(*order))).scalars().all(), None
+    limit = clamp_limit(limit)
+    if cursor:
+        stmt = stmt.where(_after(columns, decode_cursor(cursor, columns), descending))
+    # One extra row tells whether another page exists without a COUNT
+    rows = (await db.execute(stmt.order_by(*order).limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+async def count_total(db: AsyncSession, stmt: Select) -> int:
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+import bisect
+import threading
+import time
+from typing import Dict
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class PoolStats:
+    """Checkout counters and wait time histogram of one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        # Checkouts that failed otherwise (connection refused, authentication, ...)
+        self.errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS, waited)] += 1
+
+    def error(self):
+        # Not a wait for a free connection: kept out of the histogram
+        with self._lock:
+            self.errors += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            histogram = {f"le_{bound}": count for bound, count in zip(WAIT_BUCKETS, self.buckets)}
+            histogram["le_inf"] = self.buckets[-1]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_histogram": histogram,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free connection when the pool is exhausted"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        except Exception:
+            self.stats.error()
+            raise
+        self.stats.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        new_pool = super().recreate()
+        # Keep the counters when SQLAlchemy rebuilds the pool (dispose, invalidation)
+        new_pool.stats = self.stats
+        return new_pool
+
+    def metrics(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            **self.stats.to_dict(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_metrics(engines: Dict[str, object]) -> Dict[str, dict]:
+    """Metrics of each named engine's pool (only instrumented pools report details)"""
+    metrics = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        if isinstance(pool, _InstrumentedPoolMixin):
+            metrics[name] = pool.metrics()
+        else:
+            metrics[name] = {"status": pool.status()}
+    return metrics
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+from datetime import datetime
+from typing import Iterable, List
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.model_level_progress import UserLevelProgressEntity
+from services.upsert import upsert, greatest
+
+
+def stars_for(correct_count: int, total: int, passed: bool) -> int:
+    """0 star for a failed attempt, then 1 / 2 / 3 stars at pass, 85 % and 100 % correct answers"""
+    if not passed or total == 0:
+        return 0
+    ratio = correct_count / total
+    if ratio >= 1:
+        return 3
+    if ratio >= 0.85:
+        return 2
+    return 1
+
+
+def attempt_row(user_id: str, level_id: str, score: int, stars: int, passed: bool, at: datetime = None) -> dict:
+    """One finished attempt, in the shape expected by upsert_progress"""
+    at = at or datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "level_id": level_id,
+        "best_score": score,
+        "stars": stars,
+        "attempts": 1,
+        "completed_at": at if passed else None,
+        "updated_at": at,
+    }
+
+
+def upsert_progress(db: Session, rows: Iterable[dict]) -> int:
+    """
+    Merge attempts into user_level_progress with multi-row upserts (no commit).
+
+    Existing rows keep the best score and stars, add the attempts and keep
+    the first completion date (see services.upsert). Several attempts on the
+    same (user, level) in one call are merged first, as a single statement
+    cannot touch a row twice on every backend.
+    """
+    merged = {}
+    for row in rows:
+        key = (row["user_id"], row["level_id"])
+        current = merged.get(key)
+        if current is None:
+            merged[key] = dict(row)
+            continue
+        current["best_score"] = max(current["best_score"], row["best_score"])
+        current["stars"] = max(current["stars"], row["stars"])
+        current["attempts"] += row["attempts"]
+        current["completed_at"] = current["completed_at"] or row["completed_at"]
+        current["updated_at"] = max(current["updated_at"], row["updated_at"])
+    values: List[dict] = list(merged.values())
+    if not values:
+        return 0
+
+    table = UserLevelProgressEntity.__table__
+    return upsert(db, table, values, ("user_id", "level_id"), lambda new: {
+        "best_score": greatest(table.c.best_score, new.best_score),
+        "stars": greatest(table.c.stars, new.stars),
+        "attempts": table.c.attempts + new.attempts,
+        "completed_at": func.coalesce(table.c.completed_at, new.completed_at),
+        "updated_at": new.updated_at,
+    })
+
+
+async def get_progress_map(db: AsyncSession, user_id: str) -> dict:
+    """Whole progress of a user keyed by level id (one range scan on the primary key)"""
+    rows = (await db.execute(
+        select(UserLevelProgressEntity).where(UserLevelProgressEntity.user_id == user_id)
+    )).scalars().all()
+    progress = {}
+    for row in rows:
+        entry = row.to_dict()
+        del entry["user_id"]
+        progress[entry.pop("level_id")] = entry
+    return progress
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from models.model_question_stats import QuestionStatsEntity, OPTIONS
+from services.upsert import upsert
+
+# Columns incremented by each batch
+COUNTERS = (
+    "attempts", "correct", "picks_a", "picks_b", "picks_c", "picks_d",
+    "skipped", "response_count", "response_ms_total",
+)
+
+
+def stats_deltas(events: List[dict]) -> List[dict]:
+    """Fold answer events into one row of counter increments per question"""
+    deltas: Dict[str, dict] = {}
+    for event in events:
+        row = deltas.get(event["question_id"])
+        if row is None:
+            row = deltas[event["question_id"]] = dict.fromkeys(COUNTERS, 0)
+            row["question_id"] = event["question_id"]
+        row["attempts"] += 1
+        row["correct"] += bool(event["is_correct"])
+        answer = event.get("answer")
+        if not answer:
+            row["skipped"] += 1
+        elif answer in OPTIONS:
+            row["picks_" + answer.lower()] += 1
+        response_ms = event.get("response_ms")
+        if response_ms is not None and response_ms >= 0:
+            row["response_count"] += 1
+            row["response_ms_total"] += response_ms
+    return list(deltas.values())
+
+
+def apply_answer_events(db: Session, events: List[dict]) -> int:
+    """
+    Add a batch of answer events to question_stats (no commit).
+
+    Meant as an answer-event listener: it runs in the transaction that
+    inserts the batch, so the counters never drift from the log. Each
+    question gets one row of increments, written with multi-row
+    upserts (col = col + increment); history is never re-read.
+    """
+    values = stats_deltas(events)
+    if not values:
+        return 0
+    now = datetime.utcnow()
+    for row in values:
+        row["updated_at"] = now
+
+    table = QuestionStatsEntity.__table__
+    return upsert(db, table, values, ("question_id",), lambda new: {
+        "updated_at": new.updated_at,
+        **{name: table.c[name] + new[name] for name in COUNTERS}
+    })
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Share of correct answers needed to pass a level (a failed attempt costs a life)
+QUIZ_PASS_RATIO = float(os.getenv("QUIZ_PASS_RATIO", 0.7))
+# Maximum number of questions served by one session
+QUIZ_MAX_QUESTIONS = int(os.getenv("QUIZ_MAX_QUESTIONS", 10))
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    correct_answer: str
+    explanation: Optional[str]
+    points: int
+
+
+@dataclass
+class QuizSession:
+    id: str
+    user_id: str
+    level_id: str
+    theme_id: str
+    # Question ids in the order they were served
+    question_ids: List[str]
+    # Answer keys captured when the session started: grading needs no query
+    keys: Dict[str, AnswerKey]
+    started_at: float = field(default_factory=time.time)
+
+    def grade(self, answers: Dict[str, str]) -> Tuple[List[dict], int, int]:
+        """Grade answers ({question_id: letter}); unanswered questions count as wrong"""
+        results = []
+        correct_count = 0
+        points_earned = 0
+        for question_id in self.question_ids:
+            key = self.keys[question_id]
+            answer = (answers.get(question_id) or "").strip().upper() or None
+            is_correct = answer == key.correct_answer
+            points = key.points if is_correct else 0
+            correct_count += is_correct
+            points_earned += points
+            results.append({
+                "question_id": question_id,
+                "answer": answer,
+                "is_correct": is_correct,
+                "correct_answer": key.correct_answer,
+                "explanation": key.explanation,
+                "points_earned": points,
+            })
+        return results, correct_count, points_earned
+
+    def passed(self, correct_count: int) -> bool:
+        return correct_count >= QUIZ_PASS_RATIO * len(self.question_ids)
+
+
+class QuizSessionStore:
+    """
+    In-process store of running quiz sessions.
+
+    A user has at most one running session: starting a new one replaces the
+    previous one. A session can be submitted once (take() removes it) and
+    expires after ttl_seconds. Sessions live in the worker that started them,
+    so multi-worker deployments need sticky routing on the user.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800.0):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, QuizSession] = {}
+        self._by_user: Dict[str, str] = {}
+
+    def _expired(self, session: QuizSession, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - session.started_at > self.ttl_seconds
+
+    def _purge(self, now: float):
+        for session in [s for s in self._sessions.values() if self._expired(s, now)]:
+            self._discard(session)
+
+    def _discard(self, session: QuizSession):
+        self._sessions.pop(session.id, None)
+        if self._by_user.get(session.user_id) == session.id:
+            del self._by_user[session.user_id]
+
+    def start(self, user_id: str, level_id: str, theme_id: str, questions: List[Tuple[str, AnswerKey]]) -> QuizSession:
+        session = QuizSession(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            level_id=level_id,
+            theme_id=theme_id,
+            question_ids=[question_id for question_id, _ in questions],
+            keys=dict(questions),
+        )
+        with self._lock:
+            self._purge(session.started_at)
+            previous = self._by_user.get(user_id)
+            if previous is not None:
+                self._sessions.pop(previous, None)
+            self._sessions[session.id] = session
+            self._by_user[user_id] = session.id
+        return session
+
+    def get(self, session_id: str) -> Optional[QuizSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._expired(session, time.time()):
+                self._discard(session)
+                return None
+            return session
+
+    def take(self, session_id: str, user_id: str) -> Optional[QuizSession]:
+        """Remove and return the running session of user_id, None if unknown, expired or not owned"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.user_id != user_id:
+                return None
+            self._discard(session)
+            if self._expired(session, time.time()):
+                return None
+            return session
+
+    def restore(self, session: QuizSession):
+        """Put back a session whose submission failed, unless the user started another one"""
+        with self._lock:
+            if session.user_id not in self._by_user:
+                self._sessions[session.id] = session
+                self._by_user[session.user_id] = session.id
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+quiz_sessions = QuizSessionStore(ttl_seconds=float(os.getenv("QUIZ_SESSION_TTL", 1800)))
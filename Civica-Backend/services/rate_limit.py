@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Buckets kept by the in-memory backend; the least recently used are evicted beyond this
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+# Shared backend for multi-worker deployments (requires the redis package), e.g. redis://cache:6379/0
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Take the client address from X-Forwarded-For (only behind a trusted reverse proxy)
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+# Reverse proxies in front of the app, each appending one X-Forwarded-For entry
+RATE_LIMIT_TRUSTED_HOPS = max(1, int(os.getenv("RATE_LIMIT_TRUSTED_HOPS", 1)))
+# Largest request body read to find the account key; a larger body is rejected with 413
+MAX_KEY_BODY_BYTES = 16 * 1024
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Token bucket: burst requests at once, then rate requests per second"""
+    name: str
+    rate: float
+    burst: int
+
+
+@dataclass(frozen=True)
+class Rule:
+    method: str
+    path: "re.Pattern"
+    # Per client address, and per account (field of the JSON body)
+    per_ip: Optional[Limit] = None
+    per_account: Optional[Limit] = None
+    account_field: Optional[str] = None
+
+
+def per_minute(name: str, count: int, burst: Optional[int] = None) -> Limit:
+    return Limit(name, count / 60.0, burst or count)
+
+
+RULES: List[Rule] = [
+    Rule("POST", re.compile(r"^/api/user/login/?$"),
+         per_ip=per_minute("login_ip", 20), per_account=per_minute("login_account", 5), account_field="email"),
+    Rule("POST", re.compile(r"^/api/user/register/?$"),
+         per_ip=per_minute("register_ip", 5)),
+    Rule("GET", re.compile(r"^/api/user/check-email/[^/]+/?$"),
+         per_ip=per_minute("check_email_ip", 30)),
+    Rule("POST", re.compile(r"^/api/user/change-password/?$"),
+         per_ip=per_minute("change_password_ip", 5), per_account=per_minute("change_password_account", 3), account_field="email"),
+    Rule("POST", re.compile(r"^/api/user/token/refresh/?$"),
+         per_ip=per_minute("refresh_ip", 30)),
+]
+
+
+class MemoryBackend:
+    """
+    Token buckets of this process in an LRU-bounded dict.
+
+    Each check is O(1). At most max_keys buckets are kept; the least
+    recently used one is evicted first. A bucket idle long enough to be
+    full again carries no information, so evicting it is harmless.
+    """
+
+    # take() never waits on I/O: safe to call from the event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.evictions = 0
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        """Consume cost tokens; returns (allowed, seconds until it would be allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(limit.burst), now))
+            tokens = min(float(limit.burst), tokens + (now - updated) * limit.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return allowed, 0.0 if allowed else (cost - tokens) / limit.rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._buckets)
+        return {"backend": "memory", "keys": size, "max_keys": self.max_keys, "evictions": self.evictions}
+
+
+class RedisBackend:
+    """
+    Token buckets shared by every worker, one Redis hash per key.
+
+    The refill and the consumption run in one Lua script with the Redis
+    clock, so concurrent workers never double-spend a bucket. Keys expire
+    once the bucket would be full again. If Redis fails, requests are let
+    through (fail open) rather than locking everybody out.
+    """
+
+    # take() is a network round trip: run it off the event loop
+    blocking = True
+
+    SCRIPT = """
+local limit_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * limit_rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / limit_rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / limit_rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+    def __init__(self, url: str, prefix: str = "civica:ratelimit:"):
+        import redis
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._script = self._client.register_script(self.SCRIPT)
+        self.errors = 0
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        try:
+            allowed, wait = self._script(keys=[self.prefix + key], args=[limit.rate, limit.burst, cost])
+            return bool(int(allowed)), float(wait)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Limiteur de débit indisponible, requête acceptée: {e}")
+            return True, 0.0
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors}
+
+
+def make_backend():
+    if RATE_LIMIT_REDIS_URL:
+        try:
+            return RedisBackend(RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.error("RATE_LIMIT_REDIS_URL défini mais le paquet redis n'est pas installé: limites par processus")
+    return MemoryBackend()
+
+
+class RateLimiter:
+    """Applies RULES to a request and keeps per-limit counters"""
+
+    def __init__(self, backend=None, rules: List[Rule] = RULES):
+        self.backend = backend or make_backend()
+        self.rules = rules
+        self._lock = threading.Lock()
+        self.allowed: Dict[str, int] = {}
+        self.limited: Dict[str, int] = {}
+
+    def match(self, method: str, path: str) -> Optional[Rule]:
+        for rule in self.rules:
+            if rule.method == method and rule.path.match(path):
+                return rule
+        return None
+
+    def _count(self, counters: Dict[str, int], name: str):
+        with self._lock:
+            counters[name] = counters.get(name, 0) + 1
+
+    def check(self, checks: List[Tuple[Limit, str]]) -> Optional[float]:
+        """None if every limit allows the request, else seconds to wait"""
+        for limit, key in checks:
+            allowed, wait = self.backend.take(f"{limit.name}:{key}", limit)
+            if not allowed:
+                self._count(self.limited, limit.name)
+                return wait
+            self._count(self.allowed, limit.name)
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": RATE_LIMIT_ENABLED,
+                **self.backend.stats(),
+                "allowed": dict(self.allowed),
+                "limited": dict(self.limited),
+            }
+
+
+def client_ip(scope: dict, trusted_hops: int = RATE_LIMIT_TRUSTED_HOPS) -> str:
+    """
+    Address of the client, behind RATE_LIMIT_TRUSTED_HOPS proxies when trusted.
+
+    The client controls the leftmost X-Forwarded-For entries; only the ones
+    appended by our own proxies, counted from the right, can be trusted.
+    """
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = [
+            entry.strip()
+            for name, value in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+            if entry.strip()
+        ]
+        if forwarded:
+            return forwarded[-min(trusted_hops, len(forwarded))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _account_from_body(body: bytes, field: str) -> Optional[str]:
+    try:
+        value = json.loads(body).get(field)
+    except Exception:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().lower()
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware throttling the authentication endpoints.
+
+    Runs before routing, so a rejected request costs a dict lookup, not a
+    bcrypt hash or a database query. Account limits need the JSON body:
+    it is read here (up to MAX_KEY_BODY_BYTES) and replayed to the app. A
+    larger body is rejected with 413, so padding the body cannot skip the
+    account limit. Rejections are 429 with a Retry-After header. A
+    network backend (Redis) is called from the threadpool, so a slow
+    Redis does not stall the event loop.
+    """
+
+    def __init__(self, app, limiter: Optional[Callable[[], RateLimiter]] = None):
+        self.app = app
+        self._limiter = limiter
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter() if self._limiter else rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiter
+        matched = limiter.match(scope["method"], scope["path"])
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        rule = matched
+
+        checks = []
+        if rule.per_ip:
+            checks.append((rule.per_ip, client_ip(scope)))
+        if rule.per_account and rule.account_field:
+            body, receive = await self._buffer_body(receive)
+            if body is None:
+                response = JSONResponse(
+                    status_code=413,
+                    content={
+                        "message": "request body too large",
+                        "data": ""
+                    }
+                )
+                await response(scope, receive, send)
+                return
+            account = _account_from_body(body, rule.account_field)
+            if account:
+                checks.append((rule.per_account, account))
+
+        if getattr(limiter.backend, "blocking", True):
+            wait = await run_in_threadpool(limiter.check, checks)
+        else:
+            wait = limiter.check(checks)
+        if wait is not None:
+            response = JSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                content={
+                    "message": "too many requests, please retry later",
+                    "data": ""
+                }
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _buffer_body(receive):
+        """Read the request body and return it with a receive callable replaying it (None: over MAX_KEY_BODY_BYTES)"""
+        messages = []
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+            if len(body) > MAX_KEY_BODY_BYTES:
+                break
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        return body if len(body) <= MAX_KEY_BODY_BYTES else None, replay
+
+
+rate_limiter = RateLimiter()
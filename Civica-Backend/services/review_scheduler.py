@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.model_level import LevelEntity
+from models.model_question import QuestionEntity
+from models.model_question_review import UserQuestionReviewEntity
+from services.catalog_cache import catalog_cache, CATALOG_TAG, theme_tag, level_tag
+from services.upsert import upsert
+
+MAX_BOX = 5
+# Time until a question is due again once it lands in a box
+BOX_INTERVALS = {
+    1: timedelta(minutes=10),
+    2: timedelta(days=1),
+    3: timedelta(days=3),
+    4: timedelta(days=7),
+    5: timedelta(days=21),
+}
+# Relative chance of filling a free slot with a question that is not due:
+# never seen, or seen and sitting in box n
+UNSEEN_WEIGHT = 3.0
+BOX_WEIGHTS = {1: 4.0, 2: 2.0, 3: 1.0, 4: 0.5, 5: 0.25}
+# Rows per SELECT / INSERT statement when applying event batches
+REVIEW_CHUNK_SIZE = 500
+# Random draws from the whole pool before listing the unseen questions explicitly
+UNSEEN_DRAW_ATTEMPTS = 32
+# Event sources allowed to move boxes: both are tied to a bearer-authenticated caller
+# (quiz submissions, and answer checks whose player comes from the token, never the body)
+REVIEW_SOURCES = ("quiz", "check")
+
+
+class ReviewState(NamedTuple):
+    question_id: str
+    box: int
+    due_at: datetime
+    last_correct: bool
+
+
+def next_state(box: int, correct: bool, at: datetime) -> Tuple[int, datetime]:
+    """Leitner step: a right answer moves the question up one box, a wrong one back to box 1"""
+    box = min(box + 1, MAX_BOX) if correct else 1
+    return box, at + BOX_INTERVALS[box]
+
+
+def apply_review_events(db: Session, events: List[dict]) -> int:
+    """
+    Move the answered questions between boxes for a batch of answer events (no commit).
+
+    Meant as an answer-event listener, in the transaction that inserts the
+    batch. The current states of the batch's (user, question) pairs are read
+    in one SELECT per chunk, the events are replayed in order in memory and
+    the final states written with multi-row upserts. Events from any other
+    source than REVIEW_SOURCES are ignored.
+    """
+    events = [event for event in events if event.get("source") in REVIEW_SOURCES]
+    if not events:
+        return 0
+    pairs = list(dict.fromkeys((e["user_id"], e["question_id"]) for e in events))
+    table = UserQuestionReviewEntity.__table__
+    states: Dict[Tuple[str, str], dict] = {}
+    for start in range(0, len(pairs), REVIEW_CHUNK_SIZE):
+        chunk = pairs[start:start + REVIEW_CHUNK_SIZE]
+        rows = db.execute(
+            select(table.c.user_id, table.c.question_id, table.c.box, table.c.reviews, table.c.lapses)
+            .where(tuple_(table.c.user_id, table.c.question_id).in_(chunk))
+        ).all()
+        for row in rows:
+            states[(row.user_id, row.question_id)] = {"box": row.box, "reviews": row.reviews, "lapses": row.lapses}
+
+    now = datetime.utcnow()
+    for event in events:
+        key = (event["user_id"], event["question_id"])
+        # A question never answered starts in box 1
+        state = states.setdefault(key, {"box": 1, "reviews": 0, "lapses": 0})
+        correct = bool(event["is_correct"])
+        state["box"], state["due_at"] = next_state(state["box"], correct, event.get("created_at") or now)
+        state["last_correct"] = correct
+        state["reviews"] += 1
+        state["lapses"] += not correct
+
+    values = [
+        {"user_id": user_id, "question_id": question_id, "updated_at": now, **state}
+        for (user_id, question_id), state in states.items()
+        if "due_at" in state
+    ]
+    changed = ("box", "due_at", "last_correct", "reviews", "lapses", "updated_at")
+    return upsert(
+        db, table, values, ("user_id", "question_id"),
+        lambda new: {name: new[name] for name in changed},
+        chunk_size=REVIEW_CHUNK_SIZE
+    )
+
+
+def _scope(stmt, level_id: Optional[str], theme_id: Optional[str]):
+    stmt = stmt.where(QuestionEntity.is_active == True, LevelEntity.is_active == True)
+    if level_id:
+        stmt = stmt.where(QuestionEntity.level_id == level_id)
+    if theme_id:
+        stmt = stmt.where(LevelEntity.theme_id == theme_id)
+    return stmt
+
+
+async def candidate_pool(db: AsyncSession, level_id: Optional[str] = None, theme_id: Optional[str] = None) -> List[str]:
+    """Ids of the active questions in scope, cached with the catalog and dropped on catalog writes"""
+    if level_id:
+        key, tags = f"practice_pool:level:{level_id}", (level_tag(level_id),)
+    elif theme_id:
+        key, tags = f"practice_pool:theme:{theme_id}", (theme_tag(theme_id),)
+    else:
+        key, tags = "practice_pool", (CATALOG_TAG,)
+
+    async def load_pool():
+        stmt = select(QuestionEntity.id).join(LevelEntity, LevelEntity.id == QuestionEntity.level_id)
+        return list((await db.execute(_scope(stmt, level_id, theme_id))).scalars().all())
+
+    pool, _ = await catalog_cache.aget_or_load_with_etag(key, load_pool, tags=tags)
+    return pool or []
+
+
+async def review_states(db: AsyncSession, user_id: str, level_id: Optional[str] = None, theme_id: Optional[str] = None) -> List[ReviewState]:
+    """Review state of every active question in scope the user has answered"""
+    review = UserQuestionReviewEntity
+    stmt = (
+        select(review.question_id, review.box, review.due_at, review.last_correct)
+        .join(QuestionEntity, QuestionEntity.id == review.question_id)
+        .join(LevelEntity, LevelEntity.id == QuestionEntity.level_id)
+        .where(review.user_id == user_id)
+    )
+    rows = (await db.execute(_scope(stmt, level_id, theme_id))).all()
+    return [ReviewState(*row) for row in rows]
+
+
+def _draw_unseen(pool: Sequence[str], excluded: set, rng: random.Random) -> Optional[str]:
+    """One question of the pool outside excluded, or None when there is none left"""
+    # The pool is usually much larger than what a user has answered: a few
+    # random draws find an unseen question without scanning the pool
+    for _ in range(UNSEEN_DRAW_ATTEMPTS):
+        question_id = pool[rng.randrange(len(pool))]
+        if question_id not in excluded:
+            return question_id
+    remaining = [question_id for question_id in pool if question_id not in excluded]
+    return rng.choice(remaining) if remaining else None
+
+
+def select_practice(
+    pool: Sequence[str],
+    states: Sequence[ReviewState],
+    size: int,
+    now: Optional[datetime] = None,
+    rng: Optional[random.Random] = None
+) -> List[Tuple[str, Optional[ReviewState], bool]]:
+    """
+    Choose size questions: due questions first (most overdue first), then
+    weighted sampling without replacement over the others.
+
+    The weight of a question only depends on its class (never answered, or
+    box 1 to 5), so each free slot first draws a class, with probability
+    weight x questions left in it, then a question uniformly inside the
+    class. The cost grows with size and with the number of questions the
+    user has answered, not with the pool. Returns (question_id, state, due)
+    tuples; state is None for a question never answered.
+    """
+    now = now or datetime.utcnow()
+    rng = rng or random
+    due = sorted((s for s in states if s.due_at <= now), key=lambda s: s.due_at)[:size]
+    picked = [(s.question_id, s, True) for s in due]
+
+    buckets: Dict[int, List[ReviewState]] = {box: [] for box in BOX_WEIGHTS}
+    for state in states:
+        if state.due_at > now:
+            buckets[min(max(state.box, 1), MAX_BOX)].append(state)
+    # Every answered question is excluded from the unseen class, picked or not
+    excluded = {s.question_id for s in states}
+    unseen_left = max(0, len(pool) - len(excluded)) if pool else 0
+
+    while len(picked) < size:
+        weights = [(box, BOX_WEIGHTS[box] * len(bucket)) for box, bucket in buckets.items() if bucket]
+        if unseen_left:
+            weights.append((0, UNSEEN_WEIGHT * unseen_left))
+        total = sum(weight for _, weight in weights)
+        if total <= 0:
+            break
+        target = rng.random() * total
+        for box, weight in weights:
+            target -= weight
+            if target < 0:
+                break
+        if box == 0:
+            question_id = _draw_unseen(pool, excluded, rng)
+            if question_id is None:
+                unseen_left = 0
+                continue
+            excluded.add(question_id)
+            unseen_left -= 1
+            picked.append((question_id, None, False))
+        else:
+            bucket = buckets[box]
+            i = rng.randrange(len(bucket))
+            # Swap-remove: O(1) sampling without replacement
+            bucket[i], bucket[-1] = bucket[-1], bucket[i]
+            state = bucket.pop()
+            picked.append((state.question_id, state, False))
+    return picked
+
+
+def select_mistakes(states: Sequence[ReviewState], size: int) -> List[Tuple[str, Optional[ReviewState], bool]]:
+    """Questions whose last answer was wrong, earliest due first"""
+    now = datetime.utcnow()
+    mistakes = sorted((s for s in states if not s.last_correct), key=lambda s: s.due_at)[:size]
+    return [(s.question_id, s, s.due_at <= now) for s in mistakes]
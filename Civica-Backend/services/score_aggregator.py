@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.model_user import UserEntity
+from services.score_service import level_for
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no file locking, a single worker is assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Write-behind mode for update-score (off by default: every credit is its own UPDATE)
+SCORE_WRITE_BEHIND = os.getenv("SCORE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+SCORE_FLUSH_INTERVAL_MS = int(os.getenv("SCORE_FLUSH_INTERVAL_MS", 250))
+SCORE_FLUSH_MAX_ENTRIES = int(os.getenv("SCORE_FLUSH_MAX_ENTRIES", 1000))
+# Pending credits are written here when the database is unreachable at shutdown,
+# and replayed at the next startup (shared by the workers, under an flock)
+SCORE_SPILL_PATH = os.getenv("SCORE_SPILL_PATH", "score_pending.json")
+# Users per UPDATE statement (bounds the CASE size)
+FLUSH_CHUNK_SIZE = 500
+# Reads of a user row retried when a flush commits while they run
+READ_ATTEMPTS = 3
+
+
+class ScoreAggregator:
+    """
+    Accumulates score credits per user in memory and writes them in batches.
+
+    A flush swaps out the pending deltas and applies them with one UPDATE
+    per chunk of users (point = point + CASE id ... END) and a single commit,
+    so N credits on M users cost M/500 statements instead of N commits. A
+    failed flush puts the deltas back. Reads add the pending credits to the
+    stored score so users never see a stale total.
+
+    The commit runs outside the lock (reads come from the event loop and
+    must not wait on MySQL). The generation counter is odd while a flush
+    holds deltas in flight and bumped again once they are committed: a
+    read started and finished in the same even generation cannot have seen
+    a flush commit, so its SELECT plus pending() counts every credit once.
+    Reads that straddle a flush are retried (read_user / aread_user).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval_ms: int = SCORE_FLUSH_INTERVAL_MS,
+        max_entries: int = SCORE_FLUSH_MAX_ENTRIES,
+        spill_path: Optional[str] = SCORE_SPILL_PATH
+    ):
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000.0
+        self.max_entries = max_entries
+        self.spill_path = spill_path
+        self._lock = threading.Lock()
+        # Serializes flushes: the background thread and shutdown may overlap
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._generation = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.credits = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def add(self, user_id: str, points: int):
+        with self._lock:
+            self._pending[user_id] = self._pending.get(user_id, 0) + points
+            self.credits += 1
+            full = len(self._pending) >= self.max_entries
+        if full:
+            self._wake.set()
+
+    def pending(self, user_id: str) -> int:
+        """Credits accepted for user_id but not yet committed (in flight included)"""
+        with self._lock:
+            return self._pending.get(user_id, 0) + self._in_flight.get(user_id, 0)
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def pending_since(self, user_id: str, generation: int) -> Optional[int]:
+        """
+        Credits to add to a row read after generation() returned generation,
+        or None if a flush was committing meanwhile (the row may or may not
+        include its deltas: read it again).
+        """
+        with self._lock:
+            if generation % 2 or generation != self._generation:
+                return None
+            return self._pending.get(user_id, 0)
+
+    def _settled_pending(self, user_id: str) -> int:
+        # Last resort when every attempt straddled a flush: in-flight credits are
+        # left out, a total can lag one flush but is never counted twice
+        with self._lock:
+            return self._pending.get(user_id, 0)
+
+    def read_user(self, db: Session, user_id: str, load: Callable[[], Any]) -> Tuple[Any, int]:
+        """
+        (load(), pending credits of user_id), or (None, 0) if load() finds nothing.
+
+        Each attempt runs in a new transaction (the session must hold no
+        uncommitted work): a repeatable-read snapshot taken before
+        generation() could miss a flush that the counter says is done.
+        """
+        for _ in range(READ_ATTEMPTS):
+            db.rollback()
+            generation = self.generation()
+            row = load()
+            if row is None:
+                return None, 0
+            delta = self.pending_since(user_id, generation)
+            if delta is not None:
+                return row, delta
+        return row, self._settled_pending(user_id)
+
+    async def aread_user(self, db: AsyncSession, user_id: str, load: Callable[[], Awaitable[Any]]) -> Tuple[Any, int]:
+        """read_user for the async handlers (load must refresh its row: populate_existing)"""
+        for _ in range(READ_ATTEMPTS):
+            await db.rollback()
+            generation = self.generation()
+            row = await load()
+            if row is None:
+                return None, 0
+            delta = self.pending_since(user_id, generation)
+            if delta is not None:
+                return row, delta
+        return row, self._settled_pending(user_id)
+
+    @staticmethod
+    def merge_into(user: dict, delta: int) -> dict:
+        """Add pending credits to a UserEntity.to_dict() payload (point, niveaux)"""
+        if delta:
+            user["point"] += delta
+            user["niveaux"] = level_for(user["point"])
+        return user
+
+    def flush(self) -> int:
+        """Write every pending credit; returns the number of users updated"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+                # Odd: deltas in flight, reads overlapping the commit are retried
+                self._generation += 1
+            db = None
+            try:
+                db = self.session_factory()
+                written = 0
+                user_ids = list(batch)
+                for start in range(0, len(user_ids), FLUSH_CHUNK_SIZE):
+                    chunk = user_ids[start:start + FLUSH_CHUNK_SIZE]
+                    delta = case({user_id: batch[user_id] for user_id in chunk}, value=UserEntity.id, else_=0)
+                    new_point = UserEntity.point + delta
+                    # niveaux before point: see score_service.credit_points
+                    written += db.execute(
+                        update(UserEntity)
+                        .where(UserEntity.id.in_(chunk))
+                        .ordered_values(
+                            (UserEntity.niveaux, level_for(new_point)),
+                            (UserEntity.point, new_point)
+                        )
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+                db.commit()
+                with self._lock:
+                    self._in_flight = {}
+                    self._generation += 1
+            except Exception as e:
+                if db is not None:
+                    db.rollback()
+                self.failures += 1
+                logger.error(f"Échec de l'écriture des scores en attente ({len(batch)} utilisateurs): {e}")
+                with self._lock:
+                    for user_id, points in batch.items():
+                        self._pending[user_id] = self._pending.get(user_id, 0) + points
+                    self._in_flight = {}
+                    self._generation += 1
+                raise
+            finally:
+                if db is not None:
+                    db.close()
+            self.flushes += 1
+            self.rows_written += written
+            return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Deltas were put back; retry at the next tick
+                time.sleep(self.interval)
+
+    def start(self):
+        self.replay_spill()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="score-aggregator", daemon=True)
+            self._thread.start()
+            logger.info(f"Agrégation des scores activée (flush toutes les {int(self.interval * 1000)} ms ou {self.max_entries} utilisateurs)")
+
+    def stop(self):
+        """Stop the flush thread and hand every pending credit over to the database (or the spill file)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            self.spill()
+
+    @contextmanager
+    def _spill_file_lock(self):
+        """Exclusive lock on spill_path.lock: workers spilling or replaying at once take turns"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.spill_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def spill(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch or not self.spill_path:
+            return
+        with self._spill_file_lock():
+            self._merge_spill(batch)
+        logger.warning(f"{len(batch)} scores en attente sauvegardés dans {self.spill_path}")
+
+    def _merge_spill(self, batch: Dict[str, int]):
+        existing = {}
+        if os.path.exists(self.spill_path):
+            with open(self.spill_path) as f:
+                existing = json.load(f)
+        for user_id, points in batch.items():
+            existing[user_id] = existing.get(user_id, 0) + points
+        tmp_path = f"{self.spill_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(existing, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spill_path)
+
+    def replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        # Under the lock: of the workers starting together, only the first one finds the file
+        with self._spill_file_lock():
+            if not os.path.exists(self.spill_path):
+                return
+            with open(self.spill_path) as f:
+                spilled = json.load(f)
+            with self._lock:
+                for user_id, points in spilled.items():
+                    self._pending[user_id] = self._pending.get(user_id, 0) + points
+            # From here on the credits are pending like any other (spilled again if the
+            # next shutdown cannot flush them); keeping the file would replay them twice
+            os.remove(self.spill_path)
+        logger.info(f"{len(spilled)} scores en attente rejoués depuis {self.spill_path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending) + len(self._in_flight)
+        return {
+            "enabled": self._thread is not None,
+            "pending_users": pending,
+            "credits": self.credits,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+        }
+
+
+def _session_factory() -> Session:
+    from database import SessionLocal
+    return SessionLocal()
+
+
+score_aggregator = ScoreAggregator(_session_factory)
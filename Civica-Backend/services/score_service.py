@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models.model_user import UserEntity
+from services.leaderboard import leaderboards
+from services.lives_service import compute_lives
+
+# Points per player level: level 1 = 0-99 points, level 2 = 100-199 points, etc.
+POINTS_PER_LEVEL = 100
+
+
+def level_for(points):
+    """Player level for a score; works on ints and on SQL expressions"""
+    return points // POINTS_PER_LEVEL + 1
+
+
+def credit_points(
+    db: Session,
+    user_id: str,
+    points: int,
+    theme_id: Optional[str] = None,
+    commit: bool = True
+) -> Optional[dict]:
+    """
+    Add points to a user in one UPDATE (point = point + :n) and return the
+    new state, or None if the user does not exist.
+
+    The level is derived in SQL from the same expression, so concurrent
+    credits on one account never lose updates and the row lock is held for
+    a single statement. niveaux is assigned before point on purpose: MySQL
+    evaluates single-table SET clauses left to right against the updated
+    row, other databases against the original one; this order gives the
+    same result on both.
+    """
+    new_point = UserEntity.point + points
+    result = db.execute(
+        update(UserEntity)
+        .where(UserEntity.id == user_id)
+        .ordered_values(
+            (UserEntity.niveaux, level_for(new_point)),
+            (UserEntity.point, new_point)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        if commit:
+            db.rollback()
+        return None
+
+    # MySQL has no UPDATE ... RETURNING: re-read by primary key inside the
+    # same transaction, the row is still locked by our UPDATE
+    row = db.execute(
+        select(UserEntity.point, UserEntity.niveaux, UserEntity.vies, UserEntity.last_life_refresh).where(UserEntity.id == user_id)
+    ).one()
+    if commit:
+        db.commit()
+        leaderboards.record(user_id, row.point, points, theme_id)
+    return {
+        "user_id": user_id,
+        "score": row.point,
+        "level": row.niveaux,
+        "lives": compute_lives(row.vies, row.last_life_refresh).lives,
+    }
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+from typing import Callable, Dict, List, Sequence
+from sqlalchemy import Table
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import GenericFunction
+
+# Rows per INSERT statement
+UPSERT_CHUNK_SIZE = 500
+
+
+class greatest(GenericFunction):
+    """Larger of the arguments: GREATEST() on MySQL, the multi-argument max() on SQLite"""
+    inherit_cache = True
+
+
+@compiles(greatest, "sqlite")
+def _greatest_sqlite(element, compiler, **kw):
+    return f"max({compiler.process(element.clauses, **kw)})"
+
+
+def upsert(
+    db: Session,
+    table: Table,
+    values: List[dict],
+    keys: Sequence[str],
+    updates: Callable[[object], Dict[str, object]],
+    chunk_size: int = UPSERT_CHUNK_SIZE
+) -> int:
+    """
+    Insert rows or update the existing ones with multi-row upserts (no commit).
+
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL, INSERT ... ON CONFLICT
+    (keys) DO UPDATE on SQLite, one statement per chunk_size rows.
+    updates(new) returns the SET clause as {column: expression}, where new
+    gives the proposed row (new.col, new["col"]) and table.c the stored one.
+    A single statement cannot touch a row twice on every backend: rows must
+    be unique on keys.
+    """
+    dialect = db.get_bind().dialect.name
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        if dialect == "mysql":
+            stmt = mysql_insert(table).values(chunk)
+            stmt = stmt.on_duplicate_key_update(**updates(stmt.inserted))
+        else:
+            stmt = sqlite_insert(table).values(chunk)
+            stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=updates(stmt.excluded))
+        db.execute(stmt)
+    return len(values)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.model_user import UserEntity, IsVerified, Status, ConnexionType, Role, duplicate_user_field
+from models.utils_model import UserImportRow
+from security.password_pool import password_pool, PasswordPoolSaturated, PASSWORD_POOL_WORKERS
+from security.password_utils import BCRYPT_ROUNDS
+
+logger = logging.getLogger(__name__)
+
+# Rows validated, hashed and inserted together (one transaction per batch)
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", 500))
+# Hashes an import keeps in the password pool at once; logins queue behind at most this many
+USER_IMPORT_HASH_CONCURRENCY = int(os.getenv("USER_IMPORT_HASH_CONCURRENCY", PASSWORD_POOL_WORKERS or os.cpu_count() or 1))
+# bcrypt cost of imported passwords; a lower cost is raised at the user's first login
+USER_IMPORT_BCRYPT_ROUNDS = int(os.getenv("USER_IMPORT_BCRYPT_ROUNDS", BCRYPT_ROUNDS))
+# Row errors listed in the report (all of them are counted)
+USER_IMPORT_MAX_ERRORS = int(os.getenv("USER_IMPORT_MAX_ERRORS", 1000))
+# Longest accepted line; a longer one is reported and skipped
+MAX_LINE_BYTES = 64 * 1024
+
+FORMATS = ("csv", "jsonl")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+
+def import_format(content_type: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """'csv' or 'jsonl' from the format parameter, else from the Content-Type"""
+    if requested:
+        return requested if requested in FORMATS else None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPES.get(media_type)
+
+
+class ImportReport:
+    def __init__(self, max_errors: int = USER_IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, message: str, email: Optional[str] = None):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "email": email, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    (line number, text) for each line of a streamed UTF-8 body.
+
+    Only the current partial line is buffered. A line longer than
+    max_line is yielded as None and its remainder skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    number = 0
+    skipping = False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            number += 1
+            if skipping:
+                skipping = False
+                yield number, None
+            elif len(line) > max_line:
+                yield number, None
+            else:
+                yield number, line.rstrip("\r")
+        if len(pending) > max_line:
+            pending = ""
+            skipping = True
+    pending += decoder.decode(b"", final=True)
+    if skipping or pending.strip():
+        number += 1
+        yield number, None if skipping or len(pending) > max_line else pending.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[Tuple[int, Optional[str]]], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, record, error) for each non-empty line; CSV takes its column names from the first line"""
+    header = None
+    async for number, line in lines:
+        if line is None:
+            yield number, None, f"line longer than {MAX_LINE_BYTES} bytes"
+            continue
+        if not line.strip():
+            continue
+        if fmt == "jsonl":
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "a JSON object is expected"
+                continue
+            yield number, record, None
+            continue
+        try:
+            values = next(csv.reader([line]))
+        except csv.Error as e:
+            yield number, None, f"invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        if len(values) != len(header):
+            yield number, None, f"{len(header)} columns expected, {len(values)} found"
+            continue
+        yield number, dict(zip(header, values)), None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+
+
+def _new_user_values(row: UserImportRow, hashed_password: str, now: datetime) -> dict:
+    # Same account as /register creates
+    return {
+        "id": str(uuid.uuid4()),
+        "email": row.email,
+        "password": hashed_password,
+        "is_verified": IsVerified.YES,
+        "status": Status.ACTIVE,
+        "connexion_type": ConnexionType.EMAIL,
+        "role": Role.USER,
+        "spseudo": row.spseudo,
+        "is_deleted": False,
+        "point": 0,
+        "niveaux": 1,
+        "vies": 3,
+        "last_life_refresh": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _existing_keys(db: Session, rows: List[Tuple[int, UserImportRow]]) -> Tuple[set, set]:
+    """Emails and pseudos of the batch already taken (one query, both unique indexes)"""
+    emails = [row.email for _, row in rows]
+    pseudos = [row.spseudo for _, row in rows]
+    found = db.execute(
+        select(UserEntity.email, UserEntity.spseudo).where(or_(UserEntity.email.in_(emails), UserEntity.spseudo.in_(pseudos)))
+    ).all()
+    db.rollback()
+    # MySQL compares case-insensitively: so does the pre-check
+    return {email.lower() for email, _ in found if email}, {pseudo.lower() for _, pseudo in found if pseudo}
+
+
+def _insert_batch(db: Session, values: List[dict]) -> List[Tuple[int, str]]:
+    """
+    INSERT the batch in one executemany and one transaction.
+
+    If a concurrent registration took an email or pseudo since the
+    pre-check, the batch is rolled back and replayed row by row; the
+    conflicting rows are returned as (index, message).
+    """
+    try:
+        db.execute(insert(UserEntity), values)
+        db.commit()
+        return []
+    except IntegrityError:
+        db.rollback()
+    failed = []
+    for index, value in enumerate(values):
+        try:
+            db.execute(insert(UserEntity), [value])
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            field = duplicate_user_field(e)
+            failed.append((index, f"{field} already in use" if field else "rejected by the database"))
+    return failed
+
+
+class UserImporter:
+    """
+    Streams a CSV or JSON-lines body into the users table.
+
+    Rows are validated as they arrive and handled by batches of
+    batch_size: one query finds the emails and pseudos already taken, the
+    remaining passwords are hashed in parallel in the password pool, and
+    the batch is inserted with one executemany in its own transaction. The
+    body is read only as fast as batches are written, so memory holds one
+    batch whatever the file size. A bad row is reported and skipped; it
+    never aborts the import.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = USER_IMPORT_BATCH_SIZE,
+        hash_concurrency: int = USER_IMPORT_HASH_CONCURRENCY,
+        rounds: int = USER_IMPORT_BCRYPT_ROUNDS
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.rounds = rounds
+        self._hash_slots = asyncio.Semaphore(max(1, hash_concurrency))
+        self.report = ImportReport()
+
+    async def run(self, chunks: AsyncIterator[bytes], fmt: str) -> ImportReport:
+        batch: List[Tuple[int, UserImportRow]] = []
+        async for number, record, error in iter_records(iter_lines(chunks), fmt):
+            self.report.received += 1
+            if error is not None:
+                self.report.error(number, error)
+                continue
+            try:
+                batch.append((number, UserImportRow.model_validate(record)))
+            except ValidationError as e:
+                self.report.error(number, _validation_message(e), record.get("email") if isinstance(record.get("email"), str) else None)
+                continue
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        if batch:
+            await self._flush(batch)
+        return self.report
+
+    async def _hash(self, password: str) -> str:
+        async with self._hash_slots:
+            while True:
+                try:
+                    return await password_pool.hash(password, self.rounds)
+                except PasswordPoolSaturated:
+                    # Interactive logins filled the pool: give way to them
+                    await asyncio.sleep(0.05)
+
+    async def _flush(self, batch: List[Tuple[int, UserImportRow]]):
+        taken_emails, taken_pseudos = await run_in_threadpool(_existing_keys, self.db, batch)
+        rows = []
+        for number, row in batch:
+            email, pseudo = row.email.lower(), row.spseudo.lower()
+            if email in taken_emails:
+                self.report.error(number, "email already in use", row.email)
+            elif pseudo in taken_pseudos:
+                self.report.error(number, "spseudo already in use", row.email)
+            else:
+                # Later rows of the file with the same email or pseudo are duplicates
+                taken_emails.add(email)
+                taken_pseudos.add(pseudo)
+                rows.append((number, row))
+        if not rows:
+            return
+
+        hashes = await asyncio.gather(*(self._hash(row.password) for _, row in rows), return_exceptions=True)
+        now = datetime.utcnow()
+        values, numbers = [], []
+        for (number, row), hashed in zip(rows, hashes):
+            if isinstance(hashed, Exception):
+                logger.error(f"Erreur de hachage à la ligne {number} de l'import: {hashed}")
+                self.report.error(number, "password hashing failed", row.email)
+                continue
+            values.append(_new_user_values(row, hashed, now))
+            numbers.append((number, row.email))
+        if not values:
+            return
+
+        failed = await run_in_threadpool(_insert_batch, self.db, values)
+        for index, message in failed:
+            number, email = numbers[index]
+            self.report.error(number, message, email)
+        self.report.created += len(values) - len(failed)
+
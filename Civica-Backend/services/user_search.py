@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import logging
+from typing import List, Optional, Tuple
+from sqlalchemy import case, func, inspect, or_, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.model_user import UserEntity, USER_SEARCH_INDEX
+
+logger = logging.getLogger(__name__)
+
+# Default innodb ngram_token_size: shorter terms cannot hit the FULLTEXT index
+NGRAM_TOKEN_SIZE = 2
+
+_fulltext_available: Optional[bool] = None
+
+
+def fulltext_available(db: Session) -> bool:
+    """True when the users table carries the MySQL ngram FULLTEXT index (checked once per process)"""
+    global _fulltext_available
+    # No lock: this runs inside AsyncSession.run_sync, where blocking on a
+    # lock held by another coroutine would stall the event loop
+    if _fulltext_available is None:
+        available = False
+        if db.get_bind().dialect.name == "mysql":
+            try:
+                indexes = inspect(db.connection()).get_indexes(UserEntity.__tablename__)
+                available = any(index["name"] == USER_SEARCH_INDEX for index in indexes)
+            except Exception as e:
+                logger.error(f"Impossible de lire les index de la table users: {e}")
+        if not available:
+            logger.info("Index FULLTEXT utilisateurs indisponible, recherche par LIKE")
+        _fulltext_available = available
+    return _fulltext_available
+
+
+async def search_users(
+    db: AsyncSession,
+    term: str,
+    limit: int,
+    offset: int = 0,
+    include_total: bool = False
+) -> Tuple[List[UserEntity], bool, Optional[int]]:
+    """
+    Search users by email or pseudo (substring, case-insensitive collation).
+
+    Results are ranked exact match first, then prefix matches, then other
+    substring matches (by FULLTEXT relevance on MySQL). Returns
+    (users, has_more, total); total is only computed when include_total is set.
+    A blank term matches nobody: callers list users without a search instead.
+    """
+    term = term.strip()
+    if not term:
+        return [], False, 0 if include_total else None
+    exact = or_(UserEntity.email == term, UserEntity.spseudo == term)
+    prefix = or_(
+        UserEntity.email.startswith(term, autoescape=True),
+        UserEntity.spseudo.startswith(term, autoescape=True)
+    )
+    rank = case((exact, 0), (prefix, 1), else_=2)
+
+    stmt = select(UserEntity)
+    order_by = [rank]
+    if len(term) >= NGRAM_TOKEN_SIZE and _fulltext_available is not False and await db.run_sync(fulltext_available):
+        # Phrase search on the ngram index behaves like a substring match
+        phrase = '"' + term.replace('"', " ") + '"'
+        relevance = match(UserEntity.email, UserEntity.spseudo, against=phrase).in_boolean_mode()
+        stmt = stmt.where(relevance)
+        order_by.append(relevance.desc())
+    elif len(term) < NGRAM_TOKEN_SIZE:
+        # Too short for a meaningful substring search: prefix only, served by the B-tree indexes
+        stmt = stmt.where(prefix)
+    else:
+        stmt = stmt.where(or_(
+            UserEntity.email.contains(term, autoescape=True),
+            UserEntity.spseudo.contains(term, autoescape=True)
+        ))
+    order_by += [UserEntity.email, UserEntity.id]
+
+    rows = (await db.execute(stmt.order_by(*order_by).offset(offset).limit(limit + 1))).scalars().all()
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    return rows[:limit], len(rows) > limit, total
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Fixtures communes : l'application tourne sur une base SQLite temporaire.
+
+Les variables d'environnement sont fixées avant tout import de database/app,
+qui créent leurs moteurs à l'import. Lancer depuis Civica-Backend :
+
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_DB_DIR = tempfile.mkdtemp(prefix="civica-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ.setdefault("SECRET_KEY", "civica-tests-secret")
+
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+
+class StatementCounter:
+    """Requêtes SQL envoyées par les moteurs synchrone et asynchrone (before_cursor_execute)"""
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture(scope="session")
+def app():
+    import app as app_module
+    from database import Base, engine
+    Base.metadata.create_all(engine)
+    return app_module.app
+
+
+@pytest.fixture
+def client(app):
+    # Sans `with` : les événements startup (MySQL, seeders, threads) ne sont pas lancés
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clean_state(app):
+    """Tables vidées et cache du catalogue remis à zéro avant chaque test"""
+    from database import Base, engine
+    from services.catalog_cache import catalog_cache
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    catalog_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db(app):
+    from database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def count_statements(app):
+    from database import engine, async_engine
+    return StatementCounter([engine, async_engine.sync_engine])
+
+
+@pytest.fixture
+def auth_headers(app):
+    """En-tête Bearer d'un jeton d'accès pour user_id (rôle USER par défaut)"""
+    from security.token_utils import generate_token
+
+    def make(user_id: str, role: str = "USER") -> dict:
+        return {"Authorization": f"Bearer {generate_token({'id': user_id, 'role': role})}"}
+    return make
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Index des clés de réponse : même correction que la colonne correct_answer, quelle que soit sa valeur"""
+import uuid
+import pytest
+from services.answer_key_index import AnswerKeyIndex
+from tests.test_catalog_queries import seed_catalog
+from models.model_level import LevelEntity
+
+
+@pytest.mark.parametrize("stored", ["B", "É", "AB", "", "中"])
+def test_index_returns_the_stored_key_unchanged(stored):
+    index = AnswerKeyIndex()
+    question_id = str(uuid.uuid4())
+    index.put(question_id, stored, 5, "explication")
+    assert index.get(question_id).correct_answer == stored
+    # Une réécriture en lettre ordinaire remplace la clé irrégulière
+    index.put(question_id, "C", 5, None)
+    assert index.get(question_id).correct_answer == "C"
+    assert index.stats()["irregular_answers"] == 0
+
+
+def test_create_question_rejects_other_values(client, db):
+    seed_catalog(db, themes=1, levels_per_theme=1, questions_per_level=0)
+    level_id = db.query(LevelEntity.id).scalar()
+    question = {
+        "level_id": level_id, "question_text": "?",
+        "option_a": "a", "option_b": "b", "option_c": "c", "option_d": "d"
+    }
+    for value in ("É", "AB", "a", "E", ""):
+        response = client.post("/api/question/question", json={**question, "correct_answer": value})
+        assert response.status_code == 400, value
+    assert client.post("/api/question/question", json={**question, "correct_answer": "D"}).status_code == 201
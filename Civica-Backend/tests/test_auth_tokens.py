@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Jetons d'accès et de rafraîchissement : révocation, rotation, expiration"""
+import time
+import jwt
+import pytest
+from datetime import datetime, timedelta
+from database import SessionLocal
+from models.model_auth_token import RefreshTokenEntity, RevokedTokenEntity
+from models.model_user import UserEntity
+from security import refresh_tokens, revocation
+from security.auth import authenticate, token_cache
+from security.password_utils import get_password_hash
+from security.refresh_tokens import InvalidRefreshToken, issue_refresh_token, rotate_refresh_token
+from security.revocation import RevocationFilter, revocation_filter
+from security.token_utils import SECRET_KEY
+from tests.test_score_service import make_user
+
+PASSWORD = "Secret1!pass"
+
+
+def revoke(revocations: RevocationFilter, jti: str):
+    db = SessionLocal()
+    try:
+        revocations.revoke(db, jti, None, datetime.utcnow() + timedelta(hours=1))
+    finally:
+        db.close()
+
+
+def test_revocation_during_rebuild_is_kept(db, monkeypatch):
+    revocations = RevocationFilter(SessionLocal)
+    revoke(revocations, "early")
+
+    class RevokingBloomFilter(revocation.BloomFilter):
+        def __init__(self, capacity, fp_rate):
+            super().__init__(capacity, fp_rate)
+            # Une déconnexion arrive entre le SELECT du rebuild et l'échange des filtres
+            revoke(revocations, "late")
+
+    monkeypatch.setattr(revocation, "BloomFilter", RevokingBloomFilter)
+    assert revocations.rebuild(db) == 1
+    monkeypatch.undo()
+
+    assert revocations.is_revoked("early")
+    assert revocations.is_revoked("late")
+    # "late" reste confirmé en mémoire : pas de lecture en base
+    assert revocations.db_lookups == 1
+    assert db.get(RevokedTokenEntity, "late") is not None
+
+
+def login(client, db) -> dict:
+    user_id = make_user(db)
+    user = db.get(UserEntity, user_id)
+    user.password = get_password_hash(PASSWORD)
+    db.commit()
+    response = client.post("/api/user/login", json={"email": user.email, "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def family_revoked(db, family_id: str) -> bool:
+    db.expire_all()
+    tokens = db.query(RefreshTokenEntity).filter(RefreshTokenEntity.family_id == family_id).all()
+    return bool(tokens) and all(token.revoked_at is not None for token in tokens)
+
+
+def test_refresh_rotates_and_retires_the_old_token(client, db):
+    session = login(client, db)
+    first = client.post("/api/user/token/refresh", json={"refresh_token": session["refresh_token"]})
+    assert first.status_code == 200
+    rotated = first.json()["data"]
+    assert rotated["refresh_token"] != session["refresh_token"]
+    assert authenticate(rotated["token"]).user_id == session["id"]
+
+    second = client.post("/api/user/token/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert second.status_code == 200
+
+
+def test_reused_refresh_token_revokes_the_family(client, db):
+    session = login(client, db)
+    rotated = client.post("/api/user/token/refresh", json={"refresh_token": session["refresh_token"]}).json()["data"]
+
+    # L'ancien jeton rejoué (fuite) : toute la chaîne tombe, y compris le jeton légitime
+    replay = client.post("/api/user/token/refresh", json={"refresh_token": session["refresh_token"]})
+    assert replay.status_code == 401
+    family_id = db.query(RefreshTokenEntity.family_id).filter(RefreshTokenEntity.user_id == session["id"]).distinct().scalar()
+    assert family_revoked(db, family_id)
+    assert client.post("/api/user/token/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+
+def test_concurrent_rotation_loses_the_conditional_update(db, monkeypatch):
+    token, entity = issue_refresh_token(db, make_user(db))
+    family_id = entity.family_id
+    issue = refresh_tokens.issue_refresh_token
+    winner = []
+    raced = []
+
+    def racing_issue(*args, **kwargs):
+        if not raced:
+            raced.append(True)
+            # Une autre requête échange le même jeton entre le SELECT et l'UPDATE conditionnel
+            other = SessionLocal()
+            try:
+                winner.append(rotate_refresh_token(other, token)[0])
+            finally:
+                other.close()
+        return issue(*args, **kwargs)
+
+    monkeypatch.setattr(refresh_tokens, "issue_refresh_token", racing_issue)
+    with pytest.raises(InvalidRefreshToken):
+        rotate_refresh_token(db, token)
+    monkeypatch.undo()
+
+    # Une seule rotation a réussi, et l'usage double a révoqué la chaîne
+    assert len(winner) == 1
+    assert family_revoked(db, family_id)
+    with pytest.raises(InvalidRefreshToken):
+        rotate_refresh_token(db, winner[0])
+
+
+def test_logout_revokes_the_access_token(client, db):
+    session = login(client, db)
+    headers = {"Authorization": f"Bearer {session['token']}"}
+    response = client.post("/api/user/logout", json={"refresh_token": session["refresh_token"]}, headers=headers)
+    assert response.status_code == 200
+
+    jti = jwt.decode(session["token"], SECRET_KEY, algorithms=["HS256"])["jti"]
+    assert db.get(RevokedTokenEntity, jti) is not None
+    # Ce worker : bloqué sans lecture en base
+    lookups = revocation_filter.db_lookups
+    assert client.post("/api/user/logout", headers=headers).status_code == 401
+    assert revocation_filter.db_lookups == lookups
+    assert client.post("/api/user/token/refresh", json={"refresh_token": session["refresh_token"]}).status_code == 401
+
+    # Un autre worker : le filtre de Bloom signale le jti, la base le confirme une fois
+    other = RevocationFilter(SessionLocal)
+    other.rebuild(db)
+    assert other.is_revoked(jti) and other.is_revoked(jti)
+    assert other.db_lookups == 1
+    assert not other.is_revoked("never-revoked")
+
+
+def legacy_token(user_id: str, expires_in: float) -> str:
+    # Format d'avant la claim exp : l'expiration n'est que dans user.expires_in
+    return jwt.encode({"user": {"id": user_id, "role": "USER", "expires_in": expires_in}}, SECRET_KEY, algorithm="HS256")
+
+
+def test_legacy_token_expires_at_expires_in():
+    token_cache.clear()
+    now = time.time()
+    assert authenticate(legacy_token("legacy", now + 600)).user_id == "legacy"
+    assert authenticate(legacy_token("legacy", now - 1)) is None
+    token = jwt.encode({"user": {"id": "legacy"}}, SECRET_KEY, algorithm="HS256")
+    assert authenticate(token) is None
+
+
+def test_cached_legacy_token_does_not_outlive_expires_in():
+    token_cache.clear()
+    token = legacy_token("legacy", time.time() + 1)
+    assert authenticate(token) is not None
+    time.sleep(1.1)
+    assert authenticate(token) is None
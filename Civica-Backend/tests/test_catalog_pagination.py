@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Listes de niveaux et de questions : complètes sans limit ni cursor, paginées sinon"""
+import pytest
+from services.pagination import DEFAULT_PAGE_SIZE
+from tests.test_catalog_queries import seed_catalog
+
+LISTINGS = ["/api/level/", "/api/question/"]
+
+
+@pytest.fixture
+def catalog(db):
+    # Plus de lignes qu'une page par défaut
+    seed_catalog(db, themes=1, levels_per_theme=DEFAULT_PAGE_SIZE + 10, questions_per_level=1)
+
+
+@pytest.mark.parametrize("path", LISTINGS)
+def test_listing_without_limit_returns_every_row(client, catalog, path):
+    body = client.get(path).json()
+    assert len(body["data"]) == DEFAULT_PAGE_SIZE + 10
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("path", LISTINGS)
+def test_listing_with_limit_is_paginated(client, catalog, path):
+    first = client.get(path, params={"limit": 40}).json()
+    assert len(first["data"]) == 40
+    rest = client.get(path, params={"limit": 40, "cursor": first["next_cursor"]}).json()
+    assert len(rest["data"]) == DEFAULT_PAGE_SIZE + 10 - 40
+    assert rest["next_cursor"] is None
+    ids = [row["id"] for row in first["data"] + rest["data"]]
+    assert len(set(ids)) == len(ids)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Nombre de requêtes SQL des listes du catalogue : constant quel que soit le
+nombre de thèmes, niveaux et questions (pas de chargement paresseux N+1).
+"""
+import uuid
+import pytest
+from models.model_themes import ThemeEntity
+from models.model_level import LevelEntity
+from models.model_question import QuestionEntity
+from services.catalog_cache import catalog_cache
+
+
+def seed_catalog(db, themes: int, levels_per_theme: int, questions_per_level: int) -> str:
+    """Crée un catalogue actif, retourne l'id du premier thème"""
+    first_theme = None
+    for t in range(themes):
+        theme = ThemeEntity(id=str(uuid.uuid4()), title=f"Thème {t}", order_index=t, is_active=True)
+        db.add(theme)
+        first_theme = first_theme or theme.id
+        for l in range(levels_per_theme):
+            level = LevelEntity(id=str(uuid.uuid4()), theme_id=theme.id, title=f"Niveau {l}", order_index=l, is_active=True)
+            db.add(level)
+            for q in range(questions_per_level):
+                db.add(QuestionEntity(
+                    id=str(uuid.uuid4()), level_id=level.id, question_text=f"Question {q}",
+                    option_a="a", option_b="b", option_c="c", option_d="d",
+                    correct_answer="A", points=1, order_index=q, is_active=True
+                ))
+    db.commit()
+    return first_theme
+
+
+ENDPOINTS = [
+    ("get_all_themes", lambda theme_id: "/api/theme/"),
+    ("get_theme_by_id", lambda theme_id: f"/api/theme/{theme_id}"),
+    ("get_theme_levels (theme)", lambda theme_id: f"/api/theme/{theme_id}/levels"),
+    ("get_theme_levels (level)", lambda theme_id: f"/api/level/{theme_id}/levels"),
+    ("get_levels", lambda theme_id: "/api/level/"),
+]
+
+
+def statements_for(client, count_statements, path: str) -> int:
+    # Le cache du catalogue masquerait les requêtes : chaque mesure part d'un cache vide
+    catalog_cache.clear()
+    with count_statements as counter:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+
+@pytest.mark.parametrize("name,path", ENDPOINTS, ids=[name for name, _ in ENDPOINTS])
+def test_catalog_endpoint_issues_constant_number_of_statements(client, db, count_statements, name, path):
+    small_theme = seed_catalog(db, themes=1, levels_per_theme=1, questions_per_level=1)
+    small = statements_for(client, count_statements, path(small_theme))
+
+    large_theme = seed_catalog(db, themes=5, levels_per_theme=8, questions_per_level=12)
+    # Le thème mesuré a lui aussi plus de niveaux et de questions
+    large = statements_for(client, count_statements, path(large_theme))
+
+    assert small == large, f"{name}: {small} requêtes pour 1 niveau, {large} pour 8"
+    assert large <= 4, f"{name}: {large} requêtes"
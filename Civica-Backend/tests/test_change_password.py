@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Changement de mot de passe : nouveau hash bcrypt, sessions existantes révoquées"""
+from models.model_user import UserEntity
+from security.refresh_tokens import issue_refresh_token
+from tests.test_score_service import make_user
+
+NEW_PASSWORD = "Nouveau1!pass"
+
+
+def test_change_password_rehashes_and_revokes_refresh_tokens(client, db):
+    user_id = make_user(db)
+    email = db.get(UserEntity, user_id).email
+    refresh_token, _ = issue_refresh_token(db, user_id)
+
+    response = client.post("/api/user/change-password", json={
+        "email": email, "password": NEW_PASSWORD, "confirm_password": NEW_PASSWORD
+    })
+    assert response.status_code == 200
+
+    login = client.post("/api/user/login", json={"email": email, "password": NEW_PASSWORD})
+    assert login.status_code == 200
+    # Le jeton de rafraîchissement émis avant le changement ne sert plus
+    assert client.post("/api/user/token/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+
+def test_change_password_unknown_email(client):
+    response = client.post("/api/user/change-password", json={
+        "email": "absent@test.cm", "password": NEW_PASSWORD, "confirm_password": NEW_PASSWORD
+    })
+    assert response.status_code == 404
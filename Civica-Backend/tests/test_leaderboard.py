@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Classements : _RankedKeys et Leaderboard comparés à une liste triée, sur des opérations aléatoires"""
+import random
+import pytest
+from services.leaderboard import Leaderboard, _RankedKeys
+
+OPERATIONS = 3000
+USERS = 120
+
+
+@pytest.fixture(autouse=True)
+def small_buckets(monkeypatch):
+    # Seaux de 8 clés au plus : découpages et seaux vidés arrivent dès quelques dizaines de clés
+    monkeypatch.setattr(_RankedKeys, "LOAD", 4)
+
+
+def expected_keys(scores: dict) -> list:
+    return sorted((-score, user_id) for user_id, score in scores.items())
+
+
+def expected_entry(scores: dict, user_id: str) -> dict:
+    score = scores[user_id]
+    return {"rank": 1 + sum(1 for other in scores.values() if other > score), "user_id": user_id, "score": score}
+
+
+def check_keys(ranked: _RankedKeys, keys: list, rng: random.Random):
+    assert len(ranked) == len(keys)
+    assert list(ranked.iter_from(0)) == keys
+    assert all(0 < len(bucket) <= 2 * ranked.LOAD for bucket in ranked._lists)
+    for pos in rng.sample(range(len(keys) + 2), min(len(keys) + 2, 10)):
+        assert list(ranked.iter_from(pos)) == keys[pos:]
+    probes = rng.sample(keys, min(len(keys), 5)) + [(-rng.randint(0, 60), f"u{rng.randint(0, USERS)}x")]
+    for key in probes:
+        assert ranked.index(key) == sum(1 for other in keys if other < key)
+
+
+def check_board(board: Leaderboard, scores: dict, rng: random.Random):
+    keys = expected_keys(scores)
+    check_keys(board._keys, keys, rng)
+    offset, limit = rng.randint(0, len(keys) + 1), rng.randint(1, 12)
+    assert board.top(limit, offset) == [expected_entry(scores, user_id) for _, user_id in keys[offset:offset + limit]]
+    for user_id in rng.sample(sorted(scores), min(len(scores), 3)):
+        assert board.rank(user_id) == {**expected_entry(scores, user_id), "total": len(scores)}
+        radius = rng.randint(0, 5)
+        position = keys.index((-scores[user_id], user_id))
+        window = keys[max(0, position - radius):position + radius + 1]
+        assert board.around(user_id, radius) == [expected_entry(scores, other) for _, other in window]
+    assert board.rank("absent") is None and board.around("absent", 3) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ranked_keys_match_a_sorted_list(seed):
+    rng = random.Random(seed)
+    ranked = _RankedKeys()
+    keys = []
+    splits = removals = 0
+    for step in range(OPERATIONS):
+        buckets = len(ranked._lists)
+        # Plus d'ajouts au début, plus de retraits ensuite : la liste grossit puis se vide
+        if keys and rng.random() < (0.3 if step < OPERATIONS // 2 else 0.7):
+            key = keys.pop(rng.randrange(len(keys)))
+            ranked.remove(key)
+            removals += len(ranked._lists) < buckets
+        else:
+            key = (-rng.randint(0, 50), f"u{rng.randint(0, 10 ** 6)}")
+            if key in keys:
+                continue
+            keys.append(key)
+            keys.sort()
+            ranked.add(key)
+            splits += len(ranked._lists) > buckets and buckets > 0
+        if step % 50 == 0:
+            check_keys(ranked, keys, rng)
+    check_keys(ranked, keys, rng)
+    assert splits > 10 and removals > 10
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_leaderboard_matches_brute_force(seed):
+    rng = random.Random(seed)
+    # Une partie du classement chargée d'un coup, comme au démarrage
+    scores = {f"user-{i}": rng.randint(0, 40) for i in range(USERS // 2)}
+    board = Leaderboard.from_dict(scores)
+    for step in range(OPERATIONS):
+        user_id = f"user-{rng.randrange(USERS)}"
+        action = rng.random()
+        if action < 0.4:
+            # Peu de scores distincts : beaucoup d'ex aequo
+            scores[user_id] = rng.randint(0, 40)
+            board.set(user_id, scores[user_id])
+        elif action < 0.8:
+            points = rng.randint(1, 5)
+            scores[user_id] = scores.get(user_id, 0) + points
+            board.add(user_id, points)
+        else:
+            scores.pop(user_id, None)
+            board.discard(user_id)
+        if step % 50 == 0:
+            check_board(board, scores, rng)
+    check_board(board, scores, rng)
+    assert board.to_dict() == scores
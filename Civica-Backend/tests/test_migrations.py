@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""Migrations appliquées sur une base vide, sans create_tables() préalable"""
+from sqlalchemy import create_engine, inspect
+from migrations import run_migrations, verify_all, load_migrations
+
+
+def test_upgrade_on_empty_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    try:
+        applied = run_migrations(engine)
+        assert applied == [module.VERSION for module in load_migrations()]
+        assert {"users", "questions", "answer_events"} <= set(inspect(engine).get_table_names())
+        assert verify_all(engine) == []
+        # Une seconde exécution ne refait rien
+        assert run_migrations(engine) == []
+    finally:
+        engine.dispose()
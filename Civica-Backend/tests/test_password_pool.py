@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Pool bcrypt : un processus tué (OOM) ne casse pas le pool jusqu'au redémarrage du serveur"""
+import asyncio
+import os
+import signal
+import time
+import pytest
+from security.password_pool import PasswordHasherPool
+from security.password_utils import verify_password
+
+
+def kill_workers(pool: PasswordHasherPool):
+    for pid in list(pool._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    time.sleep(0.5)
+
+
+@pytest.fixture
+def pool():
+    pool = PasswordHasherPool(workers=1, max_pending=4)
+    pool.warm_up()
+    yield pool
+    pool.shutdown()
+
+
+def test_sync_hash_survives_killed_worker(pool):
+    kill_workers(pool)
+    hashed = pool.hash_sync("motdepasse")
+    assert verify_password("motdepasse", hashed)
+    assert pool.stats()["restarts"] == 1
+    assert pool.stats()["pending"] == 0
+
+
+def test_async_hash_survives_killed_worker(pool):
+    kill_workers(pool)
+    hashed = asyncio.run(pool.hash("motdepasse"))
+    assert verify_password("motdepasse", hashed)
+    assert pool.stats()["restarts"] == 1
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Métriques du pool : seule l'attente d'une connexion libre compte comme timeout"""
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, exc
+from services.pool_metrics import InstrumentedQueuePool
+
+
+def test_exhausted_pool_counts_a_timeout(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    try:
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        metrics = engine.pool.metrics()
+        assert (metrics["checkouts"], metrics["timeouts"], metrics["errors"]) == (1, 1, 0)
+        assert metrics["wait_seconds_max"] >= 0.05
+    finally:
+        engine.dispose()
+
+
+def test_connection_failure_is_not_a_timeout():
+    def refuse():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    engine = create_engine("sqlite://", creator=refuse, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0)
+    with pytest.raises(exc.OperationalError):
+        engine.connect()
+    metrics = engine.pool.metrics()
+    assert (metrics["checkouts"], metrics["timeouts"], metrics["errors"]) == (0, 0, 1)
+    assert sum(metrics["wait_histogram"].values()) == 0
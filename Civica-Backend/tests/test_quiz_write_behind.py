@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Quiz soumis en mode write-behind : même score que update-score (base + crédits en attente)"""
+import pytest
+import routes.quiz_route as quiz_route
+from database import SessionLocal
+from models.model_level import LevelEntity
+from models.model_user import UserEntity
+from services.leaderboard import leaderboards
+from services.score_aggregator import ScoreAggregator
+from services.score_service import level_for
+from tests.test_catalog_queries import seed_catalog
+from tests.test_score_service import make_user
+
+
+@pytest.fixture
+def aggregator(monkeypatch):
+    aggregator = ScoreAggregator(SessionLocal, spill_path=None)
+    monkeypatch.setattr(quiz_route, "SCORE_WRITE_BEHIND", True)
+    monkeypatch.setattr(quiz_route, "score_aggregator", aggregator)
+    return aggregator
+
+
+def test_submit_adds_pending_credits(client, db, auth_headers, aggregator):
+    user_id = make_user(db)
+    seed_catalog(db, themes=1, levels_per_theme=1, questions_per_level=3)
+    level_id = db.query(LevelEntity.id).scalar()
+    # Crédit d'update-score pas encore écrit en base
+    aggregator.add(user_id, 95)
+    headers = auth_headers(user_id)
+
+    started = client.post("/api/quiz/start", json={"user_id": user_id, "level_id": level_id}, headers=headers)
+    assert started.status_code == 201, started.text
+    answers = [{"question_id": q["id"], "answer": "A"} for q in started.json()["data"]["questions"]]
+    submitted = client.post(
+        f"/api/quiz/{started.json()['data']['session_id']}/submit",
+        json={"user_id": user_id, "answers": answers},
+        headers=headers
+    )
+    assert submitted.status_code == 200, submitted.text
+
+    user = submitted.json()["data"]["user"]
+    assert (user["score"], user["level"]) == (98, level_for(98))
+    assert leaderboards.query(lambda board: board.score(user_id)) == 98
+    # Les points du quiz attendent le prochain flush, comme ceux d'update-score
+    assert aggregator.pending(user_id) == 98
+    db.expire_all()
+    assert db.get(UserEntity, user_id).point == 0
+    aggregator.flush()
+    db.expire_all()
+    assert db.get(UserEntity, user_id).point == 98
+    leaderboards.discard(user_id)
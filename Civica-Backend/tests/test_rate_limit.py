@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Limiteur de débit : un backend réseau n'est jamais appelé depuis la boucle d'événements"""
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services import rate_limit
+from services.rate_limit import MemoryBackend, RateLimiter, RateLimitMiddleware
+
+
+class RecordingBackend(MemoryBackend):
+    """Seaux en mémoire, mais déclarés bloquants comme RedisBackend"""
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.in_event_loop = []
+
+    def take(self, key, limit, cost=1.0):
+        try:
+            asyncio.get_running_loop()
+            self.in_event_loop.append(True)
+        except RuntimeError:
+            self.in_event_loop.append(False)
+        return super().take(key, limit, cost)
+
+
+def make_client(backend) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/api/user/login")
+    def login():
+        return {"message": "ok", "data": ""}
+
+    limiter = RateLimiter(backend)
+    app.add_middleware(RateLimitMiddleware, limiter=lambda: limiter)
+    return TestClient(app)
+
+
+def test_blocking_backend_runs_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    backend = RecordingBackend()
+    client = make_client(backend)
+
+    for _ in range(5):
+        assert client.post("/api/user/login", json={"email": "a@test.cm"}).status_code == 200
+    # Compte épuisé : 5 connexions par minute
+    response = client.post("/api/user/login", json={"email": "a@test.cm"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Adresse et compte vérifiés à chaque requête, jamais depuis la boucle
+    assert backend.in_event_loop and not any(backend.in_event_loop)
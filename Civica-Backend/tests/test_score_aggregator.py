@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Écriture différée des scores : un crédit n'est jamais compté deux fois par une lecture"""
+import threading
+from database import SessionLocal
+from models.model_user import UserEntity
+from services.score_aggregator import ScoreAggregator
+from tests.test_score_service import make_user
+
+
+def read_score(aggregator: ScoreAggregator, user_id: str) -> int:
+    # Comme une lecture de profil : SELECT, puis ajout des crédits en attente
+    db = SessionLocal()
+    try:
+        point, pending = aggregator.read_user(db, user_id, lambda: db.get(UserEntity, user_id, populate_existing=True).point)
+        return point + pending
+    finally:
+        db.close()
+
+
+def test_read_during_flush_commit_is_not_double_counted(db):
+    user_id = make_user(db)
+    results = []
+
+    class ReadingSession(type(db)):
+        def commit(self):
+            super().commit()
+            # Une lecture arrive entre le commit et la libération des crédits en vol ;
+            # elle ne doit pas attendre la fin du flush
+            thread = threading.Thread(target=lambda: results.append(read_score(aggregator, user_id)))
+            thread.start()
+            thread.join(5)
+            assert not thread.is_alive()
+
+    aggregator = ScoreAggregator(lambda: ReadingSession(bind=db.get_bind()), spill_path=None)
+    aggregator.add(user_id, 40)
+    assert aggregator.flush() == 1
+
+    assert results == [40]
+    assert read_score(aggregator, user_id) == 40
+    aggregator.add(user_id, 5)
+    assert read_score(aggregator, user_id) == 45
+
+
+def test_failed_flush_keeps_credits_pending(db):
+    user_id = make_user(db)
+
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    aggregator = ScoreAggregator(broken_session, spill_path=None)
+    aggregator.add(user_id, 15)
+    try:
+        aggregator.flush()
+    except RuntimeError:
+        pass
+    assert aggregator.pending(user_id) == 15
+
+
+def test_concurrent_spills_and_replays_keep_every_credit_once(tmp_path):
+    # Plusieurs workers qui s'arrêtent sans base, puis redémarrent ensemble
+    path = str(tmp_path / "score_pending.json")
+    workers = [ScoreAggregator(None, spill_path=path) for _ in range(8)]
+    for i, worker in enumerate(workers):
+        worker.add("shared", 1)
+        worker.add(f"user-{i}", i + 1)
+    threads = [threading.Thread(target=worker.spill) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    restarted = [ScoreAggregator(None, spill_path=path) for _ in range(4)]
+    threads = [threading.Thread(target=worker.replay_spill) for worker in restarted]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(worker.pending("shared") for worker in restarted) == 8
+    for i in range(8):
+        assert sum(worker.pending(f"user-{i}") for worker in restarted) == i + 1
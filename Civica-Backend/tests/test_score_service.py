@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Crédit de points atomique : aucune mise à jour perdue sous crédits concurrents"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from database import SessionLocal
+from models.model_user import UserEntity, IsVerified, Status, ConnexionType, Role
+from services.score_service import credit_points, level_for
+
+CREDITS = 300
+THREADS = 32
+
+
+def make_user(db) -> str:
+    user_id = str(uuid.uuid4())
+    db.add(UserEntity(
+        id=user_id, email=f"{user_id}@test.cm", spseudo=user_id[:8], password="x",
+        is_verified=IsVerified.YES, status=Status.ACTIVE, connexion_type=ConnexionType.EMAIL,
+        role=Role.USER, point=0, niveaux=1
+    ))
+    db.commit()
+    return user_id
+
+
+def credit(user_id: str, points: int) -> dict:
+    # Une session par crédit, comme une requête par soumission
+    db = SessionLocal()
+    try:
+        return credit_points(db, user_id, points)
+    finally:
+        db.close()
+
+
+def test_parallel_credits_are_never_lost(db):
+    user_id = make_user(db)
+    amounts = [i % 7 + 1 for i in range(CREDITS)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(lambda points: credit(user_id, points), amounts))
+
+    total = sum(amounts)
+    db.expire_all()
+    user = db.get(UserEntity, user_id)
+    assert user.point == total
+    assert user.niveaux == level_for(total)
+    # Chaque crédit a vu un total distinct : aucun n'a été écrasé par un autre
+    assert len({result["score"] for result in results}) == CREDITS
+    assert max(result["score"] for result in results) == total
+
+
+def test_level_follows_score_thresholds(db):
+    user_id = make_user(db)
+    assert credit(user_id, 99)["level"] == 1
+    assert credit(user_id, 1)["level"] == 2
+    result = credit(user_id, 250)
+    assert (result["score"], result["level"]) == (350, 4)
+
+
+def test_unknown_user_is_not_credited(db):
+    assert credit(str(uuid.uuid4()), 10) is None
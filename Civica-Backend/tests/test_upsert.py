@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Upsert partagé : insertion puis fusion avec la ligne existante"""
+from models.model_level import LevelEntity
+from models.model_level_progress import UserLevelProgressEntity
+from models.model_question import QuestionEntity
+from models.model_question_stats import QuestionStatsEntity
+from services.progress_service import upsert_progress, attempt_row
+from services.question_stats import apply_answer_events
+from tests.test_catalog_queries import seed_catalog
+from tests.test_score_service import make_user
+
+
+def test_progress_keeps_best_score_and_adds_attempts(db):
+    user_id = make_user(db)
+    seed_catalog(db, themes=1, levels_per_theme=1, questions_per_level=0)
+    level_id = db.query(LevelEntity.id).scalar()
+
+    upsert_progress(db, [attempt_row(user_id, level_id, 5, 1, True)])
+    db.commit()
+    upsert_progress(db, [attempt_row(user_id, level_id, 3, 0, False), attempt_row(user_id, level_id, 8, 2, True)])
+    db.commit()
+
+    progress = db.get(UserLevelProgressEntity, (user_id, level_id))
+    assert (progress.best_score, progress.stars, progress.attempts) == (8, 2, 3)
+    assert progress.completed_at is not None
+
+
+def test_question_stats_counters_are_incremented(db):
+    seed_catalog(db, themes=1, levels_per_theme=1, questions_per_level=1)
+    question_id = db.query(QuestionEntity.id).scalar()
+    events = [{"question_id": question_id, "answer": "A", "is_correct": True, "response_ms": 100}]
+
+    apply_answer_events(db, events)
+    apply_answer_events(db, events + [{"question_id": question_id, "answer": None, "is_correct": False}])
+    db.commit()
+
+    stats = db.get(QuestionStatsEntity, question_id)
+    assert (stats.attempts, stats.correct, stats.picks_a, stats.skipped) == (3, 2, 2, 1)
+    assert (stats.response_count, stats.response_ms_total) == (2, 200)
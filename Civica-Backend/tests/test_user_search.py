@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Recherche d'utilisateurs : un terme vide ou fait d'espaces ne sélectionne pas toute la table"""
+from tests.test_score_service import make_user
+
+
+def test_blank_term_lists_users_like_no_term(client, db):
+    for _ in range(3):
+        make_user(db)
+    listing = client.get("/api/user/", params={"limit": 2}).json()
+    blank = client.get("/api/user/", params={"limit": 2, "email": "   "}).json()
+    assert blank == listing
+    assert len(blank["data"]) == 2 and blank["next_cursor"] is not None
+
+
+def test_search_still_matches_a_pseudo(client, db):
+    user_id = make_user(db)
+    make_user(db)
+    body = client.get("/api/user/", params={"email": f" {user_id[:8]} "}).json()
+    assert [user["id"] for user in body["data"]] == [user_id]
+